@@ -2,6 +2,9 @@
 #include <chrono>
 #include <vector>
 #include <zmq.hpp>
+#include <fstream>
+#include <sstream>
+#include <iomanip>
 #include <iostream>
 #include <sys/time.h>
 #include <openssl/sha.h>
@@ -10,6 +13,8 @@
 #include <emp-agmpc/emp-agmpc.h>
 #include "gmp.h"
 #include "utils.h"
+#include "batch_hash.h"
+#include "writer_db.h"
 #include "config.hpp"
 #include "hickae.hpp"
 
@@ -21,10 +26,20 @@ PRG            prg;
 unsigned char  search_token[32];
 int            num_writers;
 unordered_map<string, uint64_t> *state;
+vector<bool>   state_loaded;
+vector<string> update_keywords;
+string         data_dir = "../../database_small/";
+ofstream       capture_file;
+chrono::time_point<chrono::high_resolution_clock> capture_start;
 uint64_t       epoch;
 string         encoded_epoch;
 mutex          mtx_pa, mtx_kw;
 
+struct Op_Latency {
+    double client;          // Query/token generation time (us)
+    double end_to_end;      // Including the round trip to the server (us)
+};
+
 void init_sys() {
     // Setup
     HICKAE_Setup(num_writers);
@@ -37,24 +52,85 @@ void init_sys() {
     cout << "Finished reader and writers setup" << endl;
 }
 
-void search(vector<int> &writer_subset, string &keyword) {
+// Capture file layout (little-endian): "HRMSCAP1" followed by records of
+//   kind (1 byte) | timestamp in us (8 bytes) | writer subset size (4 bytes) | 
+//   label length (2 bytes) | label | payload length (8 bytes) | payload
+bool start_capture(const char *path) {
+    capture_file.close();
+    capture_file.open(path, ios::binary);
+    if(!capture_file.is_open()) return false;
+    capture_file.write("HRMSCAP1", 8);
+    capture_start = clock_start();
+    return true;
+}
+
+// Send a query to the server, recording its serialized bytes when capturing
+void send_query(zmq::message_t &query, string label, int writer_subset_size) {
+    if(capture_file.is_open()) {
+        uint8_t  kind = *((uint8_t*)query.data());
+        uint64_t timestamp = time_from(capture_start);
+        uint16_t label_len = label.length();
+        uint64_t payload_len = query.size();
+        capture_file.write((char*)&kind, 1);
+        capture_file.write((char*)&timestamp, sizeof(uint64_t));
+        capture_file.write((char*)&writer_subset_size, sizeof(int));
+        capture_file.write((char*)&label_len, sizeof(uint16_t));
+        capture_file.write(label.c_str(), label_len);
+        capture_file.write((char*)&payload_len, sizeof(uint64_t));
+        capture_file.write((char*)query.data(), payload_len);
+        capture_file.flush();
+    }
+    socket_client->send(query);
+}
+
+// Load keyword states of a writer once and keep them across operations
+// In real, this should be stored locally by the writer
+unordered_map<string, uint64_t> &load_state(int writer_id) {
+    if(state_loaded[writer_id]) return state[writer_id];
+
+    Writer_DB db;
+    if(!db.open(data_dir, writer_id)) 
+        cout << "✗ Cannot read the database of writer " << (writer_id + 1) << " in " << data_dir << endl;
+    else {
+        state[writer_id].reserve(db.size());
+        for(uint32_t k = 0; k < db.size(); ++k) 
+            state[writer_id][string(db.keyword(k), db.keyword_length(k))] = db.num_postings(k);
+    }
+    state_loaded[writer_id] = true;
+    return state[writer_id];
+}
+
+// Load the keywords used for updates once
+vector<string> &load_update_keywords() {
+    if(update_keywords.empty()) {
+        ifstream updated_file("words.txt");
+        string keyword;
+        while(getline(updated_file, keyword)) 
+            update_keywords.push_back(keyword);
+        updated_file.close();
+    }
+    return update_keywords;
+}
+
+Op_Latency search(vector<int> &writer_subset, string &keyword) {
+    Op_Latency latency;
     auto start = clock_start();
 
 #ifdef SEARCH_EFFICIENCY
     // Create partition-matching search token
-    int num_partitions = NUM_PARTITIONS;
+    int num_partitions = partition_params.num_partitions;
 
-    PEKS_AggKey cp[RECURSIVE_LEVEL];
+    PEKS_AggKey cp[MAX_RECURSIVE_LEVEL];
     array<uint64_t, 2> hash_value = mm_hash((uint8_t*)keyword.c_str(), keyword.length());
-    uint64_t pid = ((hash_value[0] % num_partitions) << 2) | RECURSIVE_LEVEL;
-    HICKAE_Extract(writer_subset, (char*)to_string(pid).c_str(), &cp[RECURSIVE_LEVEL - 1]);
+    uint64_t pid = ((hash_value[0] % num_partitions) << 2) | partition_params.recursive_level;
+    HICKAE_Extract(writer_subset, (char*)to_string(pid).c_str(), &cp[partition_params.recursive_level - 1]);
     
-    for(int k = 1; k < RECURSIVE_LEVEL; ++k) {
-        num_partitions /= PARTITION_SIZE;
+    for(int k = 1; k < partition_params.recursive_level; ++k) {
+        num_partitions /= partition_params.partition_size;
         hash_value = mm_hash((uint8_t*)&pid, sizeof(pid));
-        pid = ((hash_value[0] % num_partitions) << 2) | (RECURSIVE_LEVEL - k); 
+        pid = ((hash_value[0] % num_partitions) << 2) | (partition_params.recursive_level - k); 
         // cout << "Partition ID Level " << k << ": " << pid << endl; 
-        HICKAE_Extract(writer_subset, (char*)to_string(pid).c_str(), &cp[RECURSIVE_LEVEL - 1 - k]);
+        HICKAE_Extract(writer_subset, (char*)to_string(pid).c_str(), &cp[partition_params.recursive_level - 1 - k]);
     }
 #else 
     PEKS_AggKey cp;
@@ -99,16 +175,18 @@ void search(vector<int> &writer_subset, string &keyword) {
     HICKAE_Extract(writer_subset, (char*)id.c_str(), &cw);
 #endif 
 
-    cout << "Time to create search query: " << time_from(start) << endl;
+    latency.client = time_from(start);
+    cout << "Time to create search query: " << latency.client << endl;
 
     // Send search query
     size_t temp;
 
 #ifdef SEARCH_EFFICIENCY
-    uint8_t cp_bytes[MAX_TOKEN_SIZE * RECURSIVE_LEVEL];
+    vector<uint8_t> cp_buffer(agg_key_size * MAX_RECURSIVE_LEVEL);
+    uint8_t *cp_bytes = cp_buffer.data();
     size_t  cp_size = 0;
 
-    for(int i = 0; i < RECURSIVE_LEVEL; ++i) {
+    for(int i = 0; i < partition_params.recursive_level; ++i) {
         mpz_export(cp_bytes + cp_size + sizeof(size_t), &temp, 1, 1, 0, 0, cp[i].k1);
         memcpy(cp_bytes + cp_size, &temp, sizeof(size_t));
         cp_size += sizeof(size_t);
@@ -120,7 +198,8 @@ void search(vector<int> &writer_subset, string &keyword) {
     }
     // cout << "cp_size: " << cp_size << endl;
 #else 
-    uint8_t cp_bytes[MAX_TOKEN_SIZE];
+    vector<uint8_t> cp_buffer(agg_key_size);
+    uint8_t *cp_bytes = cp_buffer.data();
     size_t cp_size = sizeof(size_t);
     mpz_export(cp_bytes + cp_size, &temp, 1, 1, 0, 0, cp.k1);
     memcpy(cp_bytes, &temp, sizeof(size_t));
@@ -132,7 +211,7 @@ void search(vector<int> &writer_subset, string &keyword) {
 #endif 
 
 #ifdef WRITER_EFFICIENCY
-    uint8_t *cw_bytes = new uint8_t[(MAX_TOKEN_SIZE + DEPTH_EPOCH_TREE) * children_epochs.size()];
+    uint8_t *cw_bytes = new uint8_t[(agg_key_size + DEPTH_EPOCH_TREE) * children_epochs.size()];
     size_t cw_size = 0;
     for(int i = 0; i < children_epochs.size(); ++i) {
         mpz_export(cw_bytes + cw_size + sizeof(size_t), &temp, 1, 1, 0, 0, cw[i].k1);
@@ -149,7 +228,8 @@ void search(vector<int> &writer_subset, string &keyword) {
     delete [] cw;
     delete [] id;
 #else
-    uint8_t cw_bytes[MAX_TOKEN_SIZE];
+    vector<uint8_t> cw_buffer(agg_key_size);
+    uint8_t *cw_bytes = cw_buffer.data();
     size_t cw_size = sizeof(size_t);
     mpz_export(cw_bytes + cw_size, &temp, 1, 1, 0, 0, cw.k1);
     memcpy(cw_bytes, &temp, sizeof(size_t));
@@ -177,7 +257,7 @@ void search(vector<int> &writer_subset, string &keyword) {
     memcpy(search_query_data + 1 + sizeof(int) + cp_size, cw_bytes, cw_size); 
 #endif 
 
-    socket_client->send(search_query);
+    send_query(search_query, keyword, writer_subset.size());
     
     // Receive search output
     zmq::message_t search_outcome;
@@ -205,17 +285,20 @@ void search(vector<int> &writer_subset, string &keyword) {
             cout << endl;
         }
     }
-    cout << "End-to-end search latency: " << time_from(start) << endl;
+    latency.end_to_end = time_from(start);
+    cout << "End-to-end search latency: " << latency.end_to_end << endl;
+    return latency;
 }
 
-void update(int writer_id, int file_id, int num_updates) {
-    // Initialize states of existing keywords 
-    // In real, this should be stored locally
-    unordered_map<string, uint64_t> state;
-    string user_database = to_string(writer_id+1) + ".txt";
-    ifstream file("../../database_small/" + user_database);
+Op_Latency update(int writer_id, int file_id, int num_updates) {
+    Op_Latency latency;
 
-    string line;
+    // Initialize states of existing keywords 
+    unordered_map<string, uint64_t> &state = load_state(writer_id);
+    vector<string> &keywords = load_update_keywords();
+    if(num_updates > keywords.size()) 
+        num_updates = keywords.size();
+    
     string keyword;
 
 #ifdef WRITER_EFFICIENCY
@@ -253,37 +336,44 @@ void update(int writer_id, int file_id, int num_updates) {
     Encrypted_Search_Token ewtkn;
 #endif
 
-    while(getline(file, line)) {
-        stringstream wss(line);
-        wss >> keyword;
-        istringstream iss(line.substr(keyword.length() + 1));
-        state[keyword] = 0;
-        int file_id;
-        while(iss >> file_id) {
-            state[keyword]++;
-        }
-    }
-    file.close();
-
     // cout << "state[\"university\"]: " << state["university"] << endl;
 
     auto start = clock_start();
     
-    ifstream updated_file("words.txt");
     unsigned char writer_secret_key[32];
     prg.reseed((block*)"generaterwritersecretkeys", writer_id+1);
     prg.random_block((block*)writer_secret_key, 2);
 
     unsigned char token[32];
     unsigned char prev_token[32];
-    SHA512_CTX sha512;
-    unsigned char tmp[SHA512_DIGEST_LENGTH];
     char addr[21];
 
+    // Tokens of the new postings and of the previous ones, and the addresses of the new postings, in one batch
+    vector<string> seeds(num_updates);
+    vector<int> prev_index(num_updates, -1);
+    unordered_map<string, uint64_t> counter;
+    for(int i = 0; i < num_updates; ++i) {
+        keyword = keywords[i];
+        if(counter.find(keyword) == counter.end()) 
+            counter[keyword] = state[keyword];
+        uint64_t c = counter[keyword]++;
+        seeds[i] = keyword + to_string(c);
+        if(c > 0) {
+            prev_index[i] = seeds.size();
+            seeds.push_back(keyword + to_string(c - 1));
+        }
+    }
+    PRF_Key prf_key;
+    prf_init(&prf_key, writer_secret_key);
+    vector<unsigned char> tokens(seeds.size() * PRF_OUTPUT_SIZE);
+    vector<unsigned char> digests(num_updates * SHA512_DIGEST_LENGTH);
+    prf_batch(prf_key, seeds.data(), seeds.size(), tokens.data());
+    sha512_16_batch(tokens.data(), num_updates, digests.data());
+
 #ifdef WRITER_EFFICIENCY
-    zmq::message_t update_query(17 + (UPDATE_TOKEN_SIZE + (541 + DEPTH_EPOCH_TREE) * n) * num_updates);
+    zmq::message_t update_query(17 + (update_token_size + (peks_token_size + DEPTH_EPOCH_TREE) * n) * num_updates);
 #else 
-    zmq::message_t update_query(9 + UPDATE_TOKEN_SIZE * num_updates);
+    zmq::message_t update_query(9 + update_token_size * num_updates);
 #endif 
     uint8_t *update_query_data = (uint8_t*)update_query.data();
     update_query_data[0] = 'U';
@@ -296,25 +386,18 @@ void update(int writer_id, int file_id, int num_updates) {
     memcpy(update_query_data, &n, sizeof(size_t));
     update_query_data += sizeof(size_t);
 #endif 
-    for(int i = 0; i < num_updates && getline(updated_file, keyword); ++i) {
+    for(int i = 0; i < num_updates; ++i) {
+        keyword = keywords[i];
         
         // cout << "Keyword: " << keyword << endl;
 
-        string seed;
-        if(state[keyword] == 0) {
+        if(prev_index[i] < 0) 
             memset(prev_token, 0, sizeof(prev_token));
-        } 
-        else {
-            seed = keyword + to_string(state[keyword] - 1); 
-            prf((unsigned char *)seed.c_str(), seed.length(), writer_secret_key, prev_token);
-        }
+        else 
+            memcpy(prev_token, &tokens[prev_index[i] * PRF_OUTPUT_SIZE], 32);
 
-        seed = keyword + to_string(state[keyword]); 
-        prf((unsigned char *)seed.c_str(), seed.length(), writer_secret_key, token);
-        
-        SHA512_Init(&sha512);
-        SHA512_Update(&sha512, token, 16);
-        SHA512_Final(tmp, &sha512);
+        memcpy(token, &tokens[i * PRF_OUTPUT_SIZE], 32);
+        unsigned char *tmp = &digests[i * SHA512_DIGEST_LENGTH];
 
         // u_sse = (addr, value)
         memset(addr, 0, sizeof(addr));
@@ -341,9 +424,9 @@ void update(int writer_id, int file_id, int num_updates) {
         update_query_data += 37;
         
 #ifdef SEARCH_EFFICIENCY
-        int num_partitions = NUM_PARTITIONS;
+        int num_partitions = partition_params.num_partitions;
         array<uint64_t, 2> hash_value = mm_hash((uint8_t*)keyword.c_str(), keyword.length());
-        uint64_t pid = ((hash_value[0] % num_partitions) << 2) | RECURSIVE_LEVEL;
+        uint64_t pid = ((hash_value[0] % num_partitions) << 2) | partition_params.recursive_level;
 
         unsigned char partition_tag[32];
         prf((unsigned char *)&pid, sizeof(pid), writer_secret_key, partition_tag);
@@ -358,22 +441,22 @@ void update(int writer_id, int file_id, int num_updates) {
         update_query_data += 20;
 
         /*
-        for(int k = 1; k < RECURSIVE_LEVEL; ++k) {
+        for(int k = 1; k < partition_params.recursive_level; ++k) {
             PEKS_Token eptkn;
             HICKAE_Encrypt(writer_id, (char*)to_string(pid).c_str(), partition_tag, &eptkn);
 
             element_to_bytes(update_query_data, eptkn.c1);
-            update_query_data += 168;
+            update_query_data += g2_size;
             element_to_bytes(update_query_data, eptkn.c2);
-            update_query_data += 168;
+            update_query_data += g2_size;
             element_to_bytes(update_query_data, eptkn.c3);
-            update_query_data += 168;
+            update_query_data += g2_size;
             memcpy(update_query_data, eptkn.c4, 37);
             update_query_data += 37;
 
-            num_partitions /= PARTITION_SIZE;
+            num_partitions /= partition_params.partition_size;
             hash_value = mm_hash((uint8_t*)&pid, sizeof(pid));
-            pid = ((hash_value[0] % num_partitions) << 2) | (RECURSIVE_LEVEL - k);
+            pid = ((hash_value[0] % num_partitions) << 2) | (partition_params.recursive_level - k);
             
             prf((unsigned char *)&pid, sizeof(pid), writer_secret_key, partition_tag);
             
@@ -390,11 +473,11 @@ void update(int writer_id, int file_id, int num_updates) {
         HICKAE_Encrypt(writer_id, (char*)to_string(pid).c_str(), partition_tag, &eptkn);
         
         element_to_bytes(update_query_data, eptkn.c1);
-        update_query_data += 168;
+        update_query_data += g2_size;
         element_to_bytes(update_query_data, eptkn.c2);
-        update_query_data += 168;
+        update_query_data += g2_size;
         element_to_bytes(update_query_data, eptkn.c3);
-        update_query_data += 168;
+        update_query_data += g2_size;
         memcpy(update_query_data, eptkn.c4, 37);
         update_query_data += 37;
 #else 
@@ -426,11 +509,11 @@ void update(int writer_id, int file_id, int num_updates) {
         HICKAE_Encrypt(writer_id, (char*)to_string(pid).c_str(), partition_tag, &eptkn);
 
         element_to_bytes(update_query_data, eptkn.c1);
-        update_query_data += 168;
+        update_query_data += g2_size;
         element_to_bytes(update_query_data, eptkn.c2);
-        update_query_data += 168;
+        update_query_data += g2_size;
         element_to_bytes(update_query_data, eptkn.c3);
-        update_query_data += 168;
+        update_query_data += g2_size;
         memcpy(update_query_data, eptkn.c4, 37);
         update_query_data += 37;
 #endif 
@@ -471,11 +554,11 @@ void update(int writer_id, int file_id, int num_updates) {
             memcpy(update_query_data, gamma_t[i].c_str(), DEPTH_EPOCH_TREE);
             update_query_data += DEPTH_EPOCH_TREE;
             element_to_bytes(update_query_data, ewtkn.data[gamma_t[i]].c1);
-            update_query_data += 168;
+            update_query_data += g2_size;
             element_to_bytes(update_query_data, ewtkn.data[gamma_t[i]].c2);
-            update_query_data += 168;
+            update_query_data += g2_size;
             element_to_bytes(update_query_data, ewtkn.data[gamma_t[i]].c3);
-            update_query_data += 168;
+            update_query_data += g2_size;
             memcpy(update_query_data, ewtkn.data[gamma_t[i]].c4, 37);
             update_query_data += 37;
         }
@@ -486,30 +569,34 @@ void update(int writer_id, int file_id, int num_updates) {
         HICKAE_Encrypt(writer_id, (char*)id.c_str(), token, &ewtkn);
         
         element_to_bytes(update_query_data, ewtkn.c1);
-        update_query_data += 168;
+        update_query_data += g2_size;
         element_to_bytes(update_query_data, ewtkn.c2);
-        update_query_data += 168;
+        update_query_data += g2_size;
         element_to_bytes(update_query_data, ewtkn.c3);
-        update_query_data += 168;
+        update_query_data += g2_size;
         memcpy(update_query_data, ewtkn.c4, 37);
         update_query_data += 37;
 #endif 
         state[keyword]++;
     }
-    updated_file.close();
 
-    socket_client->send(update_query);
+    send_query(update_query, to_string(writer_id), 1);
 
-    cout << "Writer update latency: " << time_from(start) << endl;
+    latency.client = time_from(start);
+    cout << "Writer update latency: " << latency.client << endl;
+    cout << "Update throughput: " << (uint64_t)(num_updates / (latency.client / 1e6)) << " postings/s" << endl;
 
     // Wait for reply from the server
     zmq::message_t update_reply;
     socket_client->recv(&update_reply);
 
-    cout << "End-to-end update latency: " << time_from(start) << endl;
+    latency.end_to_end = time_from(start);
+    cout << "End-to-end update latency: " << latency.end_to_end << endl;
+    return latency;
 }
 
-void rebuild() {
+Op_Latency rebuild() {
+    Op_Latency latency = {0, 0};
 #ifdef WRITER_EFFICIENCY
     cout << "Rebuild is unnecessary in this configuration!" << endl; 
 #else 
@@ -533,28 +620,13 @@ void rebuild() {
         unsigned char writer_secret_key[32];
         prg.reseed((block*)"generaterwritersecretkeys", writer_id+1);
         prg.random_block((block*)writer_secret_key, 2);
-        string user_database = to_string(writer_id+1) + ".txt";
-        // int num_keywords = count_lines("../../database_small/" + user_database); 
-        // cout << "#Keywords: " << num_keywords << endl;
-        
-        ifstream file("../../database_small/" + user_database);
-        string line, keyword;
-        unordered_map<string, uint64_t> state;
+        unordered_map<string, uint64_t> &state = load_state(writer_id);
         unordered_map<string, vector<PEKS_Token>> WTkn;
         set<string> partition_address;
         vector<string> keyword_set;
         
-        while(getline(file, line)) {
-            stringstream wss(line);
-            wss >> keyword;
-            istringstream iss(line.substr(keyword.length() + 1));
-            state[keyword] = 0;
-            int file_id;
-            while(iss >> file_id) {
-                state[keyword]++;
-            }
-            keyword_set.push_back(keyword);
-        }
+        for(auto &entry: state) 
+            keyword_set.push_back(entry.first);
 
         int num_threads;
         int per_thread;
@@ -577,13 +649,21 @@ void rebuild() {
                 else 
                     end = start + per_thread;
 
-                unsigned char current_token[32];
+                unsigned char *current_token;
                 char addr[21];
 
+                // Current tokens of the keywords of this thread in one batch
+                vector<string> seeds;
+                for(int k = start; k < end; ++k) 
+                    seeds.push_back(keyword_set[k] + to_string(state[keyword_set[k]] - 1));
+                PRF_Key prf_key;
+                prf_init(&prf_key, writer_secret_key);
+                vector<unsigned char> tokens(seeds.size() * PRF_OUTPUT_SIZE);
+                prf_batch(prf_key, seeds.data(), seeds.size(), tokens.data());
+
                 for(int k = start; k < end; ++k) {
                     string keyword = keyword_set[k];
-                    string seed = keyword + to_string(state[keyword] - 1); 
-                    prf((unsigned char *)seed.c_str(), seed.length(), writer_secret_key, current_token);
+                    current_token = &tokens[(k - start) * PRF_OUTPUT_SIZE];
 
                     string id = keyword + to_string(epoch);
 
@@ -593,7 +673,7 @@ void rebuild() {
                     array<uint64_t, 2> hash_value = mm_hash((uint8_t*)keyword.c_str(), keyword.length());
 
 #ifdef SEARCH_EFFICIENCY
-                    uint64_t pid = ((hash_value[0] % NUM_PARTITIONS) << 2) | RECURSIVE_LEVEL;
+                    uint64_t pid = ((hash_value[0] % partition_params.num_partitions) << 2) | partition_params.recursive_level;
 #else 
                     uint64_t pid = hash_value[0] % MAX_PARTITIONS;
 #endif 
@@ -625,7 +705,7 @@ void rebuild() {
             num_elements += WTkn[paddr].size();
         }
 
-        zmq::message_t rebuild_request(9 + num_elements*541 + partition_address.size()*24);
+        zmq::message_t rebuild_request(9 + num_elements*peks_token_size + partition_address.size()*24);
         unsigned char *rebuild_request_data = (unsigned char*)rebuild_request.data();
         rebuild_request_data[0] = 'R';
         rebuild_request_data += 1;
@@ -648,16 +728,17 @@ void rebuild() {
 
             for(PEKS_Token ewtkn: WTkn[paddr]) {
                 element_to_bytes(rebuild_request_data, ewtkn.c1);
-                rebuild_request_data += 168;
+                rebuild_request_data += g2_size;
                 element_to_bytes(rebuild_request_data, ewtkn.c2);
-                rebuild_request_data += 168;
+                rebuild_request_data += g2_size;
                 element_to_bytes(rebuild_request_data, ewtkn.c3);
-                rebuild_request_data += 168;
+                rebuild_request_data += g2_size;
                 memcpy(rebuild_request_data, ewtkn.c4, 37);
                 rebuild_request_data += 37;
             }
         }
-        socket_client->send(rebuild_request);
+        latency.client += time_from(start);
+        send_query(rebuild_request, to_string(writer_id), 1);
 
         // Wait for ACK
         zmq::message_t rebuild_reply;
@@ -665,8 +746,91 @@ void rebuild() {
 
         cout << "Writer rebuild latency: " << time_from(start) << endl;
     }
-    cout << "End-to-end rebuild latency: " << time_from(start) << endl;
+    latency.end_to_end = time_from(start);
+    cout << "End-to-end rebuild latency: " << latency.end_to_end << endl;
 #endif 
+    return latency;
+}
+
+// Execute a stream of commands over the same connection and keys, one per line:
+//   search <keyword> [<writer_subset_size>]
+//   update [<number_of_updates>]
+//   rebuild
+//   capture <capture_file>|off
+// Blank lines and lines starting with '#' are skipped
+void run_session(istream &commands, ofstream &records) {
+    string line;
+    string command;
+    int seq = 0;
+
+    if(records.is_open()) 
+        records << fixed << setprecision(0) << "Seq,Command,Argument,Writers,ClientTime(us),EndToEndLatency(us)" << endl;
+
+    while(getline(commands, line)) {
+        stringstream css(line);
+        if(!(css >> command) || command[0] == '#') continue;
+        if(command == "quit" || command == "exit") break;
+
+        Op_Latency latency;
+        string argument = "";
+        int writer_subset_size = num_writers;
+
+        if(command == "search" || command == "s") {
+            command = "search";
+            argument = "university";
+            css >> argument;
+            css >> writer_subset_size;
+            if(writer_subset_size > num_writers || writer_subset_size <= 0) {
+                cout << "There are no more than " << num_writers << " writers." << endl;
+                continue;
+            }
+            cout << "===================== Search query ======================" << endl;
+            vector<int> writer_subset;
+            for(int writer_id = 0; writer_id < writer_subset_size; ++writer_id) 
+                writer_subset.push_back(writer_id);
+            latency = search(writer_subset, argument);
+        }
+        else if(command == "update" || command == "u") {
+            command = "update";
+            int num_updates = 25;
+            css >> num_updates;
+            argument = to_string(num_updates);
+            writer_subset_size = 1;
+            cout << "===================== Update query ======================" << endl;
+            latency = update(0, 2025, num_updates);
+        }
+        else if(command == "capture") {
+            css >> argument;
+            if(argument == "off") {
+                capture_file.close();
+                cout << "Stopped capturing queries" << endl;
+            }
+            else if(!argument.empty() && start_capture(argument.c_str())) 
+                cout << "Capturing queries to " << argument << endl;
+            else 
+                cout << "Cannot open capture file " << argument << endl;
+            continue;
+        }
+        else if(command == "rebuild" || command == "r") {
+            command = "rebuild";
+            writer_subset_size = 1;
+            cout << "===================== Rebuild query =====================" << endl;
+            latency = rebuild();
+        }
+        else {
+            cout << "Invalid command: " << line << endl;
+            continue;
+        }
+
+        seq++;
+        cout << "Session record: " << seq << " " << command << " " << latency.client << " " << latency.end_to_end << endl;
+        if(records.is_open()) {
+            records << seq << "," << command << "," << argument << "," << writer_subset_size << "," 
+                    << latency.client << "," << latency.end_to_end << endl;
+        }
+    }
+    capture_file.close();
+    cout << "Session finished after " << seq << " commands" << endl;
 }
 
 int main(int argc, char *argv[]) {
@@ -708,6 +872,28 @@ int main(int argc, char *argv[]) {
     socket_client->recv(&msg_reply_num_writers);
     memcpy(&num_writers, msg_reply_num_writers.data(), 4);
 
+    // The partition tree must be the same as the one used by the server
+    if(msg_reply_num_writers.size() >= 4 * sizeof(int)) {
+        int *params = (int*)msg_reply_num_writers.data();
+        partition_params.recursive_level = params[1];
+        partition_params.partition_size  = params[2];
+        partition_params.num_partitions  = params[3];
+    }
+
+    // So must the curve and the writers' databases ("<curve>\0<data_dir>")
+    if(msg_reply_num_writers.size() > 4 * sizeof(int)) {
+        char *names = (char*)msg_reply_num_writers.data() + 4 * sizeof(int);
+        string reply_names(names, msg_reply_num_writers.size() - 4 * sizeof(int));
+        size_t separator = reply_names.find('\0');
+        curve_name = reply_names.substr(0, separator);
+        if(separator != string::npos) 
+            data_dir = reply_names.substr(separator + 1);
+    }
+
+    // Keyword states are loaded on demand and kept for the whole process
+    state = new unordered_map<string, uint64_t>[num_writers];
+    state_loaded.assign(num_writers, false);
+
     // Initializing system
     init_sys();
     
@@ -765,6 +951,26 @@ int main(int argc, char *argv[]) {
             //     writer_subset.push_back(writer_id);
             search(writer_subset, keyword);
         }
+        else if(strcmp(argv[1], "-b") == 0) {
+            // Read commands from a file or from stdin
+            ifstream command_file;
+            if(argc > 2 && strcmp(argv[2], "-") != 0) {
+                command_file.open(argv[2]);
+                if(!command_file.is_open()) {
+                    cout << "Cannot open command file " << argv[2] << endl;
+                    return 1;
+                }
+            }
+            ofstream records;
+            if(argc > 3) 
+                records.open(argv[3]);
+
+            cout << "===================== Session mode ======================" << endl;
+            if(command_file.is_open()) 
+                run_session(command_file, records);
+            else 
+                run_session(cin, records);
+        }
         else {
             cout << "Invalid syntax!!!" << endl;
             return 1;
@@ -1,5 +1,4 @@
 #pragma once
-const int NUM_BITS              = 224;
 const int MAX_KEYWORDS          = 100;
 const int MAX_THREADS_INIT      = 8;
 const int MAX_THREADS_SEARCH    = 8;
@@ -9,12 +8,21 @@ const int SERVER_PORT           = 8888;
 
 // The maximum number of partitions is based on the largest database including 57,639 keywords
 const int MAX_PARTITIONS        = 240; 
-const int MAX_TOKEN_SIZE        = 148;
 const int MAX_MATCH_OUTPUT      = 4096;
 
+// Default pairing curve (a parameter file in ../param), the server can select another one with a config file
+const char DEFAULT_CURVE[]      = "d224";
+
+// Default partition tree parameters, the server can override them at runtime with a config file
 const int RECURSIVE_LEVEL       = 3;
 const int PARTITION_SIZE        = 10;
 const int NUM_PARTITIONS        = 1000;
+// The level of a partition is stored in the 2 lowest bits of its ID
+const int MAX_RECURSIVE_LEVEL   = 3;
+
+// Background compaction of superseded WTkn entries found by searches
+const int COMPACTION_INTERVAL_MS    = 1000;
+const int MAX_COMPACTION_PARTITIONS = 64;     // per round
 
 #define ENABLE_SEPARATE_SEARCH  1
 #define WRITER_EFFICIENCY       1
@@ -13,6 +13,7 @@
 #include "config.hpp"
 
 // System parameters
+string          curve_name = DEFAULT_CURVE; // curve in use, loaded from ../param/<curve_name>.param
 mpz_t           q;                          // prime group order
 mpz_t           p;                          // p = q - 1
 pairing_t       pairing;                    // pairing argument
@@ -23,6 +24,16 @@ element_t       g1;                         // generator in G1
 element_t       g2;                         // generator in G2
 element_t       gt;                         // generator in GT
 
+// Sizes derived from the loaded pairing
+int             scalar_bits;                // bit length of q
+int             scalar_bytes;
+int             g1_size;                    // serialized sizes of group elements
+int             g2_size;
+int             gt_size;
+int             peks_token_size;            // serialized PEKS_Token: c1 | c2 | c3 | c4
+int             agg_key_size;               // max serialized PEKS_AggKey: length | k1 | k2 | k3
+int             update_token_size;          // serialized update of a keyword without its epoch tokens
+
 // Users' parameters
 HICKAE_PrvKey   sk;                         // private key
 HICKAE_PubKey   pk;                         // public key
@@ -32,60 +43,84 @@ mpz_t           *sigma_prime;               // classes' secrets
 mpz_t           *sigma_class;               // class  
 element_t       *class_binding_key;         // class-binding keys 
 element_t       **correlation;              // correlation values
+mpz_t           *alpha_pow_sigma_class;     // alpha^sigma_class mod q of each class
+element_pp_t    alpha_to_tau_pp;            // fixed-base table of alpha^tau * g1
+
+// Aggregate of the last writer subset, shared by all keys extracted for it
+// (the partition and epoch keys of a search query)
+bool            agg_valid;
+vector<int>     agg_subset;                 // writer subset of the aggregate
+mpz_t           agg_sum;                    // sum of alpha^sigma_class over the subset mod q
+element_t       agg_k2;                     // (gamma * agg_sum + 1) * alpha^tau * g1
 
 // A cryptographic pseudorandom generator
 extern PRG      prg;
 
 void HICKAE_Setup(int n) {
-    // Curve: phi(n) = lcm(h-1, r-1) 
-    // Curve d159: p = 208617601094290618684641029477488665211553761020
-    // Curve d201: p = 1047237174547731636071560699617941665718106642306119854716840
-    mpz_init(p);
-    mpz_set_str(p, "15028799613985034465755506450771561352583254744125520639296541195020", 10);
-    
-    // Curve: n = h * r 
-    // Curve d159: q = 625852803282871856053923088432465995634661283063 
-    // Curve d201: q = 2094476214847295281570670320143248652598286201895740019876423
-    // For more information: https://crypto.stanford.edu/pbc/manual/ch08s06.html
-    mpz_init(q);
-    mpz_set_str(q, "15028799613985034465755506450771561352583254744125520639296541195021", 10);
-
     gmp_randinit_mt(random_state);
     gmp_randseed_ui(random_state, time(NULL));
     
     char s[16384];
     FILE *fp = stdin;
-    fp = fopen("../param/d224.param", "r");
-    if (!fp) pbc_die("error opening parameter file");
+    string param_file = "../param/" + curve_name + ".param";
+    fp = fopen(param_file.c_str(), "r");
+    if (!fp) pbc_die("error opening parameter file %s", param_file.c_str());
     size_t count = fread(s, 1, 16384, fp);
     if (!count) pbc_die("input error");
     fclose(fp);
     if (pairing_init_set_buf(pairing, s, count)) pbc_die("pairing init failed");
 
+    // q is the order r of G1, G2 and GT, and the exponents of alpha in Zq* are taken mod p = q - 1
+    // For more information: https://crypto.stanford.edu/pbc/manual/ch08s06.html
+    mpz_init_set(q, pairing->r);
+    if (!mpz_probab_prime_p(q, 25)) pbc_die("curve %s has a composite group order", curve_name.c_str());
+    mpz_init(p);
+    mpz_sub_ui(p, q, 1);
+
+    scalar_bits  = mpz_sizeinbase(q, 2);
+    scalar_bytes = (scalar_bits + 7) / 8;
+    g1_size = pairing_length_in_bytes_G1(pairing);
+    g2_size = pairing_length_in_bytes_G2(pairing);
+    gt_size = pairing_length_in_bytes_GT(pairing);
+    if (!g1_size || !g2_size || !gt_size) pbc_die("curve %s does not support element serialization", curve_name.c_str());
+    peks_token_size = 3 * g2_size + 37;
+    agg_key_size = sizeof(size_t) + scalar_bytes + 2 * g1_size;
+#ifdef WRITER_EFFICIENCY
+    update_token_size = 20 + sizeof(DSSE_Token) + 20 + peks_token_size;
+#else 
+    update_token_size = 20 + sizeof(DSSE_Token) + 20 + 2 * peks_token_size;
+#endif 
+
     mpz_init(alpha);
     prg.reseed((block*)"generateralphaha", 0);
-    prg.random_data(rd_data, 28);
-    mpz_import(alpha, 28, 1, 1, 0, 0, rd_data);
+    prg.random_data(rd_data, scalar_bytes);
+    mpz_import(alpha, scalar_bytes, 1, 1, 0, 0, rd_data);
     mpz_mod(alpha, alpha, q);
-    // mpz_urandomb(alpha, random_state, NUM_BITS);
+    // mpz_urandomb(alpha, random_state, scalar_bits);
     // printf("alphaha = ");
     // mpz_out_str(stdout, 10, alpha);
     // printf("\n");
     
-    // Reuse generators 
-    FILE *g1_file = fopen("../param/g1", "rb");
-    memset(rd_data, 0, sizeof(rd_data));
-    fread(rd_data, 56, 1, g1_file);
+    // Reuse generators: ../param/g1 and ../param/g2 belong to the default curve, 
+    // the other curves derive fixed generators by hashing
     element_init_G1(g1, pairing);
-    element_from_bytes(g1, rd_data);
-    fclose(g1_file);
-    
-    FILE *g2_file = fopen("../param/g2", "rb");
-    memset(rd_data, 0, sizeof(rd_data));
-    fread(rd_data, 168, 1, g2_file);
     element_init_G2(g2, pairing);
-    element_from_bytes(g2, rd_data);
-    fclose(g2_file);
+    if(curve_name == DEFAULT_CURVE) {
+        vector<unsigned char> generator(max(g1_size, g2_size));
+        FILE *g1_file = fopen("../param/g1", "rb");
+        fread(generator.data(), g1_size, 1, g1_file);
+        element_from_bytes(g1, generator.data());
+        fclose(g1_file);
+        
+        FILE *g2_file = fopen("../param/g2", "rb");
+        fread(generator.data(), g2_size, 1, g2_file);
+        element_from_bytes(g2, generator.data());
+        fclose(g2_file);
+    }
+    else {
+        element_from_hash(g1, (void*)"generatorg1", 11);
+        element_from_hash(g2, (void*)"generatorg2", 11);
+    }
     
     /*
     // Get new random generators
@@ -116,8 +151,8 @@ void HICKAE_Setup(int n) {
     for(int i = 0; i < n; ++i) { 
         mpz_init(sigma_hat[i]);
         prg.reseed((block*)"generatersigmahat", i);
-        prg.random_data(rd_data, 28);
-        mpz_import(sigma_hat[i], 28, 1, 1, 0, 0, rd_data);
+        prg.random_data(rd_data, scalar_bytes);
+        mpz_import(sigma_hat[i], scalar_bytes, 1, 1, 0, 0, rd_data);
         mpz_mod(sigma_hat[i], sigma_hat[i], p);
         mpz_neg(tmp, sigma_hat[i]);
         mpz_mod(tmp, tmp, p);
@@ -130,11 +165,11 @@ void HICKAE_Setup(int n) {
 void HICKAE_KeyGen() {
     mpz_init(sk.tau);
     prg.reseed((block*)"generatertau", 0);
-    prg.random_data(rd_data, 28);
-    mpz_import(sk.tau, 28, 1, 1, 0, 0, rd_data);
+    prg.random_data(rd_data, scalar_bytes);
+    mpz_import(sk.tau, scalar_bytes, 1, 1, 0, 0, rd_data);
     mpz_mod(sk.tau, sk.tau, p);
     
-    // mpz_urandomb(tau, random_state, NUM_BITS);
+    // mpz_urandomb(tau, random_state, scalar_bits);
     // printf("tau = ");
     // mpz_out_str(stdout, 10, tau);
     // printf("\n");
@@ -146,9 +181,9 @@ void HICKAE_KeyGen() {
     
     mpz_init(sk.gamma);
     prg.reseed((block*)"generatergamma", 0);
-    prg.random_data(rd_data, 28);
-    // mpz_urandomb(gamma, random_state, NUM_BITS);
-    mpz_import(sk.gamma, 28, 1, 1, 0, 0, rd_data);
+    prg.random_data(rd_data, scalar_bytes);
+    // mpz_urandomb(gamma, random_state, scalar_bits);
+    mpz_import(sk.gamma, scalar_bytes, 1, 1, 0, 0, rd_data);
     mpz_mod(sk.gamma, sk.gamma, q);
     // printf("gamma = ");
     // mpz_out_str(stdout, 10, gamma);
@@ -156,9 +191,9 @@ void HICKAE_KeyGen() {
 
     mpz_init(sk.delta);
     prg.reseed((block*)"generaterdelta", 0);
-    prg.random_data(rd_data, 28);
-    // mpz_urandomb(delta, random_state, NUM_BITS);
-    mpz_import(sk.delta, 28, 1, 1, 0, 0, rd_data);
+    prg.random_data(rd_data, scalar_bytes);
+    // mpz_urandomb(delta, random_state, scalar_bits);
+    mpz_import(sk.delta, scalar_bytes, 1, 1, 0, 0, rd_data);
     mpz_mod(sk.delta, sk.delta, q);
     // printf("delta = ");
     // mpz_out_str(stdout, 10, delta);
@@ -166,9 +201,9 @@ void HICKAE_KeyGen() {
     
     mpz_init(sk.theta);
     prg.reseed((block*)"generatertheta", 0);
-    prg.random_data(rd_data, 28);
-    // mpz_urandomb(theta, random_state, NUM_BITS);
-    mpz_import(sk.theta, 28, 1, 1, 0, 0, rd_data);
+    prg.random_data(rd_data, scalar_bytes);
+    // mpz_urandomb(theta, random_state, scalar_bits);
+    mpz_import(sk.theta, scalar_bytes, 1, 1, 0, 0, rd_data);
     mpz_mod(sk.theta, sk.theta, q);
     // printf("theta = ");
     // mpz_out_str(stdout, 10, theta);
@@ -194,8 +229,8 @@ void HICKAE_IGen(int num_writers) {
     for(int i = 0; i < num_writers; ++i) { 
         mpz_init(sigma_prime[i]);
         prg.reseed((block*)"generatersigmaprime", i);
-        prg.random_data(rd_data, 28);
-        mpz_import(sigma_prime[i], 28, 1, 1, 0, 0, rd_data);
+        prg.random_data(rd_data, scalar_bytes);
+        mpz_import(sigma_prime[i], scalar_bytes, 1, 1, 0, 0, rd_data);
         mpz_mod(sigma_prime[i], sigma_prime[i], p);
         mpz_neg(tmp, sigma_prime[i]);
         mpz_mod(tmp, tmp, p);
@@ -221,6 +256,16 @@ void HICKAE_Prep(int num_writers) {
     mpz_t tmp;
     mpz_init(tmp);
 
+    alpha_pow_sigma_class = new mpz_t[num_writers];
+    for(int i = 0; i < num_writers; ++i) {
+        mpz_init(alpha_pow_sigma_class[i]);
+        mpz_powm(alpha_pow_sigma_class[i], alpha, sigma_class[i], q);
+    }
+    element_pp_init(alpha_to_tau_pp, sk.alpha_to_tau_G1);
+    mpz_init(agg_sum);
+    element_init_G1(agg_k2, pairing);
+    agg_valid = false;
+
     correlation = new element_t*[num_writers];
     for(int i = 0; i < num_writers; ++i) {
         correlation[i] = new element_t[num_writers];
@@ -241,7 +286,7 @@ void HICKAE_Encrypt(int wid, char *id, unsigned char *m, PEKS_Token *c) {
     // auto start = clock_start();
     mpz_t r;
     mpz_init(r);
-    mpz_urandomb(r, random_state, 224);
+    mpz_urandomb(r, random_state, scalar_bits);
     // printf("r = ");
     // mpz_out_str(stdout, 10, r);
     // printf("\n");
@@ -270,14 +315,13 @@ void HICKAE_Encrypt(int wid, char *id, unsigned char *m, PEKS_Token *c) {
     element_pairing(ut, h_G1, pk.delta_G2);
     element_mul_mpz(ut, ut, r);
 
-    unsigned char temp[256];
-    memset(temp, 0, sizeof(temp));
-    int len = element_to_bytes(temp, ut);
+    vector<unsigned char> temp(gt_size);
+    int len = element_to_bytes(temp.data(), ut);
 
     // cout << "len = " << len << endl;
     
     SHA512_Init(&sha512);
-    SHA512_Update(&sha512, temp, len);
+    SHA512_Update(&sha512, temp.data(), len);
     SHA512_Final(hash, &sha512);
 
     // c->c4 = new unsigned char[37];
@@ -290,12 +334,31 @@ void HICKAE_Encrypt(int wid, char *id, unsigned char *m, PEKS_Token *c) {
     // cout << "Encryption time: " << time_from(start) << endl;
 }
 
-void HICKAE_Extract(vector<int> &writer_subset, char *id, PEKS_AggKey *agg_key) {
-    mpz_t tau_prime;
-    mpz_init(tau_prime);
-    mpz_urandomb(tau_prime, random_state, NUM_BITS);
-    mpz_mod(tau_prime, tau_prime, p);
-    
+// The per-writer terms alpha^sigma_class * (alpha^tau * g1) of an aggregate key share the same base,
+// so their multi-scalar multiplication reduces to a sum of scalars mod q (the order of G1)
+void HICKAE_Aggregate(vector<int> &writer_subset) {
+    if(agg_valid && writer_subset == agg_subset) return;
+
+    mpz_set_ui(agg_sum, 0);
+    for(int i = 0; i < writer_subset.size(); ++i) 
+        mpz_add(agg_sum, agg_sum, alpha_pow_sigma_class[writer_subset[i]]);
+    mpz_mod(agg_sum, agg_sum, q);
+
+    // gamma * (agg_sum * alpha^tau * g1) + alpha^tau * g1
+    mpz_t tmp;
+    mpz_init(tmp);
+    mpz_mul(tmp, agg_sum, sk.gamma);
+    mpz_add_ui(tmp, tmp, 1);
+    mpz_mod(tmp, tmp, q);
+    element_pp_pow(agg_k2, tmp, alpha_to_tau_pp);
+    mpz_clear(tmp);
+
+    agg_subset = writer_subset;
+    agg_valid = true;
+}
+
+// Derive the aggregate key of an identity for the current writer subset
+void HICKAE_Extract_Key(const char *id, size_t len, mpz_t tau_prime, PEKS_AggKey *agg_key) {
     mpz_t alpha_pow_tau_prime;
     mpz_init(alpha_pow_tau_prime);
     mpz_powm(alpha_pow_tau_prime, alpha, tau_prime, q);
@@ -307,109 +370,65 @@ void HICKAE_Extract(vector<int> &writer_subset, char *id, PEKS_AggKey *agg_key)
     SHA512_CTX sha512;
     unsigned char hash[SHA512_DIGEST_LENGTH];
     SHA512_Init(&sha512);
-    SHA512_Update(&sha512, id, strlen(id));
+    SHA512_Update(&sha512, id, len);
     SHA512_Final(hash, &sha512);
 
     element_t h_G1;
     element_init_G1(h_G1, pairing);
     element_from_hash(h_G1, hash, SHA512_DIGEST_LENGTH);
 
-    element_init_G1(agg_key->k2, pairing);
-    element_mul_mpz(agg_key->k2, h_G1, sk.delta);
+    // k2 = (delta * alpha^-tau_prime) * h + (gamma * agg_sum + 1) * alpha^tau * g1
+    mpz_t scalar;
+    mpz_init(scalar);
+    mpz_neg(scalar, tau_prime);
+    mpz_mod(scalar, scalar, p);
+    mpz_powm(scalar, alpha, scalar, q);
+    mpz_mul(scalar, scalar, sk.delta);
+    mpz_mod(scalar, scalar, q);
 
-    mpz_neg(tau_prime, tau_prime);
-    mpz_mod(tau_prime, tau_prime, p);
-    mpz_powm(tau_prime, alpha, tau_prime, q);
-    element_mul_mpz(agg_key->k2, agg_key->k2, tau_prime);
+    element_init_G1(agg_key->k2, pairing);
+    element_mul_mpz(agg_key->k2, h_G1, scalar);
+    element_add(agg_key->k2, agg_key->k2, agg_k2);
 
+    // k3 = (agg_sum * alpha^tau_prime) * alpha^tau * g1
+    mpz_mul(scalar, agg_sum, alpha_pow_tau_prime);
+    mpz_mod(scalar, scalar, q);
     element_init_G1(agg_key->k3, pairing);
-    element_set0(agg_key->k3);
-    
-    mpz_t key_id;
-    mpz_init(key_id);
+    element_pp_pow(agg_key->k3, scalar, alpha_to_tau_pp);
 
-    element_t temp;
-    element_init_G1(temp, pairing);
+    element_clear(h_G1);
+    mpz_clear(scalar);
+    mpz_clear(alpha_pow_tau_prime);
+}
 
-    for(int i = 0; i < writer_subset.size(); ++i) {
-        mpz_powm(key_id, alpha, sigma_class[writer_subset[i]], q);
-        element_mul_mpz(temp, sk.alpha_to_tau_G1, key_id);
-        element_add(agg_key->k3, agg_key->k3, temp);
-    }
-    
-    element_mul_mpz(temp, agg_key->k3, sk.gamma);
-    element_add(agg_key->k2, agg_key->k2, temp);
-    element_add(agg_key->k2, agg_key->k2, sk.alpha_to_tau_G1);
+void HICKAE_Extract(vector<int> &writer_subset, char *id, PEKS_AggKey *agg_key) {
+    HICKAE_Aggregate(writer_subset);
+
+    mpz_t tau_prime;
+    mpz_init(tau_prime);
+    mpz_urandomb(tau_prime, random_state, scalar_bits);
+    mpz_mod(tau_prime, tau_prime, p);
 
-    element_mul_mpz(agg_key->k3, agg_key->k3, alpha_pow_tau_prime);
+    HICKAE_Extract_Key(id, strlen(id), tau_prime, agg_key);
+    mpz_clear(tau_prime);
 }
 
 void HICKAE_Extract(vector<int> &writer_subset, string *id, PEKS_AggKey *agg_key, int n) {
+    HICKAE_Aggregate(writer_subset);
+
     mpz_t *tau_prime = new mpz_t[n];
     for(int k = 0; k < n; ++k) {
         mpz_init(tau_prime[k]);
-        mpz_urandomb(tau_prime[k], random_state, NUM_BITS);
+        mpz_urandomb(tau_prime[k], random_state, scalar_bits);
         mpz_mod(tau_prime[k], tau_prime[k], p);
     }
-    
-    mpz_t *alpha_pow_tau_prime = new mpz_t[n];
-    for(int k = 0; k < n; ++k) {
-        mpz_init(alpha_pow_tau_prime[k]);
-        mpz_powm(alpha_pow_tau_prime[k], alpha, tau_prime[k], q);
-        mpz_init(agg_key[k].k1);
-        mpz_add(agg_key[k].k1, alpha_pow_tau_prime[k], sk.theta);
-        mpz_mod(agg_key[k].k1, agg_key[k].k1, q);
-    }
-    
-    SHA512_CTX sha512;
-    unsigned char hash[SHA512_DIGEST_LENGTH];
-
-    for(int k = 0; k < n; ++k) {
-        SHA512_Init(&sha512);
-        SHA512_Update(&sha512, id[k].c_str(), id[k].length());
-        SHA512_Final(hash, &sha512);
-
-        element_t h_G1;
-        element_init_G1(h_G1, pairing);
-        element_from_hash(h_G1, hash, SHA512_DIGEST_LENGTH);
-
-        element_init_G1(agg_key[k].k2, pairing);
-        element_mul_mpz(agg_key[k].k2, h_G1, sk.delta);
-
-        mpz_neg(tau_prime[k], tau_prime[k]);
-        mpz_mod(tau_prime[k], tau_prime[k], p);
-        mpz_powm(tau_prime[k], alpha, tau_prime[k], q);
-        element_mul_mpz(agg_key[k].k2, agg_key[k].k2, tau_prime[k]);
-
-        element_init_G1(agg_key[k].k3, pairing);
-        element_set0(agg_key[k].k3);
-    }
-    
-    mpz_t key_id;
-    mpz_init(key_id);
-
-    element_t temp;
-    element_init_G1(temp, pairing);
-
-    for(int i = 0; i < writer_subset.size(); ++i) {
-        mpz_powm(key_id, alpha, sigma_class[writer_subset[i]], q);
-        element_mul_mpz(temp, sk.alpha_to_tau_G1, key_id);
-        element_add(agg_key[0].k3, agg_key[0].k3, temp);
-    }
-    element_mul_mpz(temp, agg_key[0].k3, sk.gamma);
-
-    for(int k = 1; k < n; ++k) 
-        element_set(agg_key[k].k3, agg_key[0].k3);
-
-    element_add(temp, temp, sk.alpha_to_tau_G1);
 
     for(int k = 0; k < n; ++k) {
-        element_add(agg_key[k].k2, agg_key[k].k2, temp);
-        element_mul_mpz(agg_key[k].k3, agg_key[k].k3, alpha_pow_tau_prime[k]);
+        HICKAE_Extract_Key(id[k].c_str(), id[k].length(), tau_prime[k], &agg_key[k]);
+        mpz_clear(tau_prime[k]);
     }
     
     delete [] tau_prime;
-    delete [] alpha_pow_tau_prime;
 }
 
 bool HICKAE_Decrypt(vector<int> &writer_subset, int &wid, PEKS_AggKey &agg_key, PEKS_Token &c, unsigned char *m) {
@@ -441,12 +460,11 @@ bool HICKAE_Decrypt(vector<int> &writer_subset, int &wid, PEKS_AggKey &agg_key,
     
     SHA512_CTX sha512;
     unsigned char hash[SHA512_DIGEST_LENGTH];
-    unsigned char ut_bytes[256];
-    memset(ut_bytes, 0, sizeof(ut_bytes));
-    int len = element_to_bytes(ut_bytes, ut);
+    vector<unsigned char> ut_bytes(gt_size);
+    int len = element_to_bytes(ut_bytes.data(), ut);
 
     SHA512_Init(&sha512);
-    SHA512_Update(&sha512, ut_bytes, len);
+    SHA512_Update(&sha512, ut_bytes.data(), len);
     SHA512_Final(hash, &sha512);
     
     memset(m, 0, 37); 
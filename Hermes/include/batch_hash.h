@@ -0,0 +1,254 @@
+#pragma once
+#include <string.h>
+#include <string>
+#include <vector>
+#include <algorithm>
+#include <openssl/sha.h>
+#include <utils.h>
+#if defined(__AES__) || defined(__AVX2__)
+#include <immintrin.h>
+#endif
+
+// Batched PRF and SHA-512 over many independent lanes (e.g., the tokens of all postings of a keyword).
+// With AES-NI, the AES-256 key schedule of a PRF key is expanded once and the lanes are encrypted 4 at a time;
+// with AVX2, 4 single-block SHA-512 lanes are compressed at once. Otherwise both fall back to OpenSSL.
+
+const int PRF_OUTPUT_SIZE = 32;
+
+struct PRF_Key {
+    unsigned char key[32];
+#ifdef __AES__
+    __m128i round_key[15];
+#endif
+};
+
+#ifdef __AES__
+#define AES256_ASSIST_1(temp1, temp2, rcon) {                   \
+    __m128i t = _mm_aeskeygenassist_si128(temp2, rcon);         \
+    t = _mm_shuffle_epi32(t, 0xff);                             \
+    temp1 = _mm_xor_si128(temp1, _mm_slli_si128(temp1, 4));     \
+    temp1 = _mm_xor_si128(temp1, _mm_slli_si128(temp1, 4));     \
+    temp1 = _mm_xor_si128(temp1, _mm_slli_si128(temp1, 4));     \
+    temp1 = _mm_xor_si128(temp1, t);                            \
+}
+
+#define AES256_ASSIST_2(temp1, temp3) {                         \
+    __m128i t = _mm_aeskeygenassist_si128(temp1, 0x00);         \
+    t = _mm_shuffle_epi32(t, 0xaa);                             \
+    temp3 = _mm_xor_si128(temp3, _mm_slli_si128(temp3, 4));     \
+    temp3 = _mm_xor_si128(temp3, _mm_slli_si128(temp3, 4));     \
+    temp3 = _mm_xor_si128(temp3, _mm_slli_si128(temp3, 4));     \
+    temp3 = _mm_xor_si128(temp3, t);                            \
+}
+
+// Encrypt n independent blocks in place, 4 interleaved at a time to hide the latency of AESENC
+void aes256_encrypt_lanes(const __m128i *round_key, __m128i *blocks, size_t n) {
+    size_t i = 0;
+    for(; i + 4 <= n; i += 4) {
+        __m128i b0 = _mm_xor_si128(blocks[i],   round_key[0]);
+        __m128i b1 = _mm_xor_si128(blocks[i+1], round_key[0]);
+        __m128i b2 = _mm_xor_si128(blocks[i+2], round_key[0]);
+        __m128i b3 = _mm_xor_si128(blocks[i+3], round_key[0]);
+        for(int r = 1; r < 14; ++r) {
+            b0 = _mm_aesenc_si128(b0, round_key[r]);
+            b1 = _mm_aesenc_si128(b1, round_key[r]);
+            b2 = _mm_aesenc_si128(b2, round_key[r]);
+            b3 = _mm_aesenc_si128(b3, round_key[r]);
+        }
+        blocks[i]   = _mm_aesenclast_si128(b0, round_key[14]);
+        blocks[i+1] = _mm_aesenclast_si128(b1, round_key[14]);
+        blocks[i+2] = _mm_aesenclast_si128(b2, round_key[14]);
+        blocks[i+3] = _mm_aesenclast_si128(b3, round_key[14]);
+    }
+    for(; i < n; ++i) {
+        __m128i b = _mm_xor_si128(blocks[i], round_key[0]);
+        for(int r = 1; r < 14; ++r)
+            b = _mm_aesenc_si128(b, round_key[r]);
+        blocks[i] = _mm_aesenclast_si128(b, round_key[14]);
+    }
+}
+#endif
+
+void prf_init(PRF_Key *prf_key, const unsigned char *key) {
+    memcpy(prf_key->key, key, 32);
+#ifdef __AES__
+    __m128i *rk = prf_key->round_key;
+    __m128i temp1 = _mm_loadu_si128((const __m128i*)key);
+    __m128i temp3 = _mm_loadu_si128((const __m128i*)(key + 16));
+    rk[0] = temp1;
+    rk[1] = temp3;
+    AES256_ASSIST_1(temp1, temp3, 0x01); rk[2]  = temp1; AES256_ASSIST_2(temp1, temp3); rk[3]  = temp3;
+    AES256_ASSIST_1(temp1, temp3, 0x02); rk[4]  = temp1; AES256_ASSIST_2(temp1, temp3); rk[5]  = temp3;
+    AES256_ASSIST_1(temp1, temp3, 0x04); rk[6]  = temp1; AES256_ASSIST_2(temp1, temp3); rk[7]  = temp3;
+    AES256_ASSIST_1(temp1, temp3, 0x08); rk[8]  = temp1; AES256_ASSIST_2(temp1, temp3); rk[9]  = temp3;
+    AES256_ASSIST_1(temp1, temp3, 0x10); rk[10] = temp1; AES256_ASSIST_2(temp1, temp3); rk[11] = temp3;
+    AES256_ASSIST_1(temp1, temp3, 0x20); rk[12] = temp1; AES256_ASSIST_2(temp1, temp3); rk[13] = temp3;
+    AES256_ASSIST_1(temp1, temp3, 0x40); rk[14] = temp1;
+#endif
+}
+
+// Padded (PKCS#7) block k of a seed, as encrypted by prf()
+void seed_block(const string &seed, int k, unsigned char *block) {
+    int pad = 16 - seed.length() % 16;
+    for(int j = 0; j < 16; ++j) {
+        size_t pos = 16 * k + j;
+        block[j] = pos < seed.length() ? seed[pos] : pad;
+    }
+}
+
+// outputs[i*PRF_OUTPUT_SIZE...] = the first 32 bytes of prf(seeds[i]), i.e., AES-256-CBC with a zero IV;
+// bytes beyond a 16-byte output (seeds shorter than 16 bytes) are set to zero
+void prf_batch(const PRF_Key &prf_key, const string *seeds, size_t n, unsigned char *outputs) {
+#ifdef __AES__
+    vector<__m128i> blocks(n);
+    unsigned char block[16];
+    for(size_t i = 0; i < n; ++i) {
+        seed_block(seeds[i], 0, block);
+        blocks[i] = _mm_loadu_si128((const __m128i*)block);
+    }
+    aes256_encrypt_lanes(prf_key.round_key, blocks.data(), n);
+
+    // Second CBC block of the lanes whose seed has at least 16 bytes
+    vector<size_t> lanes;
+    vector<__m128i> second;
+    for(size_t i = 0; i < n; ++i) {
+        unsigned char *output = outputs + i * PRF_OUTPUT_SIZE;
+        _mm_storeu_si128((__m128i*)output, blocks[i]);
+        if(seeds[i].length() >= 16) {
+            seed_block(seeds[i], 1, block);
+            lanes.push_back(i);
+            second.push_back(_mm_xor_si128(_mm_loadu_si128((const __m128i*)block), blocks[i]));
+        }
+        else memset(output + 16, 0, 16);
+    }
+    aes256_encrypt_lanes(prf_key.round_key, second.data(), second.size());
+    for(size_t k = 0; k < lanes.size(); ++k)
+        _mm_storeu_si128((__m128i*)(outputs + lanes[k] * PRF_OUTPUT_SIZE + 16), second[k]);
+#else
+    vector<unsigned char> output;
+    for(size_t i = 0; i < n; ++i) {
+        if(output.size() < seeds[i].length() + 16)
+            output.resize(seeds[i].length() + 16);
+        int len = prf((unsigned char*)seeds[i].c_str(), seeds[i].length(), (unsigned char*)prf_key.key, output.data());
+        memset(outputs + i * PRF_OUTPUT_SIZE, 0, PRF_OUTPUT_SIZE);
+        memcpy(outputs + i * PRF_OUTPUT_SIZE, output.data(), min(len, PRF_OUTPUT_SIZE));
+    }
+#endif
+}
+
+#ifdef __AVX2__
+static const uint64_t SHA512_K[80] = {
+    0x428a2f98d728ae22ULL, 0x7137449123ef65cdULL, 0xb5c0fbcfec4d3b2fULL, 0xe9b5dba58189dbbcULL,
+    0x3956c25bf348b538ULL, 0x59f111f1b605d019ULL, 0x923f82a4af194f9bULL, 0xab1c5ed5da6d8118ULL,
+    0xd807aa98a3030242ULL, 0x12835b0145706fbeULL, 0x243185be4ee4b28cULL, 0x550c7dc3d5ffb4e2ULL,
+    0x72be5d74f27b896fULL, 0x80deb1fe3b1696b1ULL, 0x9bdc06a725c71235ULL, 0xc19bf174cf692694ULL,
+    0xe49b69c19ef14ad2ULL, 0xefbe4786384f25e3ULL, 0x0fc19dc68b8cd5b5ULL, 0x240ca1cc77ac9c65ULL,
+    0x2de92c6f592b0275ULL, 0x4a7484aa6ea6e483ULL, 0x5cb0a9dcbd41fbd4ULL, 0x76f988da831153b5ULL,
+    0x983e5152ee66dfabULL, 0xa831c66d2db43210ULL, 0xb00327c898fb213fULL, 0xbf597fc7beef0ee4ULL,
+    0xc6e00bf33da88fc2ULL, 0xd5a79147930aa725ULL, 0x06ca6351e003826fULL, 0x142929670a0e6e70ULL,
+    0x27b70a8546d22ffcULL, 0x2e1b21385c26c926ULL, 0x4d2c6dfc5ac42aedULL, 0x53380d139d95b3dfULL,
+    0x650a73548baf63deULL, 0x766a0abb3c77b2a8ULL, 0x81c2c92e47edaee6ULL, 0x92722c851482353bULL,
+    0xa2bfe8a14cf10364ULL, 0xa81a664bbc423001ULL, 0xc24b8b70d0f89791ULL, 0xc76c51a30654be30ULL,
+    0xd192e819d6ef5218ULL, 0xd69906245565a910ULL, 0xf40e35855771202aULL, 0x106aa07032bbd1b8ULL,
+    0x19a4c116b8d2d0c8ULL, 0x1e376c085141ab53ULL, 0x2748774cdf8eeb99ULL, 0x34b0bcb5e19b48a8ULL,
+    0x391c0cb3c5c95a63ULL, 0x4ed8aa4ae3418acbULL, 0x5b9cca4f7763e373ULL, 0x682e6ff3d6b2b8a3ULL,
+    0x748f82ee5defb2fcULL, 0x78a5636f43172f60ULL, 0x84c87814a1f0ab72ULL, 0x8cc702081a6439ecULL,
+    0x90befffa23631e28ULL, 0xa4506cebde82bde9ULL, 0xbef9a3f7b2c67915ULL, 0xc67178f2e372532bULL,
+    0xca273eceea26619cULL, 0xd186b8c721c0c207ULL, 0xeada7dd6cde0eb1eULL, 0xf57d4f7fee6ed178ULL,
+    0x06f067aa72176fbaULL, 0x0a637dc5a2c898a6ULL, 0x113f9804bef90daeULL, 0x1b710b35131c471bULL,
+    0x28db77f523047d84ULL, 0x32caab7b40c72493ULL, 0x3c9ebe0a15c9bebcULL, 0x431d67c49c100d4cULL,
+    0x4cc5d4becb3e42b6ULL, 0x597f299cfc657e2aULL, 0x5fcb6fab3ad6faecULL, 0x6c44198c4a475817ULL
+};
+
+static const uint64_t SHA512_IV[8] = {
+    0x6a09e667f3bcc908ULL, 0xbb67ae8584caa73bULL, 0x3c6ef372fe94f82bULL, 0xa54ff53a5f1d36f1ULL,
+    0x510e527fade682d1ULL, 0x9b05688c2b3e6c1fULL, 0x1f83d9abfb41bd6bULL, 0x5be0cd19137e2179ULL
+};
+
+#define ROTR64(x, n) _mm256_or_si256(_mm256_srli_epi64(x, n), _mm256_slli_epi64(x, 64 - (n)))
+
+// SHA-512 of 4 lanes of 16-byte messages: a single padded block each, so W[2..15] are constants
+void sha512_16_x4(const unsigned char *in0, const unsigned char *in1, const unsigned char *in2, const unsigned char *in3,
+                  unsigned char *out0, unsigned char *out1, unsigned char *out2, unsigned char *out3) {
+    const unsigned char *in[4] = {in0, in1, in2, in3};
+    unsigned char *out[4] = {out0, out1, out2, out3};
+    uint64_t word[2][4];
+    for(int l = 0; l < 4; ++l) {
+        uint64_t w;
+        memcpy(&w, in[l], 8);
+        word[0][l] = __builtin_bswap64(w);
+        memcpy(&w, in[l] + 8, 8);
+        word[1][l] = __builtin_bswap64(w);
+    }
+
+    __m256i W[80];
+    W[0] = _mm256_loadu_si256((const __m256i*)word[0]);
+    W[1] = _mm256_loadu_si256((const __m256i*)word[1]);
+    W[2] = _mm256_set1_epi64x(0x8000000000000000ULL);
+    for(int t = 3; t < 15; ++t)
+        W[t] = _mm256_setzero_si256();
+    W[15] = _mm256_set1_epi64x(128);
+    for(int t = 16; t < 80; ++t) {
+        __m256i s0 = _mm256_xor_si256(_mm256_xor_si256(ROTR64(W[t-15], 1), ROTR64(W[t-15], 8)), _mm256_srli_epi64(W[t-15], 7));
+        __m256i s1 = _mm256_xor_si256(_mm256_xor_si256(ROTR64(W[t-2], 19), ROTR64(W[t-2], 61)), _mm256_srli_epi64(W[t-2], 6));
+        W[t] = _mm256_add_epi64(_mm256_add_epi64(s1, W[t-7]), _mm256_add_epi64(s0, W[t-16]));
+    }
+
+    __m256i a = _mm256_set1_epi64x(SHA512_IV[0]), b = _mm256_set1_epi64x(SHA512_IV[1]);
+    __m256i c = _mm256_set1_epi64x(SHA512_IV[2]), d = _mm256_set1_epi64x(SHA512_IV[3]);
+    __m256i e = _mm256_set1_epi64x(SHA512_IV[4]), f = _mm256_set1_epi64x(SHA512_IV[5]);
+    __m256i g = _mm256_set1_epi64x(SHA512_IV[6]), h = _mm256_set1_epi64x(SHA512_IV[7]);
+    for(int t = 0; t < 80; ++t) {
+        __m256i S1 = _mm256_xor_si256(_mm256_xor_si256(ROTR64(e, 14), ROTR64(e, 18)), ROTR64(e, 41));
+        __m256i ch = _mm256_xor_si256(_mm256_and_si256(e, f), _mm256_andnot_si256(e, g));
+        __m256i t1 = _mm256_add_epi64(_mm256_add_epi64(h, S1), _mm256_add_epi64(ch, _mm256_add_epi64(_mm256_set1_epi64x(SHA512_K[t]), W[t])));
+        __m256i S0 = _mm256_xor_si256(_mm256_xor_si256(ROTR64(a, 28), ROTR64(a, 34)), ROTR64(a, 39));
+        __m256i maj = _mm256_or_si256(_mm256_and_si256(a, b), _mm256_and_si256(c, _mm256_or_si256(a, b)));
+        __m256i t2 = _mm256_add_epi64(S0, maj);
+        h = g; g = f; f = e;
+        e = _mm256_add_epi64(d, t1);
+        d = c; c = b; b = a;
+        a = _mm256_add_epi64(t1, t2);
+    }
+
+    __m256i state[8] = {a, b, c, d, e, f, g, h};
+    uint64_t digest[4];
+    for(int i = 0; i < 8; ++i) {
+        _mm256_storeu_si256((__m256i*)digest, _mm256_add_epi64(state[i], _mm256_set1_epi64x(SHA512_IV[i])));
+        for(int l = 0; l < 4; ++l) {
+            uint64_t w = __builtin_bswap64(digest[l]);
+            memcpy(out[l] + 8 * i, &w, 8);
+        }
+    }
+}
+#endif
+
+// digests[i*SHA512_DIGEST_LENGTH...] = SHA-512 of the first 16 bytes of token i in inputs[i*PRF_OUTPUT_SIZE...]
+// (the address of a DSSE token)
+void sha512_16_batch(const unsigned char *inputs, size_t n, unsigned char *digests) {
+    const int D = SHA512_DIGEST_LENGTH, T = PRF_OUTPUT_SIZE;
+    size_t i = 0;
+#ifdef __AVX2__
+    for(; i + 4 <= n; i += 4)
+        sha512_16_x4(inputs + i*T, inputs + (i+1)*T, inputs + (i+2)*T, inputs + (i+3)*T, 
+                     digests + i*D, digests + (i+1)*D, digests + (i+2)*D, digests + (i+3)*D);
+    if(i < n) {
+        // Fill the remaining lanes with the last input
+        unsigned char spare[3][SHA512_DIGEST_LENGTH];
+        const unsigned char *in[4];
+        unsigned char *out[4];
+        for(int l = 0; l < 4; ++l) {
+            in[l] = inputs + min(i + l, n - 1) * T;
+            out[l] = (i + l < n) ? digests + (i + l) * D : spare[l - 1];
+        }
+        sha512_16_x4(in[0], in[1], in[2], in[3], out[0], out[1], out[2], out[3]);
+        i = n;
+    }
+#endif
+    SHA512_CTX sha512;
+    for(; i < n; ++i) {
+        SHA512_Init(&sha512);
+        SHA512_Update(&sha512, inputs + i*T, 16);
+        SHA512_Final(digests + i*D, &sha512);
+    }
+}
@@ -0,0 +1,183 @@
+#pragma once
+#include <string.h>
+#include <stdint.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <string>
+#include <iostream>
+#include <vector>
+#include <fstream>
+#include <sstream>
+#include <algorithm>
+
+using namespace std;
+
+// Binary writer database <writer_id>.hdb (written by convert_database.py), all fields little-endian:
+//   header     WDB_Header
+//   keywords   num_keywords x WDB_Keyword, in the order of the text database
+//   postings   num_postings x int32, the file ids of each keyword sorted in ascending order
+//   strings    keywords_size bytes, the keywords without separators
+const char WDB_MAGIC[4] = {'H', 'D', 'B', '1'};
+
+struct WDB_Header {
+    char     magic[4];
+    uint32_t num_keywords;
+    uint64_t num_postings;
+    uint64_t keywords_size;
+};
+
+struct WDB_Keyword {
+    uint32_t keyword_offset;    // In the strings section
+    uint32_t keyword_length;
+    uint32_t posting_offset;    // In the postings section (number of file ids)
+    uint32_t num_postings;
+};
+
+// Read-only view of a writer's database. The binary file is memory-mapped; if it does not exist,
+// the text database <writer_id>.txt is parsed into a buffer of the same layout
+class Writer_DB {
+public:
+    Writer_DB(): data(NULL), mapped_size(0) {}
+    ~Writer_DB() { close(); }
+
+    // Returns false if neither database file of the writer (0-based id) can be read. A binary database 
+    // older than the text database next to it is outdated and ignored
+    bool open(const string &data_dir, int writer_id) {
+        close();
+        string path = data_dir + to_string(writer_id + 1);
+        if(is_outdated(path + ".hdb", path + ".txt")) {
+            cout << "⚠ " << path << ".hdb is older than " << path << ".txt, parsing the text database "
+                 << "(re-run convert_database.py)" << endl;
+            return open_text(path + ".txt");
+        }
+        return open_binary(path + ".hdb") || open_text(path + ".txt");
+    }
+
+    void close() {
+        if(mapped_size > 0) munmap((void*)data, mapped_size);
+        data = NULL;
+        mapped_size = 0;
+        buffer.clear();
+    }
+
+    bool is_mapped() const { return mapped_size > 0; }
+
+    uint32_t size() const { return header()->num_keywords; }
+    uint64_t total_postings() const { return header()->num_postings; }
+
+    const char *keyword(uint32_t k) const { return strings() + entry(k).keyword_offset; }
+    uint32_t keyword_length(uint32_t k) const { return entry(k).keyword_length; }
+    const int32_t *postings(uint32_t k) const { return postings_base() + entry(k).posting_offset; }
+    uint32_t num_postings(uint32_t k) const { return entry(k).num_postings; }
+
+private:
+    const char *data;
+    size_t mapped_size;
+    vector<char> buffer;        // Parsed text database
+
+    const WDB_Header *header() const { return (const WDB_Header*)data; }
+    const WDB_Keyword &entry(uint32_t k) const {
+        return ((const WDB_Keyword*)(data + sizeof(WDB_Header)))[k];
+    }
+    const int32_t *postings_base() const {
+        return (const int32_t*)(data + sizeof(WDB_Header) + header()->num_keywords * sizeof(WDB_Keyword));
+    }
+    const char *strings() const { return (const char*)(postings_base() + header()->num_postings); }
+
+    static bool is_outdated(const string &binary_path, const string &text_path) {
+        struct stat binary_st, text_st;
+        if(stat(binary_path.c_str(), &binary_st) != 0 || stat(text_path.c_str(), &text_st) != 0) return false;
+        if(text_st.st_mtim.tv_sec != binary_st.st_mtim.tv_sec) 
+            return text_st.st_mtim.tv_sec > binary_st.st_mtim.tv_sec;
+        return text_st.st_mtim.tv_nsec > binary_st.st_mtim.tv_nsec;
+    }
+
+    // Every keyword and posting list must lie inside its section, so that a corrupt or truncated file 
+    // cannot cause reads outside the mapping
+    bool is_valid() const {
+        const WDB_Header *h = header();
+        if(memcmp(h->magic, WDB_MAGIC, 4) != 0) return false;
+        if(h->num_keywords > mapped_size / sizeof(WDB_Keyword) || h->num_postings > mapped_size / sizeof(int32_t) 
+           || h->keywords_size > mapped_size || layout_size(h) > mapped_size) 
+            return false;
+        for(uint32_t k = 0; k < h->num_keywords; k++) {
+            const WDB_Keyword &e = entry(k);
+            if((uint64_t)e.keyword_offset + e.keyword_length > h->keywords_size 
+               || (uint64_t)e.posting_offset + e.num_postings > h->num_postings) 
+                return false;
+        }
+        return true;
+    }
+
+    static size_t layout_size(const WDB_Header *h) {
+        return sizeof(WDB_Header) + h->num_keywords * sizeof(WDB_Keyword)
+               + h->num_postings * sizeof(int32_t) + h->keywords_size;
+    }
+
+    bool open_binary(const string &path) {
+        int fd = ::open(path.c_str(), O_RDONLY);
+        if(fd < 0) return false;
+        struct stat st;
+        if(fstat(fd, &st) != 0 || st.st_size < (off_t)sizeof(WDB_Header)) {
+            ::close(fd);
+            return false;
+        }
+        void *p = mmap(NULL, st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+        ::close(fd);
+        if(p == MAP_FAILED) return false;
+        madvise(p, st.st_size, MADV_SEQUENTIAL);
+
+        data = (const char*)p;
+        mapped_size = st.st_size;
+        if(!is_valid()) {
+            cout << "✗ Invalid writer database: " << path << endl;
+            close();
+            return false;
+        }
+        return true;
+    }
+
+    bool open_text(const string &path) {
+        ifstream file(path);
+        if(!file.is_open()) return false;
+
+        vector<WDB_Keyword> entries;
+        vector<int32_t> file_ids;
+        string strings, line, keyword;
+        while(getline(file, line)) {
+            stringstream wss(line);
+            if(!(wss >> keyword)) continue;
+            WDB_Keyword e;
+            e.keyword_offset = strings.size();
+            e.keyword_length = keyword.length();
+            e.posting_offset = file_ids.size();
+            int file_id;
+            while(wss >> file_id)
+                file_ids.push_back(file_id);
+            e.num_postings = file_ids.size() - e.posting_offset;
+            sort(file_ids.begin() + e.posting_offset, file_ids.end());
+            strings += keyword;
+            entries.push_back(e);
+        }
+        file.close();
+
+        WDB_Header h;
+        memcpy(h.magic, WDB_MAGIC, 4);
+        h.num_keywords = entries.size();
+        h.num_postings = file_ids.size();
+        h.keywords_size = strings.size();
+        buffer.resize(layout_size(&h));
+        char *p = buffer.data();
+        memcpy(p, &h, sizeof(h));
+        p += sizeof(h);
+        memcpy(p, entries.data(), entries.size() * sizeof(WDB_Keyword));
+        p += entries.size() * sizeof(WDB_Keyword);
+        memcpy(p, file_ids.data(), file_ids.size() * sizeof(int32_t));
+        p += file_ids.size() * sizeof(int32_t);
+        memcpy(p, strings.data(), strings.size());
+        data = buffer.data();
+        return true;
+    }
+};
@@ -0,0 +1,118 @@
+/**
+ * 写者数据库加载性能测试
+ * 对比文本数据库（getline + istringstream 逐行解析）和二进制数据库（mmap）的加载时间
+ *
+ * 用法: ./load_benchmark <data_dir> [<writers>] [<repeats>]
+ */
+
+#include <iostream>
+#include <fstream>
+#include <sstream>
+#include <chrono>
+#include <string>
+#include <sys/stat.h>
+#include "writer_db.h"
+
+using namespace std;
+
+struct Load_Result {
+    uint64_t keywords;
+    uint64_t postings;
+    uint64_t checksum;      // 防止遍历被优化掉，两种格式应一致
+    uint64_t bytes;
+};
+
+uint64_t file_size(const string &path) {
+    struct stat st;
+    return stat(path.c_str(), &st) == 0 ? st.st_size : 0;
+}
+
+// 与原先服务器 init() / 客户端 load_state() 相同的文本解析方式
+Load_Result load_text(const string &data_dir, int num_writers) {
+    Load_Result r = {0, 0, 0, 0};
+    string line, keyword;
+    for (int writer_id = 0; writer_id < num_writers; writer_id++) {
+        string path = data_dir + to_string(writer_id + 1) + ".txt";
+        ifstream file(path);
+        while (getline(file, line)) {
+            stringstream wss(line);
+            wss >> keyword;
+            istringstream iss(line.substr(keyword.length() + 1));
+            r.keywords++;
+            r.checksum += keyword.length();
+            int file_id;
+            while (iss >> file_id) {
+                r.postings++;
+                r.checksum += file_id;
+            }
+        }
+        r.bytes += file_size(path);
+    }
+    return r;
+}
+
+Load_Result load_binary(const string &data_dir, int num_writers) {
+    Load_Result r = {0, 0, 0, 0};
+    Writer_DB db;
+    for (int writer_id = 0; writer_id < num_writers; writer_id++) {
+        string path = data_dir + to_string(writer_id + 1) + ".hdb";
+        if (!db.open(data_dir, writer_id) || !db.is_mapped()) {
+            cout << "✗ 缺少二进制数据库: " << path << endl;
+            exit(1);
+        }
+        for (uint32_t k = 0; k < db.size(); k++) {
+            r.keywords++;
+            r.checksum += db.keyword_length(k);
+            const int32_t *file_ids = db.postings(k);
+            for (uint32_t i = 0; i < db.num_postings(k); i++) {
+                r.postings++;
+                r.checksum += file_ids[i];
+            }
+        }
+        r.bytes += file_size(path);
+    }
+    return r;
+}
+
+template<typename F>
+double time_load(F load, const string &data_dir, int num_writers, int repeats, Load_Result &result) {
+    double best = 0;
+    for (int i = 0; i < repeats; i++) {
+        auto start = chrono::high_resolution_clock::now();
+        result = load(data_dir, num_writers);
+        double elapsed = chrono::duration<double, milli>(chrono::high_resolution_clock::now() - start).count();
+        if (i == 0 || elapsed < best) best = elapsed;
+    }
+    return best;
+}
+
+int main(int argc, char* argv[]) {
+    if (argc < 2) {
+        cout << "用法: " << argv[0] << " <data_dir> [<writers>] [<repeats>]" << endl;
+        return 1;
+    }
+    string data_dir = argv[1];
+    if (data_dir.back() != '/') data_dir += '/';
+    int num_writers = argc > 2 ? atoi(argv[2]) : 25;
+    int repeats = argc > 3 ? atoi(argv[3]) : 3;
+
+    cout << "数据目录: " << data_dir << ", 写者数量: " << num_writers << ", 重复: " << repeats << " 次（取最快）" << endl;
+
+    Load_Result text, binary;
+    double text_time = time_load(load_text, data_dir, num_writers, repeats, text);
+    double binary_time = time_load(load_binary, data_dir, num_writers, repeats, binary);
+
+    if (text.postings != binary.postings || text.checksum != binary.checksum) {
+        cout << "✗ 文本和二进制数据库的内容不一致" << endl;
+        return 1;
+    }
+
+    cout << "Keywords: " << text.keywords << endl;
+    cout << "Postings: " << text.postings << endl;
+    cout << "TextBytes: " << text.bytes << endl;
+    cout << "BinaryBytes: " << binary.bytes << endl;
+    cout << "Text: " << text_time << " ms (" << (uint64_t)(text.postings / (text_time / 1e3)) << " 个文档/秒)" << endl;
+    cout << "Binary: " << binary_time << " ms (" << (uint64_t)(binary.postings / (binary_time / 1e3)) << " 个文档/秒)" << endl;
+    cout << "Speedup: " << text_time / binary_time << endl;
+    return 0;
+}
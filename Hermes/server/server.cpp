@@ -1,10 +1,15 @@
 #include <iostream>
 #include <fstream>
 #include <sstream>
+#include <thread>
+#include <atomic>
+#include <algorithm>
 #include <zmq.hpp>
 #include <emp-tool/emp-tool.h>
 #include <emp-agmpc/emp-agmpc.h>
 #include <utils.h>
+#include <batch_hash.h>
+#include <writer_db.h>
 #include "hickae.hpp"
 #include "ThreadPool.h"
 
@@ -23,6 +28,11 @@ mutex          mtx;
 int            **output;
 string         encoded_epoch;
 uint64_t       epoch;
+char           last_query;      // type of the last processed query
+double         last_latency;    // server-side latency of the last processed query (us)
+mutex          *writer_mtx;     // guards the search indices of each writer
+atomic<bool>   processing_query;
+string         data_dir = "../../database_small/";
 
 // DSSE Search Indices
 unordered_map<string, DSSE_Token>         *EDTkn;
@@ -35,12 +45,50 @@ unordered_map<string, vector<Encrypted_Search_Token>> *WTkn;
 unordered_map<string, vector<PEKS_Token>> *WTkn;
 #endif 
 
+// Indices of superseded WTkn entries found by searches, removed by the compactor
+unordered_map<string, vector<int>>        *stale_candidates;
+
 // For debugging
 unordered_map<string, uint64_t>           *state;
 
+// Load runtime parameters from a config file of KEY=VALUE lines (e.g., written by partition_tuner.py)
+bool load_config(const char *path) {
+    ifstream file(path);
+    if(!file.is_open()) return false;
+
+    string line;
+    while(getline(file, line)) {
+        if(line.empty() || line[0] == '#') continue;
+        size_t pos = line.find('=');
+        if(pos == string::npos) continue;
+        string key = line.substr(0, pos);
+        string value = line.substr(pos + 1);
+
+        if(key == "DATA_DIR") {
+            data_dir = value;
+            if(!data_dir.empty() && data_dir.back() != '/') 
+                data_dir += '/';
+        }
+        else if(key == "CURVE") 
+            curve_name = value;
+        else if(key == "RECURSIVE_LEVEL") 
+            partition_params.recursive_level = atoi(value.c_str());
+        else if(key == "PARTITION_SIZE") 
+            partition_params.partition_size = atoi(value.c_str());
+        else if(key == "NUM_PARTITIONS") 
+            partition_params.num_partitions = atoi(value.c_str());
+        else 
+            cout << "Unknown config key: " << key << endl;
+    }
+    file.close();
+    return true;
+}
+
 void init(int num_writers) {
     EDTkn = new unordered_map<string, DSSE_Token>[num_writers];
     state = new unordered_map<string, uint64_t>[num_writers];
+    stale_candidates = new unordered_map<string, vector<int>>[num_writers];
+    writer_mtx = new mutex[num_writers];
 
     PTkn = new unordered_map<string, vector<PEKS_Token>>[num_writers];
 #ifdef WRITER_EFFICIENCY
@@ -75,23 +123,27 @@ void init(int num_writers) {
     ThreadPool pool(MAX_THREADS_INIT);
     
     vector<int> writer_set;
+    uint64_t total_postings = 0;
+    atomic<int> text_databases(0);              // Writers without a binary database (see convert_database.py)
+    auto start = clock_start();
 
     for(int writer_id = num_writers - 1; writer_id >= 0; --writer_id) 
         writer_set.push_back(writer_id);
     
     for(int t = 0; t < MAX_THREADS_INIT; ++t) {
 #ifdef WRITER_EFFICIENCY
-        threads.push_back(pool.enqueue([t, &writer_set, &gamma_t]() {
+        threads.push_back(pool.enqueue([t, &writer_set, &total_postings, &text_databases, &gamma_t]() {
 #else 
-        threads.push_back(pool.enqueue([t, &writer_set]() {
+        threads.push_back(pool.enqueue([t, &writer_set, &total_postings, &text_databases]() {
 #endif 
             int writer_id;
-            string line;
             string keyword;
-            int file_id;
-            SHA512_CTX sha512;
             char addr[21];
-            unsigned char tmp[SHA512_DIGEST_LENGTH];
+            Writer_DB db;
+            vector<string> seeds;
+            vector<unsigned char> tokens;
+            vector<unsigned char> digests;
+            uint64_t thread_postings = 0;
             
             while(!writer_set.empty()) {
                 mtx.lock();
@@ -110,36 +162,39 @@ void init(int num_writers) {
                 unsigned char writer_secret_key[32];
                 prg.reseed((block*)"generaterwritersecretkeys", writer_id+1);
                 prg.random_block((block*)writer_secret_key, 2);
-                string user_database = to_string(writer_id+1) + ".txt";
-                // int num_keywords = count_lines("../../database_small/" + user_database); 
-                // cout << "#Keywords: " << num_keywords << endl;
+                PRF_Key prf_key;
+                prf_init(&prf_key, writer_secret_key);
 
-                ifstream file("../../database_small/" + user_database);
+                if(!db.open(data_dir, writer_id)) {
+                    mtx.lock();
+                    cout << "✗ Cannot read the database of writer " << (writer_id + 1) << " in " << data_dir << endl;
+                    mtx.unlock();
+                    continue;
+                }
+                if(!db.is_mapped()) text_databases++;
 
-                while(getline(file, line)) {
-                    stringstream wss(line);
-                    wss >> keyword;
+                for(uint32_t kid = 0; kid < db.size(); ++kid) {
+                    keyword.assign(db.keyword(kid), db.keyword_length(kid));
                     // cout << "Keyword: " << keyword << endl;
-                    istringstream iss(line.substr(keyword.length() + 1));
-                    state[writer_id][keyword] = 0;
+                    const int32_t *file_ids = db.postings(kid);
+                    
+                    // Tokens and addresses of all postings of the keyword are computed in one batch
+                    int num_postings = db.num_postings(kid);
+                    seeds.resize(num_postings);
+                    tokens.resize(num_postings * PRF_OUTPUT_SIZE);
+                    digests.resize(num_postings * SHA512_DIGEST_LENGTH);
+                    for(int k = 0; k < num_postings; ++k) 
+                        seeds[k] = keyword + to_string(k);
+                    prf_batch(prf_key, seeds.data(), num_postings, tokens.data());
+                    sha512_16_batch(tokens.data(), num_postings, digests.data());
                     
-                    int file_id;
                     unsigned char token[32];
                     unsigned char prev_token[32];
                     memset(prev_token, 0, 32);
                     
-                    while(iss >> file_id) {
-                        string seed = keyword + to_string(state[writer_id][keyword]);
-                        prf((unsigned char *)seed.c_str(), seed.length(), writer_secret_key, token);
-                        
-                        // cout << "PRF: ";
-                        // for(int i = 0; i < 32; ++i)    
-                        //     cout << (int)token[i] << " ";
-                        // cout << endl;
-
-                        SHA512_Init(&sha512);
-                        SHA512_Update(&sha512, token, 16);
-                        SHA512_Final(tmp, &sha512);
+                    for(int k = 0; k < num_postings; ++k) {
+                        memcpy(token, &tokens[k * PRF_OUTPUT_SIZE], 32);
+                        unsigned char *tmp = &digests[k * SHA512_DIGEST_LENGTH];
                         
                         memset(addr, 0, sizeof(addr));
                         for (int j = 0; j < 10; ++j) 
@@ -147,9 +202,9 @@ void init(int num_writers) {
 
                         DSSE_Token value;   
                         memset(value, 0, sizeof(DSSE_Token));
-                        value[0] = 1;                                       // 1 = add, 0 = delete
-                        memcpy((uint8_t*)value + 1, &file_id, sizeof(int)); // file id
-                        memcpy((uint8_t*)value + 5, prev_token, 32);        // previous token
+                        value[0] = 1;                                               // 1 = add, 0 = delete
+                        memcpy((uint8_t*)value + 1, &file_ids[k], sizeof(int));     // file id
+                        memcpy((uint8_t*)value + 5, prev_token, 32);                // previous token
 
                         for(int j = 0; j < 37; ++j) 
                             value[j] ^= tmp[j+10];
@@ -159,13 +214,14 @@ void init(int num_writers) {
 
                         // Update previous token
                         memcpy(prev_token, token, 32);
-                        state[writer_id][keyword]++;
                     }
+                    state[writer_id][keyword] = num_postings;
+                    thread_postings += num_postings;
 
                     array<uint64_t, 2> hash_value = mm_hash((uint8_t*)keyword.c_str(), keyword.length());
 #ifdef SEARCH_EFFICIENCY
-                    int num_partitions = NUM_PARTITIONS;
-                    uint64_t pid = ((hash_value[0] % num_partitions) << 2) | RECURSIVE_LEVEL;
+                    int num_partitions = partition_params.num_partitions;
+                    uint64_t pid = ((hash_value[0] % num_partitions) << 2) | partition_params.recursive_level;
 #else 
                     uint64_t pid = hash_value[0] % MAX_PARTITIONS;
 #endif              
@@ -187,13 +243,13 @@ void init(int num_writers) {
                     
                     if(WTkn[writer_id][paddr].empty()) {
                         // Recursive until before root level
-                        for(int k = 1; k < RECURSIVE_LEVEL; ++k) {
+                        for(int k = 1; k < partition_params.recursive_level; ++k) {
                             PEKS_Token eptkn;
                             HICKAE_Encrypt(writer_id, (char*)to_string(pid).c_str(), partition_tag, &eptkn);
                             
-                            num_partitions /= PARTITION_SIZE;
+                            num_partitions /= partition_params.partition_size;
                             hash_value = mm_hash((uint8_t*)&pid, sizeof(pid));
-                            pid = ((hash_value[0] % num_partitions) << 2) | (RECURSIVE_LEVEL - k);
+                            pid = ((hash_value[0] % num_partitions) << 2) | (partition_params.recursive_level - k);
                             
                             prf((unsigned char *)&pid, sizeof(pid), writer_secret_key, partition_tag);
                             
@@ -238,9 +294,10 @@ void init(int num_writers) {
                     WTkn[writer_id][paddr].push_back(ewtkn);
 #endif 
                 }
-                file.close();
+                db.close();
             }
             mtx.lock();
+            total_postings += thread_postings;
             cout << "Thread " << t << " ends." << endl;
             mtx.unlock();
         }));
@@ -252,19 +309,235 @@ void init(int num_writers) {
     for(int writer_id = 0; writer_id < num_writers; ++writer_id) 
         output[writer_id] = new int[MAX_MATCH_OUTPUT];
     
-    cout << "Done" << endl;
+    double elapsed = time_from(start);
+    cout << "Done: " << total_postings << " postings in " << elapsed / 1e6 << " s (" 
+         << (uint64_t)(total_postings / (elapsed / 1e6)) << " postings/s)" << endl;
+    if(text_databases > 0) 
+        cout << "⚠ " << text_databases << " writer databases were parsed from text, convert them with convert_database.py" << endl;
 
     delete [] state;
     delete [] class_binding_key;
 }
 
+// Record the matches of a search other than the latest one as stale, the caller holds writer_mtx[writer_id]
+void record_stale_candidates(int writer_id, string &paddr, vector<int> &matches, int latest_match) {
+    vector<int> *candidates = NULL;
+    for(int match: matches) {
+        if(match == latest_match) continue;
+        if(candidates == NULL) 
+            candidates = &stale_candidates[writer_id][paddr];
+        candidates->push_back(match);
+    }
+}
+
+#ifdef WRITER_EFFICIENCY
+void clear_search_token(Encrypted_Search_Token &ewtkn) {
+    for(auto &entry: ewtkn.data) {
+        element_clear(entry.second.c1);
+        element_clear(entry.second.c2);
+        element_clear(entry.second.c3);
+    }
+    ewtkn.data.clear();
+}
+#else 
+void clear_search_token(PEKS_Token &ewtkn) {
+    element_clear(ewtkn.c1);
+    element_clear(ewtkn.c2);
+    element_clear(ewtkn.c3);
+}
+#endif 
+
+// Remove the stale entries of a partition in one linear pass, the caller holds writer_mtx[writer_id]
+// Updates only append to a partition, so the recorded indices stay valid until the partition is compacted
+int compact_partition(int writer_id, const string &paddr, vector<int> &candidates) {
+    auto partition = WTkn[writer_id].find(paddr);
+    if(partition == WTkn[writer_id].end()) return 0;
+    auto &tokens = partition->second;
+
+    sort(candidates.begin(), candidates.end());
+    candidates.erase(unique(candidates.begin(), candidates.end()), candidates.end());
+
+    size_t next = 0;
+    size_t kept = 0;
+    for(size_t k = 0; k < tokens.size(); ++k) {
+        if(next < candidates.size() && candidates[next] == (int)k) {
+            clear_search_token(tokens[k]);
+            ++next;
+            continue;
+        }
+        if(kept != k) 
+            tokens[kept] = move(tokens[k]);
+        ++kept;
+    }
+    int removed = tokens.size() - kept;
+    tokens.resize(kept);
+    return removed;
+}
+
+// Background compactor: every COMPACTION_INTERVAL_MS, compact at most MAX_COMPACTION_PARTITIONS partitions 
+// with stale candidates, while no query is being processed
+void compact_search_indices() {
+    int writer_id = 0;
+    while(1) {
+        this_thread::sleep_for(chrono::milliseconds(COMPACTION_INTERVAL_MS));
+        if(processing_query) continue;
+
+        int budget = MAX_COMPACTION_PARTITIONS;
+        int num_partitions = 0;
+        int removed = 0;
+        for(int i = 0; i < num_writers && budget > 0 && !processing_query; ++i) {
+            while(budget > 0 && !processing_query) {
+                writer_mtx[writer_id].lock();
+                if(stale_candidates[writer_id].empty()) {
+                    writer_mtx[writer_id].unlock();
+                    break;
+                }
+                auto partition = stale_candidates[writer_id].begin();
+                removed += compact_partition(writer_id, partition->first, partition->second);
+                stale_candidates[writer_id].erase(partition);
+                writer_mtx[writer_id].unlock();
+                ++num_partitions;
+                --budget;
+            }
+            if(budget > 0) 
+                writer_id = (writer_id + 1) % num_writers;
+        }
+
+        if(removed > 0) {
+            mtx.lock();
+            cout << "Compactor removed " << removed << " stale search tokens from " << num_partitions << " partitions" << endl;
+            mtx.unlock();
+        }
+    }
+}
+
+// Memory accounting of the search indices, in entries and approximate bytes 
+// (serialized size of the group elements plus the bookkeeping of the containers)
+enum Index_Structure { STATS_EDTKN, STATS_PTKN, STATS_WTKN, STATS_CORRELATION, STATS_OUTPUT, NUM_INDEX_STRUCTURES };
+
+struct Index_Stats {
+    uint64_t keywords;
+    uint64_t postings;
+    uint64_t entries[NUM_INDEX_STRUCTURES];
+    uint64_t bytes[NUM_INDEX_STRUCTURES];
+};
+
+// Heap bytes of a hash table node with a string key: next pointer, cached hash, key and value
+size_t node_bytes(const string &key, size_t value_bytes) {
+    size_t key_bytes = key.capacity() > 15 ? key.capacity() + 1 : 0;
+    return sizeof(void*) + sizeof(size_t) + sizeof(string) + key_bytes + value_bytes;
+}
+
+template<typename T> size_t table_bytes(const unordered_map<string, T> &table) {
+    return table.bucket_count() * sizeof(void*);
+}
+
+size_t element_bytes(element_t e) {
+    return element_length_in_bytes(e);
+}
+
+size_t token_bytes(PEKS_Token &ewtkn) {
+    return element_bytes(ewtkn.c1) + element_bytes(ewtkn.c2) + element_bytes(ewtkn.c3);
+}
+
+#ifdef WRITER_EFFICIENCY
+size_t token_bytes(Encrypted_Search_Token &ewtkn) {
+    size_t bytes = table_bytes(ewtkn.data);
+    for(auto &entry: ewtkn.data) 
+        bytes += node_bytes(entry.first, sizeof(PEKS_Token)) + token_bytes(entry.second);
+    return bytes;
+}
+#endif 
+
+template<typename T> void partition_stats(unordered_map<string, vector<T>> &index, uint64_t &entries, uint64_t &bytes) {
+    entries = 0;
+    bytes = table_bytes(index);
+    for(auto &partition: index) {
+        entries += partition.second.size();
+        bytes += node_bytes(partition.first, sizeof(vector<T>)) + partition.second.capacity() * sizeof(T);
+        for(auto &ewtkn: partition.second) 
+            bytes += token_bytes(ewtkn);
+    }
+}
+
+// Number of keywords of a writer, the caller holds writer_mtx[writer_id]. Every keyword has one live search 
+// token in WTkn. The server cannot tell a new keyword from an update of an existing one, so the previous tokens 
+// of updated keywords are counted until a search records them as stale
+uint64_t live_keywords(int writer_id) {
+    uint64_t keywords = 0;
+    for(auto &partition: WTkn[writer_id]) 
+        keywords += partition.second.size();
+    for(auto &partition: stale_candidates[writer_id]) {
+        vector<int> candidates = partition.second;
+        sort(candidates.begin(), candidates.end());
+        keywords -= unique(candidates.begin(), candidates.end()) - candidates.begin();
+    }
+    return keywords;
+}
+
+void index_stats(int writer_id, Index_Stats &stats) {
+    writer_mtx[writer_id].lock();
+    stats.keywords = live_keywords(writer_id);
+    stats.postings = EDTkn[writer_id].size();
+
+    stats.entries[STATS_EDTKN] = EDTkn[writer_id].size();
+    stats.bytes[STATS_EDTKN] = table_bytes(EDTkn[writer_id]);
+    for(auto &entry: EDTkn[writer_id]) 
+        stats.bytes[STATS_EDTKN] += node_bytes(entry.first, sizeof(DSSE_Token));
+
+    partition_stats(PTkn[writer_id], stats.entries[STATS_PTKN], stats.bytes[STATS_PTKN]);
+    partition_stats(WTkn[writer_id], stats.entries[STATS_WTKN], stats.bytes[STATS_WTKN]);
+    writer_mtx[writer_id].unlock();
+
+    // Correlation values of this writer with all other writers
+    stats.entries[STATS_CORRELATION] = num_writers - 1;
+    stats.bytes[STATS_CORRELATION] = num_writers * sizeof(element_t);
+    for(int j = 0; j < num_writers; ++j) 
+        if(j != writer_id) 
+            stats.bytes[STATS_CORRELATION] += element_bytes(correlation[writer_id][j]);
+
+    stats.entries[STATS_OUTPUT] = MAX_MATCH_OUTPUT;
+    stats.bytes[STATS_OUTPUT] = MAX_MATCH_OUTPUT * sizeof(int);
+}
+
+// Reply of a stats query: #writers and #structures (int), entries and bytes of the public parameters, 
+// then per writer #keywords, #postings and entries and bytes of every structure (uint64_t)
+void send_stats() {
+    size_t row_size = 2 + 2 * NUM_INDEX_STRUCTURES;
+    zmq::message_t stats_reply(2 * sizeof(int) + (2 + num_writers * row_size) * sizeof(uint64_t));
+    uint8_t *stats_reply_data = (uint8_t*)stats_reply.data();
+
+    int header[2] = {num_writers, NUM_INDEX_STRUCTURES};
+    memcpy(stats_reply_data, header, sizeof(header));
+    uint64_t *values = (uint64_t*)(stats_reply_data + sizeof(header));
+
+    values[0] = num_writers;
+    values[1] = num_writers * sizeof(element_t);
+    for(int i = 0; i < num_writers; ++i) 
+        values[1] += element_bytes(public_parameters[i]);
+    values += 2;
+
+    Index_Stats stats;
+    for(int writer_id = 0; writer_id < num_writers; ++writer_id) {
+        index_stats(writer_id, stats);
+        values[0] = stats.keywords;
+        values[1] = stats.postings;
+        for(int k = 0; k < NUM_INDEX_STRUCTURES; ++k) {
+            values[2 + 2*k] = stats.entries[k];
+            values[3 + 2*k] = stats.bytes[k];
+        }
+        values += row_size;
+    }
+    socket_server->send(stats_reply);
+}
+
 void search(vector<int> &writer_subset, uint8_t *search_query) {
     auto start = clock_start();
     size_t temp;
 
 #ifdef SEARCH_EFFICIENCY
-    PEKS_AggKey cp[RECURSIVE_LEVEL];
-    for(int k = 0; k < RECURSIVE_LEVEL; ++k) {
+    PEKS_AggKey cp[MAX_RECURSIVE_LEVEL];
+    for(int k = 0; k < partition_params.recursive_level; ++k) {
         // cout << "Parsing Partition Token Level: " << k << endl;
         mpz_init(cp[k].k1);
         memcpy(&temp, search_query, sizeof(size_t));
@@ -364,9 +637,11 @@ void search(vector<int> &writer_subset, uint8_t *search_query) {
                 }
                 cout << "Looking up on the database of writer " << (writer_id+1) << "..." << endl; 
                 mtx.unlock();
+
+                writer_mtx[writer_id].lock();
 #ifdef SEARCH_EFFICIENCY
                 paddr = "";
-                for(int l = 0; l < RECURSIVE_LEVEL; ++l) {
+                for(int l = 0; l < partition_params.recursive_level; ++l) {
                     found = false; 
                     for(PEKS_Token &eptkn: PTkn[writer_id][paddr]) {
                         bool r = HICKAE_Decrypt(writer_subset, writer_id, cp[l], eptkn, (unsigned char*)m);
@@ -451,12 +726,8 @@ void search(vector<int> &writer_subset, uint8_t *search_query) {
 
                         memcpy(search_token, m + 5, 32);
 
-                        // Then clear outdated search tokens to prevent augmenting search index size
-                        for(int match: matches) {
-                            if(match != latest_match) {
-                                WTkn[writer_id][paddr].erase(WTkn[writer_id][paddr].begin() + match);
-                            }
-                        }
+                        // Outdated search tokens are removed later by the compactor
+                        record_stale_candidates(writer_id, paddr, matches, latest_match);
                     }
                 }
 #else 
@@ -493,12 +764,8 @@ void search(vector<int> &writer_subset, uint8_t *search_query) {
                         HICKAE_Decrypt(writer_subset, writer_id, cw, WTkn[writer_id][paddr][latest_match], (unsigned char*)m);
                         memcpy(search_token, m + 5, 32);
 
-                        // Then clear outdated search tokens to prevent augmenting search index size
-                        for(int match: matches) {
-                            if(match != latest_match) {
-                                WTkn[writer_id][paddr].erase(WTkn[writer_id][paddr].begin() + match);
-                            }
-                        }
+                        // Outdated search tokens are removed later by the compactor
+                        record_stale_candidates(writer_id, paddr, matches, latest_match);
                     }
                 }
 #endif 
@@ -541,6 +808,7 @@ void search(vector<int> &writer_subset, uint8_t *search_query) {
                     output[writer_id][0] = 0; 
                     // cout << "no matched results." << endl;
                 }
+                writer_mtx[writer_id].unlock();
             }
         }));
     }
@@ -559,8 +827,9 @@ void search(vector<int> &writer_subset, uint8_t *search_query) {
         int per_thread;
         string paddr = "";
         
+        writer_mtx[writer_id].lock();
 #ifdef SEARCH_EFFICIENCY
-        for(int l = 0; l < RECURSIVE_LEVEL; ++l) {
+        for(int l = 0; l < partition_params.recursive_level; ++l) {
             found = false; 
             if(PTkn[writer_id][paddr].size() < MAX_THREADS_SEARCH) {
                 per_thread = 1;
@@ -723,14 +992,9 @@ void search(vector<int> &writer_subset, uint8_t *search_query) {
                 HICKAE_Decrypt(writer_subset, writer_id, cw, WTkn[writer_id][paddr][latest_match], (unsigned char*)m);
                 memcpy(search_token, m + 5, 32);
 
-                // Then clear outdated search tokens to prevent augmenting search index size
-                for(int t = 0; t < MAX_THREADS_SEARCH; ++t) {
-                    for(int i = 0; i < matches[t].size(); ++i) {
-                        if(matches[t][i] != latest_match) {
-                            WTkn[writer_id][paddr].erase(WTkn[writer_id][paddr].begin() + matches[t][i]);
-                        }
-                    }
-                }
+                // Outdated search tokens are removed later by the compactor
+                for(int t = 0; t < MAX_THREADS_SEARCH; ++t) 
+                    record_stale_candidates(writer_id, paddr, matches[t], latest_match);
             }
         }
 
@@ -796,6 +1060,7 @@ void search(vector<int> &writer_subset, uint8_t *search_query) {
             output[writer_id][0] = 0; 
             // cout << "no matched results." << endl;
         }
+        writer_mtx[writer_id].unlock();
     }
 #endif 
     int total_matches = 0;
@@ -820,7 +1085,9 @@ void search(vector<int> &writer_subset, uint8_t *search_query) {
 
     socket_server->send(search_output);
 
-    cout << "Server search latency: " << time_from(start) << endl;
+    last_query = 'S';
+    last_latency = time_from(start);
+    cout << "Server search latency: " << last_latency << endl;
 }
 
 void update(uint8_t *update_query) {
@@ -835,6 +1102,7 @@ void update(uint8_t *update_query) {
     update_query += 4;
 
     // cout << "Writer ID: " << writer_id << ", #Updates: " << num_updates << endl;
+    writer_mtx[writer_id].lock();
 #ifdef WRITER_EFFICIENCY
     size_t n;
     memcpy(&n, update_query, sizeof(size_t));
@@ -867,7 +1135,7 @@ void update(uint8_t *update_query) {
 /*
 #ifdef SEARCH_EFFICIENCY
             bool exist = false;
-            for(int k = 1; k < RECURSIVE_LEVEL; ++k) {
+            for(int k = 1; k < partition_params.recursive_level; ++k) {
                 if(!exist) {
                     PEKS_Token eptkn;
                     element_init_G2(eptkn.c1, pairing);
@@ -876,11 +1144,11 @@ void update(uint8_t *update_query) {
                     // eptkn.c4 = new unsigned char[37];
                     
                     element_from_bytes(eptkn.c1, update_query);
-                    update_query += 168;
+                    update_query += g2_size;
                     element_from_bytes(eptkn.c2, update_query);
-                    update_query += 168;
+                    update_query += g2_size;
                     element_from_bytes(eptkn.c3, update_query);
-                    update_query += 168;
+                    update_query += g2_size;
                     memcpy(eptkn.c4, update_query, 37);
                     update_query += 37;
                     
@@ -893,7 +1161,7 @@ void update(uint8_t *update_query) {
                     PTkn[writer_id][paddr].push_back(eptkn);
                 }
                 else {
-                    update_query += 561;
+                    update_query += 20 + peks_token_size;
                 }
             }
             
@@ -905,21 +1173,21 @@ void update(uint8_t *update_query) {
                 // eptkn.c4 = new unsigned char[37];
                 
                 element_from_bytes(eptkn.c1, update_query);
-                update_query += 168;
+                update_query += g2_size;
                 element_from_bytes(eptkn.c2, update_query);
-                update_query += 168;
+                update_query += g2_size;
                 element_from_bytes(eptkn.c3, update_query);
-                update_query += 168;
+                update_query += g2_size;
                 memcpy(eptkn.c4, update_query, 37);
                 update_query += 37;
 
                 PTkn[writer_id][""].push_back(eptkn);
             }
             else {
-                update_query += 541;
+                update_query += peks_token_size;
             }
         } else {
-            update_query += 561 * RECURSIVE_LEVEL - 20;
+            update_query += (20 + peks_token_size) * partition_params.recursive_level - 20;
         }
 #else 
 */
@@ -930,18 +1198,18 @@ void update(uint8_t *update_query) {
             // eptkn.c4 = new unsigned char[37];
             
             element_from_bytes(eptkn.c1, update_query);
-            update_query += 168;
+            update_query += g2_size;
             element_from_bytes(eptkn.c2, update_query);
-            update_query += 168;
+            update_query += g2_size;
             element_from_bytes(eptkn.c3, update_query);
-            update_query += 168;
+            update_query += g2_size;
             memcpy(eptkn.c4, update_query, 37);
             update_query += 37;
 
             PTkn[writer_id][paddr].push_back(eptkn);
             // cout << i << ". A new partition tag corresponding to " << paddr << " is added." << endl; 
         } else {
-            update_query += 541;
+            update_query += peks_token_size;
         }
 // #endif
 
@@ -956,11 +1224,11 @@ void update(uint8_t *update_query) {
             element_init_G2(ewtkn.data[p].c3, pairing);
             
             element_from_bytes(ewtkn.data[p].c1, update_query);
-            update_query += 168;
+            update_query += g2_size;
             element_from_bytes(ewtkn.data[p].c2, update_query);
-            update_query += 168;
+            update_query += g2_size;
             element_from_bytes(ewtkn.data[p].c3, update_query);
-            update_query += 168;
+            update_query += g2_size;
             memcpy(ewtkn.data[p].c4, update_query, 37);
             update_query += 37;
         }
@@ -973,24 +1241,27 @@ void update(uint8_t *update_query) {
         // ewtkn.c4 = new unsigned char[37];
 
         element_from_bytes(ewtkn.c1, update_query);
-        update_query += 168;
+        update_query += g2_size;
         element_from_bytes(ewtkn.c2, update_query);
-        update_query += 168;
+        update_query += g2_size;
         element_from_bytes(ewtkn.c3, update_query);
-        update_query += 168;
+        update_query += g2_size;
         memcpy(ewtkn.c4, update_query, 37);
         update_query += 37;
 
         WTkn[writer_id][paddr].push_back(ewtkn);
 #endif 
     }
+    writer_mtx[writer_id].unlock();
     
     char *ack_msg = "ACK";
     zmq::message_t ack(strlen(ack_msg) + 1);
     memcpy(ack.data(), ack_msg, strlen(ack_msg) + 1);
     socket_server->send(ack);
     
-    cout << "Server update latency: " << time_from(start) << endl;
+    last_query = 'U';
+    last_latency = time_from(start);
+    cout << "Server update latency: " << last_latency << endl;
 }
 
 void rebuild(uint8_t *rebuild_query) {
@@ -1007,10 +1278,12 @@ void rebuild(uint8_t *rebuild_query) {
 
     // cout << "Num partitions: " << num_partitions << endl;
 
+    writer_mtx[writer_id].lock();
     for(int i = 0; i < num_partitions; ++i) {
         string paddr;
         paddr.assign(rebuild_query, rebuild_query + 20);
         WTkn[writer_id][paddr].clear();
+        stale_candidates[writer_id].erase(paddr);
 
         rebuild_query += 20;
         int partition_size;
@@ -1030,11 +1303,11 @@ void rebuild(uint8_t *rebuild_query) {
             // ewtkn.c4 = new unsigned char[37];
 
             element_from_bytes(ewtkn.c1, rebuild_query);
-            rebuild_query += 168;
+            rebuild_query += g2_size;
             element_from_bytes(ewtkn.c2, rebuild_query);
-            rebuild_query += 168;
+            rebuild_query += g2_size;
             element_from_bytes(ewtkn.c3, rebuild_query);
-            rebuild_query += 168;
+            rebuild_query += g2_size;
             memcpy(ewtkn.c4, rebuild_query, 37);
             rebuild_query += 37;
 
@@ -1042,8 +1315,11 @@ void rebuild(uint8_t *rebuild_query) {
 #endif 
         }
     }
+    writer_mtx[writer_id].unlock();
 
-    cout << "Server rebuild latency: " << time_from(start) << endl;
+    last_query = 'R';
+    last_latency = time_from(start);
+    cout << "Server rebuild latency: " << last_latency << endl;
     
     char *ack_msg = "ACK";
     zmq::message_t ack(strlen(ack_msg) + 1);
@@ -1065,6 +1341,9 @@ int main(int argc, char *argv[]) {
     // Start epoch number
     epoch = 1; 
 
+    last_query = 0;
+    last_latency = 0;
+
 #ifdef WRITER_EFFICIENCY
     encoded_epoch = "";
     
@@ -1082,9 +1361,25 @@ int main(int argc, char *argv[]) {
     if(argc > 1) {
         num_writers = atoi(argv[1]);
     }
+
+    if(argc > 2) {
+        if(!load_config(argv[2])) {
+            cout << "Cannot open config file " << argv[2] << endl;
+            return 1;
+        }
+    }
+
+    if(!check_partition_params(partition_params)) {
+        cout << "Invalid partition parameters!!!" << endl;
+        return 1;
+    }
+    cout << "Partition tree: " << partition_params.recursive_level << " levels, " 
+         << partition_params.num_partitions << " partitions, partition size " << partition_params.partition_size << endl;
     
     // Fast Initialization: HICKAE parameters
     HICKAE_Setup(num_writers);
+    cout << "Curve: " << curve_name << " (" << scalar_bits << "-bit group order, G1/G2/GT elements of " 
+         << g1_size << "/" << g2_size << "/" << gt_size << " bytes)" << endl;
     
     HICKAE_KeyGen();
 
@@ -1095,6 +1390,10 @@ int main(int argc, char *argv[]) {
     // Initialize writers' databases
     init(num_writers);
 
+    processing_query = false;
+    thread compactor(compact_search_indices);
+    compactor.detach();
+
     vector<int> writer_subset;
     int writer_subset_size;
 
@@ -1102,14 +1401,38 @@ int main(int argc, char *argv[]) {
     while(1) {
         zmq::message_t query;
         socket_server->recv(&query);
+        processing_query = true;
         uint8_t *query_data = (uint8_t*)query.data();
         zmq::message_t reply(4);
 
         switch(query_data[0]) {
-            // Get #writers
-            case 'G':
-                memcpy(reply.data(), &num_writers, 4);
-                socket_server->send(reply);
+            // Get #writers, the partition tree parameters and the curve name
+            case 'G': {
+                // The curve name and the data directory follow the parameters, separated by '\0'
+                zmq::message_t params_reply(4 * sizeof(int) + curve_name.length() + 1 + data_dir.length());
+                int *params_reply_data = (int*)params_reply.data();
+                params_reply_data[0] = num_writers;
+                params_reply_data[1] = partition_params.recursive_level;
+                params_reply_data[2] = partition_params.partition_size;
+                params_reply_data[3] = partition_params.num_partitions;
+                char *names = (char*)(params_reply_data + 4);
+                memcpy(names, curve_name.c_str(), curve_name.length() + 1);
+                memcpy(names + curve_name.length() + 1, data_dir.c_str(), data_dir.length());
+                socket_server->send(params_reply);
+                break;
+            }
+            // Get the type and server-side latency of the last query
+            case 'L': {
+                zmq::message_t latency_reply(1 + sizeof(double));
+                uint8_t *latency_reply_data = (uint8_t*)latency_reply.data();
+                latency_reply_data[0] = last_query;
+                memcpy(latency_reply_data + 1, &last_latency, sizeof(double));
+                socket_server->send(latency_reply);
+                break;
+            }
+            // Get the entries and memory of the search indices per writer
+            case 'M':
+                send_stats();
                 break;
             // Search
             case 'S':  
@@ -1119,7 +1442,7 @@ int main(int argc, char *argv[]) {
                     cout << "Invalid search query!!! There are no more than " << num_writers << " writers." << endl;
                     memcpy(reply.data(), "ERR", 4);
                     socket_server->send(reply);
-                    continue;
+                    break;
                 }
                 writer_subset.clear();
                 for(int writer_id = 0; writer_id < writer_subset_size; ++writer_id) 
@@ -1139,6 +1462,7 @@ int main(int argc, char *argv[]) {
                 cout << "Wrong query syntax!!!" << endl;
                 break;
         }
+        processing_query = false;
     }
     return 0;
 }
@@ -7,18 +7,12 @@
 #include <vector>
 #include <chrono>
 #include "hickae.hpp"
+#include "batch_hash.h"
 
 using namespace std;
 
-// 计时函数
-auto clock_start() {
-    return chrono::high_resolution_clock::now();
-}
-
-double time_from(chrono::high_resolution_clock::time_point start) {
-    auto end = chrono::high_resolution_clock::now();
-    return chrono::duration_cast<chrono::microseconds>(end - start).count();
-}
+// 计时函数 clock_start() / time_from() 由 emp-tool 提供
+PRG prg;
 
 int main(int argc, char* argv[]) {
     int num_writers = 5;  // 默认 5 个写者
@@ -30,27 +24,32 @@ int main(int argc, char* argv[]) {
     if (argc > 2) {
         num_iterations = atoi(argv[2]);
     }
+    if (argc > 3) {
+        curve_name = argv[3];  // ../param 中的曲线参数文件名，如 d159
+    }
     
     cout << "========================================" << endl;
     cout << "  HICKAE 模块化性能测试" << endl;
     cout << "========================================" << endl;
     cout << "写者数量: " << num_writers << endl;
     cout << "测试迭代: " << num_iterations << " 次" << endl;
+    cout << "曲线: " << curve_name << endl;
     cout << "========================================" << endl << endl;
     
     // ========================================
     // 1. 测试 HICKAE_Setup
     // ========================================
-    cout << "[1/5] 测试 HICKAE_Setup..." << endl;
+    cout << "[1/9] 测试 HICKAE_Setup..." << endl;
     auto start = clock_start();
     HICKAE_Setup(num_writers);
     double setup_time = time_from(start);
-    cout << "  Setup 时间: " << setup_time / 1000.0 << " ms" << endl << endl;
+    cout << "  Setup 时间: " << setup_time / 1000.0 << " ms" << endl;
+    cout << "  群阶: " << scalar_bits << " 位, G1/G2/GT 元素: " << g1_size << "/" << g2_size << "/" << gt_size << " 字节" << endl << endl;
     
     // ========================================
     // 2. 测试 HICKAE_KeyGen
     // ========================================
-    cout << "[2/5] 测试 HICKAE_KeyGen..." << endl;
+    cout << "[2/9] 测试 HICKAE_KeyGen..." << endl;
     start = clock_start();
     HICKAE_KeyGen();
     double keygen_time = time_from(start);
@@ -59,7 +58,7 @@ int main(int argc, char* argv[]) {
     // ========================================
     // 3. 测试 HICKAE_IGen
     // ========================================
-    cout << "[3/5] 测试 HICKAE_IGen..." << endl;
+    cout << "[3/9] 测试 HICKAE_IGen..." << endl;
     start = clock_start();
     HICKAE_IGen(num_writers);
     double igen_time = time_from(start);
@@ -68,7 +67,7 @@ int main(int argc, char* argv[]) {
     // ========================================
     // 4. 测试 HICKAE_Prep
     // ========================================
-    cout << "[4/5] 测试 HICKAE_Prep..." << endl;
+    cout << "[4/9] 测试 HICKAE_Prep..." << endl;
     start = clock_start();
     HICKAE_Prep(num_writers);
     double prep_time = time_from(start);
@@ -77,7 +76,7 @@ int main(int argc, char* argv[]) {
     // ========================================
     // 5. 测试 HICKAE_Encrypt (批量)
     // ========================================
-    cout << "[5/5] 测试 HICKAE_Encrypt (批量 " << num_iterations << " 次)..." << endl;
+    cout << "[5/9] 测试 HICKAE_Encrypt (批量 " << num_iterations << " 次)..." << endl;
     
     double total_encrypt_time = 0;
     for (int i = 0; i < num_iterations; i++) {
@@ -98,19 +97,21 @@ int main(int argc, char* argv[]) {
     // ========================================
     // 6. 测试 HICKAE_Extract (批量)
     // ========================================
-    cout << "[6/6] 测试 HICKAE_Extract (批量 " << num_iterations << " 次)..." << endl;
+    cout << "[6/9] 测试 HICKAE_Extract (批量 " << num_iterations << " 次)..." << endl;
     
     vector<int> writer_subset;
     for (int i = 0; i < num_writers; i++) {
         writer_subset.push_back(i);
     }
     
+    // 每次迭代都重新聚合写者子集，与一次查询中的第一个密钥相同
     double total_extract_time = 0;
     for (int i = 0; i < num_iterations; i++) {
         PEKS_AggKey agg_key;
         char keyword[32];
         sprintf(keyword, "keyword_%d", i);
         
+        agg_valid = false;
         start = clock_start();
         HICKAE_Extract(writer_subset, keyword, &agg_key);
         total_extract_time += time_from(start);
@@ -121,6 +122,126 @@ int main(int argc, char* argv[]) {
     cout << "  平均时间: " << avg_extract_time << " μs/次" << endl;
     cout << "  吞吐量: " << (1000000.0 / avg_extract_time) << " 次/秒" << endl << endl;
     
+    // ========================================
+    // 7. 测试 HICKAE_Decrypt (批量，与服务器搜索时的匹配相同)
+    // ========================================
+    cout << "[7/9] 测试 HICKAE_Decrypt (批量 " << num_iterations << " 次)..." << endl;
+    
+    PEKS_Token search_token;
+    PEKS_AggKey search_key;
+    unsigned char msg[32];
+    unsigned char decrypted[37];
+    memset(msg, 0, sizeof(msg));
+    HICKAE_Encrypt(0, (char*)"keyword_test", msg, &search_token);
+    HICKAE_Extract(writer_subset, (char*)"keyword_test", &search_key);
+    
+    int wid = 0;
+    bool matched = true;
+    double total_decrypt_time = 0;
+    for (int i = 0; i < num_iterations; i++) {
+        start = clock_start();
+        matched &= HICKAE_Decrypt(writer_subset, wid, search_key, search_token, decrypted);
+        total_decrypt_time += time_from(start);
+    }
+    if (!matched) {
+        cout << "  ✗ 解密失败" << endl;
+        return 1;
+    }
+    
+    double avg_decrypt_time = total_decrypt_time / num_iterations;
+    cout << "  总时间: " << total_decrypt_time / 1000.0 << " ms" << endl;
+    cout << "  平均时间: " << avg_decrypt_time << " μs/次" << endl;
+    cout << "  吞吐量: " << (1000000.0 / avg_decrypt_time) << " 次/秒" << endl << endl;
+    
+    // ========================================
+    // 8. 测试搜索令牌生成（分区密钥 + epoch 密钥，与客户端相同）
+    // ========================================
+    string encoded_epoch = "";
+    for (int i = 1; i <= 10; i++) {
+        encoded_epoch = encode_epoch(encoded_epoch);
+    }
+    vector<string> children_epochs;
+    string padded_encoded_epoch = encoded_epoch;
+    padded_encoded_epoch.insert(padded_encoded_epoch.end(), DEPTH_EPOCH_TREE - padded_encoded_epoch.size(), '0');
+    children_epochs.push_back(padded_encoded_epoch);
+    for (int i = encoded_epoch.length() - 1; i >= 0; --i) {
+        string temp = encoded_epoch.substr(0, i);
+        temp.insert(temp.end(), DEPTH_EPOCH_TREE - temp.size(), '0');
+        children_epochs.push_back(temp);
+    }
+    int num_keys = partition_params.recursive_level + children_epochs.size();
+    
+    cout << "[8/9] 测试搜索令牌生成 (" << partition_params.recursive_level << " 个分区密钥 + " 
+         << children_epochs.size() << " 个 epoch 密钥, 批量 " << num_iterations << " 次)..." << endl;
+    
+    double total_token_time = 0;
+    for (int i = 0; i < num_iterations; i++) {
+        PEKS_AggKey cp[MAX_RECURSIVE_LEVEL];
+        PEKS_AggKey *cw = new PEKS_AggKey[children_epochs.size()];
+        string *id = new string[children_epochs.size()];
+        string keyword = "keyword_" + to_string(i);
+        for (int k = 0; k < children_epochs.size(); k++) {
+            id[k] = keyword + children_epochs[k];
+        }
+        
+        agg_valid = false;
+        start = clock_start();
+        for (int l = 0; l < partition_params.recursive_level; l++) {
+            HICKAE_Extract(writer_subset, (char*)(to_string(l) + keyword).c_str(), &cp[l]);
+        }
+        HICKAE_Extract(writer_subset, id, cw, children_epochs.size());
+        total_token_time += time_from(start);
+        
+        delete [] cw;
+        delete [] id;
+    }
+    
+    double avg_token_time = total_token_time / num_iterations;
+    cout << "  平均时间: " << avg_token_time << " μs/次" << endl;
+    cout << "  平均每个密钥: " << avg_token_time / num_keys << " μs" << endl << endl;
+    
+    // ========================================
+    // 9. 测试 DSSE 令牌生成（PRF + SHA-512，逐个 vs 批量）
+    // ========================================
+    int num_postings = num_iterations * 100;
+    cout << "[9/9] 测试 DSSE 令牌生成 (" << num_postings << " 个文档)..." << endl;
+    
+    unsigned char writer_secret_key[32];
+    prg.random_block((block*)writer_secret_key, 2);
+    vector<string> seeds(num_postings);
+    for (int i = 0; i < num_postings; i++) {
+        seeds[i] = "keyword_" + to_string(i % 100) + to_string(i / 100);
+    }
+    
+    vector<unsigned char> tokens(num_postings * PRF_OUTPUT_SIZE);
+    vector<unsigned char> digests(num_postings * SHA512_DIGEST_LENGTH);
+    start = clock_start();
+    for (int i = 0; i < num_postings; i++) {
+        unsigned char token[64];
+        SHA512_CTX sha512;
+        prf((unsigned char*)seeds[i].c_str(), seeds[i].length(), writer_secret_key, token);
+        SHA512_Init(&sha512);
+        SHA512_Update(&sha512, token, 16);
+        SHA512_Final(&digests[i * SHA512_DIGEST_LENGTH], &sha512);
+    }
+    double avg_posting_time = time_from(start) / num_postings;
+    
+    vector<unsigned char> batch_digests(num_postings * SHA512_DIGEST_LENGTH);
+    start = clock_start();
+    PRF_Key prf_key;
+    prf_init(&prf_key, writer_secret_key);
+    prf_batch(prf_key, seeds.data(), num_postings, tokens.data());
+    sha512_16_batch(tokens.data(), num_postings, batch_digests.data());
+    double avg_batch_posting_time = time_from(start) / num_postings;
+    
+    if (digests != batch_digests) {
+        cout << "  ✗ 批量令牌与逐个计算的结果不一致" << endl;
+        return 1;
+    }
+    cout << "  逐个: " << avg_posting_time << " μs/个 (" << (uint64_t)(1e6 / avg_posting_time) << " 个/秒)" << endl;
+    cout << "  批量: " << avg_batch_posting_time << " μs/个 (" << (uint64_t)(1e6 / avg_batch_posting_time) << " 个/秒)" << endl;
+    cout << "  ✓ 结果一致" << endl << endl;
+    
     // ========================================
     // 总结
     // ========================================
@@ -133,6 +254,15 @@ int main(int argc, char* argv[]) {
     cout << "Prep:    " << prep_time / 1000.0 << " ms" << endl;
     cout << "Encrypt: " << avg_encrypt_time << " μs/次" << endl;
     cout << "Extract: " << avg_extract_time << " μs/次" << endl;
+    cout << "Decrypt: " << avg_decrypt_time << " μs/次" << endl;
+    cout << "SearchToken: " << avg_token_time << " μs/次" << endl;
+    cout << "PostingToken: " << avg_posting_time << " μs/个" << endl;
+    cout << "PostingTokenBatch: " << avg_batch_posting_time << " μs/个" << endl;
+    cout << "Curve: " << curve_name << endl;
+    cout << "GroupOrderBits: " << scalar_bits << endl;
+    cout << "GTBits: " << gt_size * 8 << endl;
+    cout << "PEKSToken: " << peks_token_size << " 字节" << endl;
+    cout << "AggKey: " << agg_key_size << " 字节" << endl;
     cout << "========================================" << endl;
     
     return 0;
@@ -36,6 +36,27 @@ struct HICKAE_PubKey {
     element_t theta_G2;
 };
 
+// Partition tree parameters in use (SEARCH_EFFICIENCY)
+struct Partition_Params {
+    int recursive_level;
+    int partition_size;
+    int num_partitions;
+};
+
+Partition_Params partition_params = {RECURSIVE_LEVEL, PARTITION_SIZE, NUM_PARTITIONS};
+
+// Every level of the partition tree must have at least one partition
+bool check_partition_params(const Partition_Params &params) {
+    if(params.recursive_level < 1 || params.recursive_level > MAX_RECURSIVE_LEVEL) 
+        return false;
+    if(params.partition_size < 1 || params.num_partitions < 1) 
+        return false;
+    int num_partitions = params.num_partitions;
+    for(int k = 1; k < params.recursive_level; ++k) 
+        num_partitions /= params.partition_size;
+    return num_partitions >= 1;
+}
+
 #ifdef WRITER_EFFICIENCY
 #define DEPTH_EPOCH_TREE (63)
 struct Encrypted_Search_Token {
@@ -45,8 +66,6 @@ struct Encrypted_Search_Token {
 
 
 #ifdef WRITER_EFFICIENCY
-const int UPDATE_TOKEN_SIZE = 618;
-
 string encode_epoch(string prev_encoded_e) {
     if(prev_encoded_e.length() == DEPTH_EPOCH_TREE) {
         for(int i = DEPTH_EPOCH_TREE - 1; i >= 0; --i) {
@@ -57,6 +76,4 @@ string encode_epoch(string prev_encoded_e) {
     }
     return prev_encoded_e + "1";
 }
-#else 
-const int UPDATE_TOKEN_SIZE = 1159;
 #endif 
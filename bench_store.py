@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Hermes 测试结果历史库
+将每次测试的 CSV 结果连同 git 提交、config.hpp 中的配置常量和原始样本
+一起存入 SQLite，并通过 Mann–Whitney U 检验比较多次运行，自动标记性能回退。
+
+用法:
+    python3 bench_store.py ingest <csv> [<csv> ...] [--note 说明]
+    python3 bench_store.py list [--kind search_samples]
+    python3 bench_store.py compare [--candidate 12] [--baseline 9,10,11] [--runs 3]
+    python3 bench_store.py show <run_id>
+
+其他脚本可以用 run:<id> 或 run:latest 代替 CSV 文件名，直接从历史库读取结果
+（历史库路径可用环境变量 HERMES_BENCH_STORE 指定）。
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parent
+DEFAULT_STORE = Path(os.environ.get('HERMES_BENCH_STORE', ROOT_DIR / 'benchmark_results' / 'history.db'))
+CONFIG_FILE = ROOT_DIR / 'Hermes' / 'config.hpp'
+
+# 作为横轴的列（按优先级）
+X_COLUMNS = ['Writers', 'TargetRate(req/s)', 'Subset']
+# 作为指标名前缀的分类列，如 Kind=Search 的 P99Latency(ms) 存为 Search:P99Latency(ms)
+CATEGORY_COLUMNS = ['Command', 'Kind', 'Label', 'Curve']
+CATEGORY_SEPARATOR = ':'
+# 不作为指标存储的列
+IGNORED_COLUMNS = {'Seq', 'Run', 'Round', 'Argument', 'PayloadBytes', 'CaptureSHA256', 'Second'}
+# 与 StdDev 列的对应关系（与现有 CSV 保持一致）
+STDDEV_COLUMNS = {
+    'ClientQueryTime(ms)': 'ClientStdDev',
+    'EndToEndLatency(ms)': 'EndToEndStdDev',
+    'ServerLatency(ms)': 'ServerStdDev',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at  TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    x_name      TEXT NOT NULL,
+    categories  TEXT NOT NULL,
+    git_commit  TEXT,
+    git_dirty   INTEGER,
+    recursive_level     INTEGER,
+    partition_size      INTEGER,
+    num_partitions      INTEGER,
+    max_threads_init    INTEGER,
+    max_threads_search  INTEGER,
+    max_threads_update  INTEGER,
+    max_threads_rebuild INTEGER,
+    config      TEXT,
+    note        TEXT
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id  INTEGER NOT NULL REFERENCES runs(id),
+    metric  TEXT NOT NULL,
+    x       REAL NOT NULL,
+    value   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_run ON samples(run_id, metric, x);
+"""
+
+
+def connect(store=DEFAULT_STORE):
+    store = Path(store)
+    store.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(store))
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def read_config(path=CONFIG_FILE):
+    """读取 config.hpp 中的整型常量"""
+    config = {}
+    if Path(path).exists():
+        for name, value in re.findall(r'const\s+int\s+(\w+)\s*=\s*(-?\d+)\s*;', Path(path).read_text()):
+            config[name] = int(value)
+    return config
+
+
+def read_server_config(path):
+    """读取服务器运行时配置文件（KEY=VALUE），其中的参数覆盖 config.hpp 中的默认值"""
+    config = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            config[key.strip()] = int(value) if value.strip().lstrip('-').isdigit() else value.strip()
+    return config
+
+
+def git_state():
+    """返回 (提交哈希, 工作区是否有未提交修改)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD', '--', 'Hermes'],
+                               cwd=ROOT_DIR).returncode != 0
+        return commit, int(dirty)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def run_kind(csv_file):
+    """由文件名推断结果类型，如 search_samples_20251112_220109.csv -> search_samples"""
+    return re.sub(r'_\d{8}_\d{6}$', '', Path(csv_file).stem)
+
+
+def to_samples(df):
+    """将宽格式 CSV 转换为 (指标, 横轴值, 数值) 的长格式样本"""
+    x_name = next((c for c in X_COLUMNS if c in df.columns), None)
+    if x_name is None:
+        raise ValueError(f"缺少横轴列（{', '.join(X_COLUMNS)}）")
+
+    categories = [c for c in CATEGORY_COLUMNS if c in df.columns]
+    df = df.copy()
+    metrics = []
+    for c in df.columns:
+        if c == x_name or c in categories or c in IGNORED_COLUMNS:
+            continue
+        # 部分汇总列只在某些行有值（如 loadgen 的 Throughput），其余为空字符串
+        df[c] = pd.to_numeric(df[c], errors='coerce')
+        if df[c].notna().any():
+            metrics.append(c)
+
+    long = df.melt(id_vars=[x_name] + categories, value_vars=metrics,
+                   var_name='metric', value_name='value').dropna(subset=['value'])
+    for c in reversed(categories):
+        long['metric'] = long[c].astype(str) + CATEGORY_SEPARATOR + long['metric']
+    long = long.rename(columns={x_name: 'x'})
+    return x_name, categories, long[['metric', 'x', 'value']]
+
+
+def ingest(conn, csv_file, note=None, server_config=None):
+    """导入一个结果 CSV，返回新的运行 ID"""
+    df = pd.read_csv(csv_file)
+    x_name, categories, samples = to_samples(df)
+    config = read_config()
+    if server_config:
+        config.update(read_server_config(server_config))
+    commit, dirty = git_state()
+
+    cur = conn.execute(
+        """INSERT INTO runs (created_at, kind, source, x_name, categories, git_commit, git_dirty,
+                             recursive_level, partition_size, num_partitions,
+                             max_threads_init, max_threads_search, max_threads_update,
+                             max_threads_rebuild, config, note)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (datetime.now().isoformat(timespec='seconds'), run_kind(csv_file), str(csv_file), x_name,
+         ','.join(categories), commit, dirty, config.get('RECURSIVE_LEVEL'), config.get('PARTITION_SIZE'),
+         config.get('NUM_PARTITIONS'), config.get('MAX_THREADS_INIT'),
+         config.get('MAX_THREADS_SEARCH'), config.get('MAX_THREADS_UPDATE'),
+         config.get('MAX_THREADS_REBUILD'), json.dumps(config), note))
+    run_id = cur.lastrowid
+    conn.executemany("INSERT INTO samples (run_id, metric, x, value) VALUES (?, ?, ?, ?)",
+                     [(run_id, m, float(x), float(v)) for m, x, v in samples.itertuples(index=False)])
+    conn.commit()
+    return run_id
+
+
+def latest_run(conn, kind=None):
+    query = "SELECT id FROM runs" + (" WHERE kind = ?" if kind else "") + " ORDER BY id DESC LIMIT 1"
+    row = conn.execute(query, (kind,) if kind else ()).fetchone()
+    if row is None:
+        raise ValueError("历史库中没有符合条件的运行记录")
+    return row[0]
+
+
+def load_samples(conn, run_ids):
+    placeholders = ','.join('?' * len(run_ids))
+    return pd.read_sql_query(
+        f"SELECT run_id, metric, x, value FROM samples WHERE run_id IN ({placeholders}) ORDER BY rowid",
+        conn, params=list(run_ids))
+
+
+def load_frame(run_id, store=DEFAULT_STORE):
+    """
+    以宽格式读取一次运行的结果：每个（横轴值, 分类）一行，每个指标一列（样本均值），
+    并补充 ClientStdDev / EndToEndStdDev / ServerStdDev 等标准差列，
+    与测试脚本生成的 CSV 列名一致。
+    """
+    conn = connect(store)
+    try:
+        if run_id == 'latest':
+            run_id = latest_run(conn)
+        row = conn.execute("SELECT x_name, categories FROM runs WHERE id = ?", (int(run_id),)).fetchone()
+        if row is None:
+            raise ValueError(f"历史库中没有运行 {run_id}")
+        x_name, categories = row[0], [c for c in row[1].split(',') if c]
+        samples = load_samples(conn, [int(run_id)])
+    finally:
+        conn.close()
+
+    if categories:
+        parts = samples['metric'].str.split(CATEGORY_SEPARATOR, n=len(categories), expand=True)
+        for i, c in enumerate(categories):
+            samples[c] = parts[i]
+        samples['metric'] = parts[len(categories)]
+
+    keys = ['x'] + categories
+    grouped = samples.groupby(keys + ['metric'], sort=False)['value']
+    stats = pd.DataFrame({'mean': grouped.mean(), 'std': grouped.std(ddof=0)})
+    df = stats['mean'].unstack('metric')[list(dict.fromkeys(samples['metric']))]
+    for metric, std_column in STDDEV_COLUMNS.items():
+        if metric in df.columns and std_column not in df.columns:
+            df[std_column] = stats['std'].unstack('metric')[metric].fillna(0.0)
+    df = df.reset_index().rename(columns={'x': x_name}).rename_axis(columns=None)
+    df = df.sort_values(x_name, kind='stable').reset_index(drop=True)
+    if x_name == 'Writers':
+        df['Writers'] = df['Writers'].astype(int)
+    return df
+
+
+def read_results(spec):
+    """读取测试结果：CSV 文件名，或历史库中的 run:<id> / run:latest"""
+    if str(spec).startswith('run:'):
+        return load_frame(str(spec)[4:])
+    return pd.read_csv(spec)
+
+
+@lru_cache(maxsize=None)
+def _exact_u_counts(n1, n2):
+    """无并列时 U 统计量的精确分布（各取值的排列数）"""
+    if n1 == 0 or n2 == 0:
+        return (1,)
+    a = _exact_u_counts(n1 - 1, n2)
+    b = _exact_u_counts(n1, n2 - 1)
+    counts = [0] * (n1 * n2 + 1)
+    for u, c in enumerate(a):
+        counts[u + n2] += c
+    for u, c in enumerate(b):
+        counts[u] += c
+    return tuple(counts)
+
+
+def mann_whitney_u(a, b):
+    """双侧 Mann–Whitney U 检验，返回 (U, p)；小样本且无并列时使用精确分布"""
+    n1, n2 = len(a), len(b)
+    if n1 == 0 or n2 == 0:
+        return float('nan'), float('nan')
+
+    combined = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    ranks = [0.0] * len(combined)
+    tie_term = 0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2.0 + 1
+        t = j - i + 1
+        tie_term += t ** 3 - t
+        i = j + 1
+
+    r1 = sum(r for r, (_, group) in zip(ranks, combined) if group == 0)
+    u1 = r1 - n1 * (n1 + 1) / 2.0
+    u = min(u1, n1 * n2 - u1)
+
+    if tie_term == 0 and n1 + n2 <= 30:
+        counts = _exact_u_counts(n1, n2)
+        p = 2.0 * sum(counts[:int(u) + 1]) / sum(counts)
+        return u1, min(1.0, p)
+
+    n = n1 + n2
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_term / (n * (n - 1))))
+    if sigma == 0:
+        return u1, 1.0
+    z = (abs(u1 - n1 * n2 / 2.0) - 0.5) / sigma
+    return u1, min(1.0, math.erfc(max(z, 0.0) / math.sqrt(2)))
+
+
+def higher_is_better(metric):
+    return 'Throughput' in metric or 'Completed' in metric
+
+
+def compare(conn, baseline_ids, candidate_ids, alpha, threshold):
+    """比较两组运行的每个 (指标, 横轴值)，返回结果表"""
+    baseline = load_samples(conn, baseline_ids)
+    candidate = load_samples(conn, candidate_ids)
+
+    rows = []
+    for (metric, x), cand in candidate.groupby(['metric', 'x'])['value']:
+        if metric.endswith('StdDev'):
+            continue
+        base = baseline[(baseline['metric'] == metric) & (baseline['x'] == x)]['value']
+        if base.empty:
+            continue
+        base_median, cand_median = base.median(), cand.median()
+        change = (cand_median - base_median) / base_median if base_median else float('nan')
+        _, p = mann_whitney_u(list(base), list(cand))
+        worse = change < 0 if higher_is_better(metric) else change > 0
+        significant = p < alpha and abs(change) > threshold
+        rows.append({
+            'Metric': metric, 'X': x, 'BaselineMedian': base_median, 'CandidateMedian': cand_median,
+            'Change(%)': change * 100, 'p': p, 'BaselineSamples': len(base),
+            'CandidateSamples': len(cand),
+            'Status': ('REGRESSION' if worse else 'IMPROVEMENT') if significant else '',
+        })
+    return pd.DataFrame(rows)
+
+
+def parse_ids(text):
+    return [int(i) for i in text.split(',') if i]
+
+
+def cmd_ingest(args):
+    conn = connect(args.store)
+    for csv_file in args.csv:
+        run_id = ingest(conn, csv_file, args.note, args.server_config)
+        print(f"✓ 导入 {csv_file} -> run {run_id}")
+    conn.close()
+
+
+def cmd_list(args):
+    conn = connect(args.store)
+    query = ("SELECT id, created_at, kind, substr(git_commit, 1, 10) AS git_commit, git_dirty, "
+             "recursive_level, partition_size, num_partitions, max_threads_search, note FROM runs")
+    params = ()
+    if args.kind:
+        query += " WHERE kind = ?"
+        params = (args.kind,)
+    print(pd.read_sql_query(query + " ORDER BY id", conn, params=params).to_string(index=False))
+    conn.close()
+
+
+def cmd_show(args):
+    print(load_frame(args.run_id, args.store).to_string(index=False))
+
+
+def cmd_compare(args):
+    conn = connect(args.store)
+    candidate = parse_ids(args.candidate) if args.candidate else [latest_run(conn, args.kind)]
+    kind, = conn.execute("SELECT kind FROM runs WHERE id = ?", (candidate[0],)).fetchone()
+    if args.baseline:
+        baseline = parse_ids(args.baseline)
+    else:
+        baseline = [r[0] for r in conn.execute(
+            "SELECT id FROM runs WHERE kind = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (kind, min(candidate), args.runs))]
+    if not baseline:
+        print(f"没有可用于比较的 {kind} 基线运行")
+        conn.close()
+        return 0
+
+    print(f"基线运行: {baseline}")
+    print(f"候选运行: {candidate}")
+    print(f"显著性水平: {args.alpha}, 变化阈值: {args.threshold * 100:.1f}%")
+    print()
+
+    result = compare(conn, baseline, candidate, args.alpha, args.threshold)
+    conn.close()
+    if result.empty:
+        print("两组运行没有共同的指标")
+        return 0
+
+    pd.set_option('display.width', 200)
+    print(result.to_string(index=False, float_format=lambda v: f'{v:.4g}'))
+    regressions = result[result['Status'] == 'REGRESSION']
+    print()
+    if regressions.empty:
+        print("✓ 未发现性能回退")
+        return 0
+    print(f"✗ 发现 {len(regressions)} 项性能回退")
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hermes 测试结果历史库')
+    parser.add_argument('--store', default=DEFAULT_STORE, help='SQLite 数据库路径')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('ingest', help='导入结果 CSV')
+    p.add_argument('csv', nargs='+')
+    p.add_argument('--note', default=None, help='运行说明')
+    p.add_argument('--server-config', default=None, help='测试时服务器使用的运行时配置文件')
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser('list', help='列出运行记录')
+    p.add_argument('--kind', default=None)
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser('show', help='显示一次运行的汇总结果')
+    p.add_argument('run_id')
+    p.set_defaults(func=cmd_show)
+
+    p = sub.add_parser('compare', help='比较运行并标记性能回退')
+    p.add_argument('--candidate', default=None, help='候选运行 ID（逗号分隔），默认最新一次')
+    p.add_argument('--baseline', default=None, help='基线运行 ID（逗号分隔），默认之前同类型的运行')
+    p.add_argument('--kind', default=None, help='未指定候选运行时，选取该类型的最新一次')
+    p.add_argument('--runs', type=int, default=3, help='默认基线使用的运行次数')
+    p.add_argument('--alpha', type=float, default=0.05, help='显著性水平')
+    p.add_argument('--threshold', type=float, default=0.05, help='相对变化阈值')
+    p.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args) or 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ echo ""
 
 # 配置参数
 WRITERS=(3 5 7 10)  # 测试的写者数量
+MODULE_WRITERS=(25 100 500)  # 模块测试的写者数量（Extract 随写者子集大小的扩展性）
 KEYWORD="database"   # 测试关键词
 RESULTS_DIR="benchmark_results"
 TIMESTAMP=$(date +%Y%m%d_%H%M%S)
@@ -22,7 +23,7 @@ MODULE_RESULTS="$RESULTS_DIR/module_performance_${TIMESTAMP}.csv"
 SEARCH_RESULTS="$RESULTS_DIR/search_performance_${TIMESTAMP}.csv"
 
 # 初始化 CSV 文件
-echo "Writers,Setup(ms),KeyGen(ms),IGen(ms),Prep(ms),Encrypt(us),Extract(us)" > $MODULE_RESULTS
+echo "Writers,Setup(ms),KeyGen(ms),IGen(ms),Prep(ms),Encrypt(us),Extract(us),SearchToken(us)" > $MODULE_RESULTS
 echo "Writers,SearchLatency(ms),ServerLatency(ms)" > $SEARCH_RESULTS
 
 echo "========================================"
@@ -53,10 +54,11 @@ cd ..
 echo ""
 
 # 运行模块测试
-for n in "${WRITERS[@]}"; do
+for n in "${MODULE_WRITERS[@]}"; do
     echo "测试 $n 个写者..."
     
-    OUTPUT=$(Hermes/test_modules $n 100 2>&1)
+    # 在 server 目录下运行，以便读取 ../param 中的曲线参数
+    OUTPUT=$(cd Hermes/server && ../test_modules $n 100 2>&1)
     
     # 提取性能数据
     SETUP=$(echo "$OUTPUT" | grep "Setup:" | awk '{print $2}')
@@ -65,11 +67,12 @@ for n in "${WRITERS[@]}"; do
     PREP=$(echo "$OUTPUT" | grep "Prep:" | awk '{print $2}')
     ENCRYPT=$(echo "$OUTPUT" | grep "Encrypt:" | awk '{print $2}')
     EXTRACT=$(echo "$OUTPUT" | grep "Extract:" | awk '{print $2}')
+    SEARCH_TOKEN=$(echo "$OUTPUT" | grep "SearchToken:" | awk '{print $2}')
     
     # 写入 CSV
-    echo "$n,$SETUP,$KEYGEN,$IGEN,$PREP,$ENCRYPT,$EXTRACT" >> $MODULE_RESULTS
+    echo "$n,$SETUP,$KEYGEN,$IGEN,$PREP,$ENCRYPT,$EXTRACT,$SEARCH_TOKEN" >> $MODULE_RESULTS
     
-    echo "  Setup: $SETUP ms, Encrypt: $ENCRYPT μs, Extract: $EXTRACT μs"
+    echo "  Setup: $SETUP ms, Encrypt: $ENCRYPT μs, Extract: $EXTRACT μs, SearchToken: $SEARCH_TOKEN μs"
     echo ""
 done
 
@@ -150,4 +153,6 @@ echo "  - 搜索性能: $SEARCH_RESULTS"
 echo ""
 echo "下一步: 运行 Python 绘图脚本"
 echo "  python3 plot_results.py $MODULE_RESULTS $SEARCH_RESULTS"
+echo "或生成全部图表（增量、并行）:"
+echo "  python3 report.py"
 
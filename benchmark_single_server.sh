@@ -54,6 +54,7 @@ echo ""
 
 # CSV 文件
 SEARCH_RESULTS="$RESULTS_DIR/search_performance_single_server_$TIMESTAMP.csv"
+SEARCH_SAMPLES="$RESULTS_DIR/search_samples_single_server_$TIMESTAMP.csv"
 
 # 编译
 echo "========================================"
@@ -105,6 +106,7 @@ echo ""
 
 # 创建 CSV 文件头
 echo "Writers,ClientQueryTime(ms),EndToEndLatency(ms),ServerLatency(ms),ClientStdDev,EndToEndStdDev,ServerStdDev" > $SEARCH_RESULTS
+echo "Writers,Run,ClientQueryTime(ms),EndToEndLatency(ms),ServerLatency(ms)" > $SEARCH_SAMPLES
 
 echo "========================================"
 echo "  搜索性能测试"
@@ -174,6 +176,7 @@ for n in "${WRITERS[@]}"; do
             QUERY_TIMES+=($QUERY_MS)
             END_TO_END_TIMES+=($END_MS)
             SERVER_TIMES+=($SERVER_MS)
+            echo "$n,$run,$QUERY_MS,$END_MS,$SERVER_MS" >> $SEARCH_SAMPLES
             echo "    [热启动] 查询: $QUERY_MS ms, 端到端: $END_MS ms, 服务器: $SERVER_MS ms"
         fi
 
@@ -227,9 +230,17 @@ echo "  测试完成！"
 echo "========================================"
 echo ""
 echo "结果文件: $SEARCH_RESULTS"
+echo "原始样本: $SEARCH_SAMPLES"
+echo ""
+
+# 存入历史库，并与之前的运行比较
+python bench_store.py ingest $SEARCH_SAMPLES
+python bench_store.py compare --kind search_samples_single_server || echo "⚠ 检测到性能回退"
 echo ""
 echo "下一步: 运行 Python 绘图脚本"
 echo "  python plot_simple_results.py $SEARCH_RESULTS"
 echo "  python plot_individual.py $SEARCH_RESULTS"
+echo "或生成全部图表（增量、并行）:"
+echo "  python report.py"
 echo ""
 
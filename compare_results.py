@@ -5,10 +5,11 @@
 2. 方案 A：只启动一次服务器，排除服务器启动开销
 """
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import sys
 
+from bench_store import read_results
+
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['DejaVu Sans', 'Arial Unicode MS', 'SimHei']
 plt.rcParams['axes.unicode_minus'] = False
@@ -17,8 +18,8 @@ def compare_results(file1, file2):
     """对比两个测试结果"""
     
     # 读取数据
-    df1 = pd.read_csv(file1)
-    df2 = pd.read_csv(file2)
+    df1 = read_results(file1)
+    df2 = read_results(file2)
     
     print("=" * 70)
     print("  测试方法对比分析")
@@ -138,7 +139,7 @@ def compare_results(file1, file2):
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
-        print("用法: python compare_results.py <file1> <file2>")
+        print("用法: python compare_results.py <file1|run:id> <file2|run:id>")
         print("示例: python compare_results.py benchmark_results/search_performance_20251112_220109.csv benchmark_results/search_performance_single_server_20251112_223806.csv")
         sys.exit(1)
     
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+写者数据库格式转换
+将文本数据库（extract_database.go / create_small_dataset.py 输出的 <id>.txt，
+每行 "keyword doc_id1 doc_id2 ..."）转换为服务器和客户端直接 mmap 读取的二进制格式 <id>.hdb。
+
+二进制格式（小端序，与 Hermes/include/writer_db.h 一致）:
+    header     magic "HDB1", uint32 关键词数, uint64 文档总数, uint64 关键词字节数
+    keywords   每个关键词 (uint32 关键词偏移, uint32 关键词长度, uint32 文档偏移, uint32 文档数)
+    postings   int32 文档 ID，每个关键词的文档按升序排列
+    strings    所有关键词（无分隔符）
+
+用法示例:
+    python3 convert_database.py database_small
+    python3 convert_database.py Hermes/database --output-dir Hermes/database_bin
+"""
+
+import argparse
+import re
+import struct
+import sys
+from pathlib import Path
+
+MAGIC = b'HDB1'
+_HEADER = struct.Struct('<4sIQQ')
+_KEYWORD = struct.Struct('<IIII')
+
+
+def read_text_database(path):
+    """读取文本数据库，返回 [(关键词, [文档 ID, ...]), ...]（保持文件中的关键词顺序）"""
+    entries = []
+    with open(path) as f:
+        for line in f:
+            fields = line.split()
+            if fields:
+                entries.append((fields[0], [int(v) for v in fields[1:]]))
+    return entries
+
+
+def write_writer_db(path, entries):
+    """将 [(关键词, [文档 ID, ...]), ...] 写为二进制数据库，返回 (关键词数, 文档数)"""
+    table = bytearray()
+    postings = []
+    strings = bytearray()
+    for keyword, doc_ids in entries:
+        encoded = keyword.encode()
+        table += _KEYWORD.pack(len(strings), len(encoded), len(postings), len(doc_ids))
+        postings.extend(sorted(doc_ids))
+        strings += encoded
+
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(entries), len(postings), len(strings)))
+        f.write(table)
+        f.write(struct.pack(f'<{len(postings)}i', *postings))
+        f.write(strings)
+    return len(entries), len(postings)
+
+
+def read_writer_db(path):
+    """读取二进制数据库（用于校验），返回 [(关键词, [文档 ID, ...]), ...]"""
+    data = Path(path).read_bytes()
+    magic, num_keywords, num_postings, keywords_size = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"不是写者数据库文件: {path}")
+    offset = _HEADER.size
+    postings_offset = offset + num_keywords * _KEYWORD.size
+    strings_offset = postings_offset + 4 * num_postings
+    postings = struct.unpack_from(f'<{num_postings}i', data, postings_offset)
+
+    entries = []
+    for k in range(num_keywords):
+        kw_offset, kw_length, p_offset, p_count = _KEYWORD.unpack_from(data, offset + k * _KEYWORD.size)
+        keyword = data[strings_offset + kw_offset: strings_offset + kw_offset + kw_length].decode()
+        entries.append((keyword, list(postings[p_offset: p_offset + p_count])))
+    return entries
+
+
+def convert_database(input_dir, output_dir=None, verbose=True):
+    """转换目录中所有 <id>.txt，返回 (文件数, 关键词数, 文档数)"""
+    input_dir = Path(input_dir)
+    output_dir = Path(output_dir) if output_dir else input_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    files = sorted((p for p in input_dir.glob('*.txt') if re.fullmatch(r'\d+', p.stem)),
+                   key=lambda p: int(p.stem))
+    num_keywords = num_postings = 0
+    for path in files:
+        keywords, postings = write_writer_db(output_dir / f'{path.stem}.hdb', read_text_database(path))
+        num_keywords += keywords
+        num_postings += postings
+        if verbose:
+            print(f"✓ 转换: {path} -> {output_dir / (path.stem + '.hdb')} ({keywords} 个关键词, {postings} 个文档)")
+    return len(files), num_keywords, num_postings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='将文本写者数据库转换为二进制格式')
+    parser.add_argument('input_dir', help='文本数据库目录（包含 1.txt, 2.txt, ...）')
+    parser.add_argument('--output-dir', help='二进制数据库目录（默认与输入目录相同）')
+    parser.add_argument('--verify', action='store_true', help='转换后读回并与文本数据库比较')
+    parser.add_argument('-q', '--quiet', action='store_true', help='不逐个打印文件')
+    args = parser.parse_args()
+
+    num_files, num_keywords, num_postings = convert_database(args.input_dir, args.output_dir,
+                                                             verbose=not args.quiet)
+    if num_files == 0:
+        print(f"✗ {args.input_dir} 中没有文本数据库文件")
+        sys.exit(1)
+    print(f"\n✓ 转换了 {num_files} 个数据库文件: {num_keywords} 个关键词, {num_postings} 个文档")
+
+    if args.verify:
+        output_dir = Path(args.output_dir or args.input_dir)
+        for path in Path(args.input_dir).glob('*.txt'):
+            if not re.fullmatch(r'\d+', path.stem):
+                continue
+            expected = [(kw, sorted(ids)) for kw, ids in read_text_database(path)]
+            if read_writer_db(output_dir / f'{path.stem}.hdb') != expected:
+                print(f"✗ 校验失败: {path}")
+                sys.exit(1)
+        print("✓ 校验通过")
+
+
+if __name__ == "__main__":
+    main()
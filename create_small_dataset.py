@@ -4,9 +4,12 @@
 用于快速测试和立项演示
 """
 
+import argparse
 import os
 import random
 
+from convert_database import write_writer_db
+
 # 配置参数
 NUM_WRITERS = 25  # 写者数量（增加到 25，接近默认配置）
 KEYWORDS_PER_WRITER = 150  # 每个写者的关键词数量（增加到 150）
@@ -45,40 +48,76 @@ COMMON_KEYWORDS = [
     "grade", "degree", "certificate", "training", "workshop", "seminar", "tutorial"
 ]
 
-def create_small_dataset():
-    """创建小型数据集"""
+def keyword_pool(num_keywords):
+    """关键词池：常用关键词不够时补充合成关键词（用于生成更大的数据集）"""
+    pool = list(COMMON_KEYWORDS)
+    for i in range(max(0, num_keywords - len(pool))):
+        pool.append(f"keyword{i:05d}")
+    return pool
+
+
+def create_small_dataset(output_dir="database_small", num_writers=NUM_WRITERS,
+                         keywords_per_writer=KEYWORDS_PER_WRITER,
+                         docs_min=DOCS_PER_KEYWORD_MIN, docs_max=DOCS_PER_KEYWORD_MAX,
+                         seed=None, verbose=True, binary=True):
+    """创建小型数据集（binary 为真时同时写出二进制数据库 <id>.hdb）"""
+    rng = random.Random(seed)
+    keywords = keyword_pool(keywords_per_writer)
     
     # 创建输出目录
-    output_dir = "database_small"
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
         print(f"✓ 创建目录: {output_dir}/")
     
     # 为每个写者创建数据库文件
-    for writer_id in range(1, NUM_WRITERS + 1):
+    num_postings = 0
+    for writer_id in range(1, num_writers + 1):
         filename = os.path.join(output_dir, f"{writer_id}.txt")
         
         # 随机选择关键词
-        selected_keywords = random.sample(COMMON_KEYWORDS, 
-                                         min(KEYWORDS_PER_WRITER, len(COMMON_KEYWORDS)))
+        selected_keywords = rng.sample(keywords, 
+                                       min(keywords_per_writer, len(keywords)))
+        entries = []
         
         with open(filename, 'w') as f:
             for keyword in selected_keywords:
                 # 为每个关键词生成随机的文档ID列表
-                num_docs = random.randint(DOCS_PER_KEYWORD_MIN, DOCS_PER_KEYWORD_MAX)
-                doc_ids = random.sample(range(1, 1000), num_docs)
+                num_docs = rng.randint(docs_min, docs_max)
+                doc_ids = rng.sample(range(1, 1000), num_docs)
                 doc_ids.sort()
+                num_postings += num_docs
+                entries.append((keyword, doc_ids))
                 
                 # 写入格式: keyword doc_id1 doc_id2 ...
                 f.write(f"{keyword} {' '.join(map(str, doc_ids))}\n")
         
-        print(f"✓ 创建文件: {filename} ({len(selected_keywords)} 个关键词)")
+        binary_file = os.path.join(output_dir, f"{writer_id}.hdb")
+        if binary:
+            write_writer_db(binary_file, entries)
+        elif os.path.exists(binary_file):
+            # 旧的二进制数据库会被服务器和客户端优先读取，删除以免与新的文本数据库不一致
+            os.remove(binary_file)
+        
+        if verbose:
+            print(f"✓ 创建文件: {filename} ({len(selected_keywords)} 个关键词)")
     
-    print(f"\n✓ 成功创建 {NUM_WRITERS} 个数据库文件")
-    print(f"  - 每个文件约 {KEYWORDS_PER_WRITER} 个关键词")
-    print(f"  - 每个关键词 {DOCS_PER_KEYWORD_MIN}-{DOCS_PER_KEYWORD_MAX} 个文档")
+    print(f"\n✓ 成功创建 {num_writers} 个数据库文件")
+    print(f"  - 每个文件约 {keywords_per_writer} 个关键词")
+    print(f"  - 每个关键词 {docs_min}-{docs_max} 个文档")
+    if binary:
+        print("  - 同时生成二进制数据库 (<id>.hdb)")
     print(f"\n数据集位置: {output_dir}/")
+    return num_postings
 
 if __name__ == "__main__":
-    create_small_dataset()
-
+    parser = argparse.ArgumentParser(description='创建小型测试数据集')
+    parser.add_argument('output_dir', nargs='?', default='database_small', help='输出目录')
+    parser.add_argument('--writers', type=int, default=NUM_WRITERS, help='写者数量')
+    parser.add_argument('--keywords', type=int, default=KEYWORDS_PER_WRITER, help='每个写者的关键词数量')
+    parser.add_argument('--docs-min', type=int, default=DOCS_PER_KEYWORD_MIN, help='每个关键词最少文档数')
+    parser.add_argument('--docs-max', type=int, default=DOCS_PER_KEYWORD_MAX, help='每个关键词最多文档数')
+    parser.add_argument('--seed', type=int, help='随机种子（相同种子生成相同数据集）')
+    parser.add_argument('--no-binary', action='store_true', help='只生成文本数据库（并删除目录中旧的二进制数据库）')
+    args = parser.parse_args()
+    create_small_dataset(args.output_dir, args.writers, args.keywords, 
+                         args.docs_min, args.docs_max, args.seed, binary=not args.no_binary)
@@ -0,0 +1,92 @@
+#!/bin/bash
+# 曲线对比测试：对 Hermes/param 中的每条配对曲线运行模块测试，
+# 记录 Setup/Encrypt/Extract/Decrypt 等时间和令牌大小，
+# 并在满足安全要求的曲线中选出搜索（Decrypt）最快的一条
+#
+# 用法: ./curve_benchmark.sh [<writers>] [<iterations>] [<min_order_bits>] [<min_gt_bits>]
+
+echo "========================================"
+echo "  Hermes 配对曲线对比测试"
+echo "========================================"
+echo ""
+
+# 配置参数
+NUM_WRITERS=${1:-25}
+NUM_ITERATIONS=${2:-100}
+MIN_ORDER_BITS=${3:-160}    # 群阶位数下限（椭圆曲线离散对数约 n/2 位安全）
+MIN_GT_BITS=${4:-1024}      # GT 元素位数下限（有限域离散对数的安全性）
+RESULTS_DIR="benchmark_results"
+TIMESTAMP=$(date +%Y%m%d_%H%M%S)
+CURVE_RESULTS="$RESULTS_DIR/curve_performance_${TIMESTAMP}.csv"
+
+mkdir -p $RESULTS_DIR
+echo "Writers,Curve,GroupOrderBits,GTBits,Setup(ms),KeyGen(ms),IGen(ms),Prep(ms),Encrypt(us),Extract(us),Decrypt(us),SearchToken(us),PEKSToken(bytes),AggKey(bytes)" > $CURVE_RESULTS
+
+# 编译模块测试程序
+echo "正在编译模块测试程序..."
+cd Hermes
+rm -f test_modules
+g++ -march=native -std=c++11 -O2 -pthread -funroll-loops -maes -msse4.2 -mavx2 \
+    -I. -I../ -I/home/$USER/Hermes/include -I../include -I/usr/local/include \
+    test_modules.cpp -o test_modules \
+    -L/home/$USER/Hermes/lib -L/usr/local/lib \
+    -lzmq -lgmp -lm -lcrypto -lpbc 2>&1 | grep -v "warning"
+
+if [ ! -f test_modules ]; then
+    echo "✗ 编译失败"
+    exit 1
+fi
+echo "✓ 编译成功"
+cd ..
+echo ""
+
+for PARAM in Hermes/param/*.param; do
+    CURVE=$(basename $PARAM .param)
+    echo "测试曲线 $CURVE..."
+
+    # 在 server 目录下运行，以便读取 ../param 中的曲线参数
+    OUTPUT=$(cd Hermes/server && ../test_modules $NUM_WRITERS $NUM_ITERATIONS $CURVE 2>&1)
+    if [ $? -ne 0 ]; then
+        echo "  ⚠ 跳过: $(echo "$OUTPUT" | grep -E "fatal|✗" | head -1)"
+        echo ""
+        continue
+    fi
+
+    # 提取性能数据
+    ORDER_BITS=$(echo "$OUTPUT" | grep "GroupOrderBits:" | awk '{print $2}')
+    GT_BITS=$(echo "$OUTPUT" | grep "GTBits:" | awk '{print $2}')
+    SETUP=$(echo "$OUTPUT" | grep "Setup:" | awk '{print $2}')
+    KEYGEN=$(echo "$OUTPUT" | grep "KeyGen:" | awk '{print $2}')
+    IGEN=$(echo "$OUTPUT" | grep "IGen:" | awk '{print $2}')
+    PREP=$(echo "$OUTPUT" | grep "Prep:" | awk '{print $2}')
+    ENCRYPT=$(echo "$OUTPUT" | grep "Encrypt:" | awk '{print $2}')
+    EXTRACT=$(echo "$OUTPUT" | grep "Extract:" | awk '{print $2}')
+    DECRYPT=$(echo "$OUTPUT" | grep "Decrypt:" | awk '{print $2}')
+    SEARCH_TOKEN=$(echo "$OUTPUT" | grep "SearchToken:" | awk '{print $2}')
+    PEKS_TOKEN=$(echo "$OUTPUT" | grep "PEKSToken:" | awk '{print $2}')
+    AGG_KEY=$(echo "$OUTPUT" | grep "AggKey:" | awk '{print $2}')
+
+    # 写入 CSV
+    echo "$NUM_WRITERS,$CURVE,$ORDER_BITS,$GT_BITS,$SETUP,$KEYGEN,$IGEN,$PREP,$ENCRYPT,$EXTRACT,$DECRYPT,$SEARCH_TOKEN,$PEKS_TOKEN,$AGG_KEY" >> $CURVE_RESULTS
+
+    echo "  群阶 $ORDER_BITS 位, GT $GT_BITS 位, Encrypt: $ENCRYPT μs, Extract: $EXTRACT μs, Decrypt: $DECRYPT μs, 令牌 $PEKS_TOKEN 字节"
+    echo ""
+done
+
+echo "✓ 曲线测试完成，结果保存到: $CURVE_RESULTS"
+echo ""
+
+# 在满足安全要求的曲线中选择 Decrypt 最快的（搜索的主要开销）
+BEST=$(awk -F, -v order=$MIN_ORDER_BITS -v gt=$MIN_GT_BITS \
+    'NR > 1 && $3 >= order && $4 >= gt { print $11, $2 }' $CURVE_RESULTS | sort -g | head -1)
+if [ -z "$BEST" ]; then
+    echo "⚠ 没有满足安全要求（群阶 ≥ $MIN_ORDER_BITS 位, GT ≥ $MIN_GT_BITS 位）的曲线"
+else
+    BEST_CURVE=$(echo $BEST | awk '{print $2}')
+    echo "满足安全要求（群阶 ≥ $MIN_ORDER_BITS 位, GT ≥ $MIN_GT_BITS 位）的最快曲线: $BEST_CURVE"
+    echo "在服务器配置文件中使用:"
+    echo "  CURVE=$BEST_CURVE"
+fi
+echo ""
+
+python bench_store.py ingest $CURVE_RESULTS
@@ -0,0 +1,83 @@
+#!/bin/bash
+# 写者数据库加载测试：生成 Enron 规模的数据集（文本 + 二进制），
+# 对不同写者数量比较文本解析和 mmap 二进制数据库的加载时间
+#
+# 用法: ./load_benchmark.sh [<writers>] [<keywords_per_writer>] [<docs_min>] [<docs_max>] [<repeats>]
+
+echo "========================================"
+echo "  Hermes 写者数据库加载测试"
+echo "========================================"
+echo ""
+
+# 配置参数（默认约为 Enron 数据集的规模: 150 个写者）
+NUM_WRITERS=${1:-150}
+KEYWORDS_PER_WRITER=${2:-2000}
+DOCS_MIN=${3:-1}
+DOCS_MAX=${4:-100}
+REPEATS=${5:-3}
+RESULTS_DIR="benchmark_results"
+TIMESTAMP=$(date +%Y%m%d_%H%M%S)
+DATASET_DIR="$RESULTS_DIR/load_dataset_${TIMESTAMP}"
+LOAD_RESULTS="$RESULTS_DIR/load_performance_${TIMESTAMP}.csv"
+
+mkdir -p $RESULTS_DIR
+echo "Writers,Keywords,Postings,TextBytes,BinaryBytes,TextLoad(ms),BinaryLoad(ms),Speedup" > $LOAD_RESULTS
+
+# 编译加载测试程序
+echo "正在编译加载测试程序..."
+cd Hermes
+rm -f load_benchmark
+g++ -march=native -std=c++11 -O2 -Iinclude load_benchmark.cpp -o load_benchmark 2>&1 | grep -v "warning"
+
+if [ ! -f load_benchmark ]; then
+    echo "✗ 编译失败"
+    exit 1
+fi
+echo "✓ 编译成功"
+cd ..
+echo ""
+
+echo "生成数据集: $NUM_WRITERS 个写者, 每个写者 $KEYWORDS_PER_WRITER 个关键词, 每个关键词 $DOCS_MIN-$DOCS_MAX 个文档..."
+python3 create_small_dataset.py $DATASET_DIR --writers $NUM_WRITERS --keywords $KEYWORDS_PER_WRITER \
+    --docs-min $DOCS_MIN --docs-max $DOCS_MAX --seed 1 > /dev/null
+if [ $? -ne 0 ]; then
+    echo "✗ 数据集生成失败"
+    exit 1
+fi
+echo "✓ 数据集: $DATASET_DIR"
+echo ""
+
+for WRITERS in 25 50 100 150 200 300; do
+    if [ $WRITERS -gt $NUM_WRITERS ]; then
+        break
+    fi
+    echo "测试 $WRITERS 个写者..."
+    OUTPUT=$(Hermes/load_benchmark $DATASET_DIR $WRITERS $REPEATS 2>&1)
+    if [ $? -ne 0 ]; then
+        echo "  ✗ $(echo "$OUTPUT" | grep "✗" | head -1)"
+        continue
+    fi
+
+    # 提取性能数据
+    KEYWORDS=$(echo "$OUTPUT" | grep "Keywords:" | awk '{print $2}')
+    POSTINGS=$(echo "$OUTPUT" | grep "Postings:" | awk '{print $2}')
+    TEXT_BYTES=$(echo "$OUTPUT" | grep "TextBytes:" | awk '{print $2}')
+    BINARY_BYTES=$(echo "$OUTPUT" | grep "BinaryBytes:" | awk '{print $2}')
+    TEXT_TIME=$(echo "$OUTPUT" | grep "^Text:" | awk '{print $2}')
+    BINARY_TIME=$(echo "$OUTPUT" | grep "^Binary:" | awk '{print $2}')
+    SPEEDUP=$(echo "$OUTPUT" | grep "Speedup:" | awk '{print $2}')
+
+    # 写入 CSV
+    echo "$WRITERS,$KEYWORDS,$POSTINGS,$TEXT_BYTES,$BINARY_BYTES,$TEXT_TIME,$BINARY_TIME,$SPEEDUP" >> $LOAD_RESULTS
+
+    echo "  $POSTINGS 个文档: 文本 $TEXT_TIME ms, 二进制 $BINARY_TIME ms (加速 ${SPEEDUP}x)"
+    echo ""
+done
+
+# 数据集较大，测试完成后删除
+rm -rf $DATASET_DIR
+
+echo "✓ 加载测试完成，结果保存到: $LOAD_RESULTS"
+echo ""
+
+python bench_store.py ingest $LOAD_RESULTS
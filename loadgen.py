@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Hermes 开环负载生成器
+按目标到达率（泊松到达）向服务器回放客户端捕获的 'S' / 'U' 消息，
+请求的发送不等待之前请求的完成，从而暴露服务器端的排队效应。
+
+捕获文件由客户端会话模式生成:
+    cd Hermes/client
+    ./client -b commands.txt       # commands.txt 中先执行 capture <file>
+
+用法示例:
+    python3 loadgen.py capture.bin --rates 0.5,1,2,4 --duration 30 --read-ratio 0.9
+"""
+
+import argparse
+import asyncio
+import csv
+import random
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from pathlib import Path
+
+import zmq
+import zmq.asyncio
+
+from query_capture import read_capture
+
+KIND_NAMES = {'S': 'Search', 'U': 'Update'}
+
+
+class LatencyHistogram:
+    """HDR 风格的对数-线性直方图（单位 us），相对误差约为 2^-sub_bucket_bits"""
+
+    def __init__(self, sub_bucket_bits=10):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts = defaultdict(int)
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    def _bucket(self, value):
+        shift = max(0, value.bit_length() - self.sub_bucket_bits)
+        return shift, value >> shift
+
+    def record(self, value_us):
+        value = max(1, int(value_us))
+        self.counts[self._bucket(value)] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def buckets(self):
+        """按延迟从小到大返回 (桶上界 us, 计数)"""
+        ordered = sorted(self.counts.items(), key=lambda item: item[0][1] << item[0][0])
+        for (shift, sub), count in ordered:
+            yield ((sub + 1) << shift) - 1, count
+
+    def percentile(self, p):
+        if self.total == 0:
+            return float('nan')
+        target = max(1, int(round(p / 100.0 * self.total)))
+        seen = 0
+        for upper, count in self.buckets():
+            seen += count
+            if seen >= target:
+                return min(upper, self.max)
+        return self.max
+
+    def mean(self):
+        return self.sum / self.total if self.total else float('nan')
+
+
+def zipf_weights(n, s):
+    """Zipf 分布权重：第 k 个关键词的概率正比于 1/k^s"""
+    return [1.0 / (k ** s) for k in range(1, n + 1)]
+
+
+def build_workload(queries, writers):
+    """将捕获的消息按关键词分组，返回 (搜索消息组列表, 更新消息列表)"""
+    searches = defaultdict(list)
+    keyword_order = []
+    updates = []
+    for q in queries:
+        if q.kind == 'S':
+            if writers is not None and q.writer_subset_size != writers:
+                continue
+            if q.label not in searches:
+                keyword_order.append(q.label)
+            searches[q.label].append(q.payload)
+        elif q.kind == 'U':
+            updates.append(q.payload)
+    return [searches[k] for k in keyword_order], keyword_order, updates
+
+
+async def wait_idle(sock, pending):
+    """
+    在同一连接上发送 'L' 探测并等待其回复。服务器按顺序处理同一连接上的请求，
+    探测的回复到达时，之前未完成的请求都已处理完，下一个阶段不会受到积压请求的影响。
+    """
+    print(f"  等待服务器处理完剩余的 {pending} 个请求...")
+    start = time.perf_counter()
+    await sock.send_multipart([b'', b'L'])
+    for _ in range(pending + 1):
+        await sock.recv_multipart()
+    print(f"  ✓ 服务器已空闲（等待 {time.perf_counter() - start:.1f}s）")
+
+
+async def run_step(ctx, args, rate, search_groups, weights, updates, rng):
+    """以给定到达率运行一个负载阶段"""
+    sock = ctx.socket(zmq.DEALER)
+    sock.setsockopt(zmq.LINGER, 0)
+    sock.connect(args.endpoint)
+
+    histograms = {'S': LatencyHistogram(), 'U': LatencyHistogram()}
+    outstanding = deque()
+    sends = []
+    completions = []
+    done_sending = asyncio.Event()
+    step_start = time.perf_counter()
+
+    async def receiver():
+        while True:
+            await sock.recv_multipart()
+            now = time.perf_counter()
+            intended, kind = outstanding.popleft()
+            # 从计划发送时刻计算延迟，避免协调遗漏（coordinated omission）
+            histograms[kind].record((now - intended) * 1e6)
+            completions.append(now - step_start)
+            if done_sending.is_set() and not outstanding:
+                return
+
+    recv_task = asyncio.ensure_future(receiver())
+
+    next_time = step_start
+    end_time = step_start + args.duration
+    while True:
+        next_time += rng.expovariate(rate)
+        if next_time >= end_time:
+            break
+        delay = next_time - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if updates and (not search_groups or rng.random() >= args.read_ratio):
+            kind, payload = 'U', rng.choice(updates)
+        else:
+            group = rng.choices(search_groups, weights=weights)[0]
+            kind, payload = 'S', rng.choice(group)
+
+        outstanding.append((next_time, kind))
+        sends.append(next_time - step_start)
+        await sock.send_multipart([b'', payload])
+
+    done_sending.set()
+    timed_out = {'S': 0, 'U': 0}
+    if not outstanding:
+        recv_task.cancel()
+    else:
+        try:
+            await asyncio.wait_for(recv_task, args.drain_timeout)
+        except asyncio.TimeoutError:
+            # 未完成的请求按截止时刻的延迟记为删失样本，否则过载时的分位数只来自已完成的请求而偏低
+            deadline = time.perf_counter()
+            pending = list(outstanding)
+            for intended, kind in pending:
+                histograms[kind].record((deadline - intended) * 1e6)
+                timed_out[kind] += 1
+            print(f"  ⚠ {len(pending)} 个请求在 {args.drain_timeout}s 内未完成（按截止时刻的延迟计入分位数）")
+            await wait_idle(sock, len(pending))
+    sock.close()
+
+    return histograms, sends, completions, timed_out
+
+
+def summary_rows(rate, histograms, sends, completions, timed_out, duration):
+    """生成一个负载阶段的汇总行（全部 / 搜索 / 更新），分位数包含超时请求的删失样本"""
+    overall = LatencyHistogram()
+    for h in histograms.values():
+        overall.merge(h)
+
+    in_window = sum(1 for c in completions if c <= duration)
+    rows = []
+    for kind, h, censored in [('All', overall, sum(timed_out.values())),
+                              ('Search', histograms['S'], timed_out['S']),
+                              ('Update', histograms['U'], timed_out['U'])]:
+        if h.total == 0:
+            continue
+        rows.append({
+            'TargetRate(req/s)': rate,
+            'Kind': kind,
+            'Sent': len(sends) if kind == 'All' else '',
+            'Completed': h.total - censored,
+            'TimedOut': censored,
+            'Throughput(req/s)': round(in_window / duration, 3) if kind == 'All' else '',
+            'MeanLatency(ms)': round(h.mean() / 1000.0, 3),
+            'P50Latency(ms)': round(h.percentile(50) / 1000.0, 3),
+            'P90Latency(ms)': round(h.percentile(90) / 1000.0, 3),
+            'P99Latency(ms)': round(h.percentile(99) / 1000.0, 3),
+            'P999Latency(ms)': round(h.percentile(99.9) / 1000.0, 3),
+            'MaxLatency(ms)': round(h.max / 1000.0, 3),
+        })
+    return rows
+
+
+def timeline_rows(rate, sends, completions):
+    """按秒统计发送和完成的请求数"""
+    sent_per_second = defaultdict(int)
+    done_per_second = defaultdict(int)
+    for t in sends:
+        sent_per_second[int(t)] += 1
+    for t in completions:
+        done_per_second[int(t)] += 1
+    last = max(list(sent_per_second) + list(done_per_second) + [0])
+    return [{'TargetRate(req/s)': rate, 'Second': s,
+             'Sent': sent_per_second[s], 'Completed': done_per_second[s]}
+            for s in range(last + 1)]
+
+
+def histogram_rows(rate, histograms):
+    rows = []
+    for kind, h in histograms.items():
+        for upper, count in h.buckets():
+            rows.append({'TargetRate(req/s)': rate, 'Kind': KIND_NAMES[kind],
+                         'LatencyUpperBound(ms)': round(upper / 1000.0, 3), 'Count': count})
+    return rows
+
+
+def write_csv(path, rows):
+    if not rows:
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"✓ 保存结果: {path}")
+
+
+async def run(args):
+    queries = read_capture(args.capture)
+    search_groups, keywords, updates = build_workload(queries, args.writers)
+    if not search_groups and not updates:
+        raise SystemExit("错误：捕获文件中没有可回放的 'S' 或 'U' 消息")
+
+    print(f"捕获文件: {args.capture}")
+    print(f"  - 关键词: {len(keywords)} 个, 搜索消息: {sum(len(g) for g in search_groups)} 条")
+    print(f"  - 更新消息: {len(updates)} 条")
+    print()
+
+    rng = random.Random(args.seed)
+    weights = zipf_weights(len(search_groups), args.zipf)
+    ctx = zmq.asyncio.Context()
+
+    summary, timeline, histogram = [], [], []
+    try:
+        for rate in args.rates:
+            print(f"目标到达率 {rate} req/s，持续 {args.duration}s ...")
+            histograms, sends, completions, timed_out = await run_step(
+                ctx, args, rate, search_groups, weights, updates, rng)
+            rows = summary_rows(rate, histograms, sends, completions, timed_out, args.duration)
+            for row in rows:
+                if row['Kind'] == 'All':
+                    print(f"  吞吐量: {row['Throughput(req/s)']} req/s, "
+                          f"P50: {row['P50Latency(ms)']} ms, P99: {row['P99Latency(ms)']} ms")
+            summary += rows
+            timeline += timeline_rows(rate, sends, completions)
+            histogram += histogram_rows(rate, histograms)
+            if args.pause > 0:
+                await asyncio.sleep(args.pause)
+    finally:
+        ctx.term()
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    print()
+    write_csv(output_dir / f'loadgen_summary_{timestamp}.csv', summary)
+    write_csv(output_dir / f'loadgen_timeline_{timestamp}.csv', timeline)
+    write_csv(output_dir / f'loadgen_histogram_{timestamp}.csv', histogram)
+    print()
+    print("下一步: 绘制延迟-负载曲线")
+    print(f"  python plot_simple_results.py {output_dir / f'loadgen_summary_{timestamp}.csv'}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Hermes 开环负载生成器')
+    parser.add_argument('capture', help='客户端会话模式生成的查询捕获文件')
+    parser.add_argument('--endpoint', default='tcp://127.0.0.1:8888', help='服务器地址')
+    parser.add_argument('--rates', default='0.5,1,2',
+                        type=lambda s: [float(r) for r in s.split(',')],
+                        help='逗号分隔的目标到达率列表 (req/s)')
+    parser.add_argument('--duration', type=float, default=30.0, help='每个到达率的持续时间 (s)')
+    parser.add_argument('--read-ratio', type=float, default=0.9, help='搜索请求所占比例')
+    parser.add_argument('--zipf', type=float, default=1.1, help='关键词 Zipf 分布参数 s')
+    parser.add_argument('--writers', type=int, default=None,
+                        help='只回放写者子集大小等于该值的搜索消息')
+    parser.add_argument('--drain-timeout', type=float, default=120.0,
+                        help='每个阶段结束后等待未完成请求的最长时间 (s)')
+    parser.add_argument('--pause', type=float, default=0.0,
+                        help='服务器空闲后，阶段之间的额外间隔 (s)')
+    parser.add_argument('--seed', type=int, default=2025, help='随机数种子')
+    parser.add_argument('--output-dir', default='benchmark_results', help='结果目录')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
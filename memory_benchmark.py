@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+服务器内存扩展性测试
+用数据集生成器生成规模递增的数据集，对每个 (数据集, 写者数) 启动一次服务器，
+初始化完成后通过 'M' 请求读取各索引结构（EDTkn / PTkn / WTkn / correlation /
+output 缓冲区 / public_parameters）的条目数和字节数，并记录服务器进程的 RSS。
+
+用法示例:
+    python3 memory_benchmark.py --writers 5,10,25 --keywords 50,100,150 --seed 1
+    python3 plot_memory.py benchmark_results/memory_<timestamp>.csv
+"""
+
+import argparse
+import csv
+import struct
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import zmq
+
+from create_small_dataset import create_small_dataset
+
+ROOT_DIR = Path(__file__).resolve().parent
+SERVER_DIR = ROOT_DIR / 'Hermes' / 'server'   # 服务器从该目录读取 ../param
+STRUCTURES = ['EDTkn', 'PTkn', 'WTkn', 'Correlation', 'Output']
+
+_STATS_HEADER = struct.Struct('<ii')
+
+
+def parse_list(text):
+    return [int(v) for v in text.split(',') if v.strip()]
+
+
+def read_stats(sock):
+    """解析 'M' 请求的应答：public_parameters 的条目数/字节数，以及每个写者的各结构统计"""
+    sock.send(b'M')
+    reply = sock.recv()
+    num_writers, num_structures = _STATS_HEADER.unpack_from(reply)
+    values = struct.unpack_from(f'<{2 + num_writers * (2 + 2 * num_structures)}Q',
+                                reply, _STATS_HEADER.size)
+
+    shared = {'PublicParametersEntries': values[0], 'PublicParametersBytes': values[1]}
+    writers = []
+    row_size = 2 + 2 * num_structures
+    for w in range(num_writers):
+        row = values[2 + w * row_size: 2 + (w + 1) * row_size]
+        stats = {'Writer': w + 1, 'Keywords': row[0], 'Postings': row[1]}
+        for k, name in enumerate(STRUCTURES[:num_structures]):
+            stats[f'{name}Entries'] = row[2 + 2 * k]
+            stats[f'{name}Bytes'] = row[3 + 2 * k]
+        writers.append(stats)
+    return shared, writers
+
+
+def read_rss(pid):
+    """读取进程当前和峰值 RSS（kB）"""
+    rss = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith(('VmRSS:', 'VmHWM:')):
+                key, value = line.split(':', 1)
+                rss[key] = int(value.split()[0])
+    return rss.get('VmRSS', 0), rss.get('VmHWM', 0)
+
+
+def wait_ready(sock, server, timeout):
+    """等待服务器初始化完成（'G' 请求得到应答）"""
+    sock.send(b'G')
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if sock.poll(1000):
+            sock.recv()
+            return True
+        if server.poll() is not None:
+            return False
+    return False
+
+
+def measure(args, data_dir, num_writers, log_file):
+    """启动一个读取 data_dir 的服务器，返回 (共享统计, 每个写者的统计, RSS kB, 峰值 RSS kB)"""
+    config_file = data_dir / 'server.conf'
+    lines = [f'DATA_DIR={data_dir}']
+    if args.config:
+        lines += [l.strip() for l in open(args.config) if l.strip() and not l.startswith('DATA_DIR')]
+    config_file.write_text('\n'.join(lines) + '\n')
+
+    server_bin = Path(args.server).resolve()
+    with open(log_file, 'w') as log:
+        server = subprocess.Popen([str(server_bin), str(num_writers), str(config_file)],
+                                  cwd=SERVER_DIR, stdout=log, stderr=subprocess.STDOUT)
+
+    ctx = zmq.Context()
+    sock = ctx.socket(zmq.REQ)
+    sock.setsockopt(zmq.LINGER, 0)
+    sock.connect(args.endpoint)
+    try:
+        if not wait_ready(sock, server, args.init_timeout):
+            raise RuntimeError(f"服务器初始化失败或超时，检查日志: {log_file}")
+        shared, writers = read_stats(sock)
+        rss, peak_rss = read_rss(server.pid)
+    finally:
+        sock.close()
+        ctx.term()
+        server.terminate()
+        server.wait()
+    return shared, writers, rss, peak_rss
+
+
+def summarize(keywords_per_writer, num_writers, shared, writers, rss, peak_rss):
+    row = {'Writers': num_writers, 'Label': f'kw{keywords_per_writer}',
+           'KeywordsPerWriter': keywords_per_writer,
+           'Keywords': sum(w['Keywords'] for w in writers),
+           'Postings': sum(w['Postings'] for w in writers)}
+    index_bytes = shared['PublicParametersBytes']
+    for name in STRUCTURES:
+        row[f'{name}Entries'] = sum(w[f'{name}Entries'] for w in writers)
+        row[f'{name}Bytes'] = sum(w[f'{name}Bytes'] for w in writers)
+        index_bytes += row[f'{name}Bytes']
+    row.update(shared)
+    row['IndexMB'] = round(index_bytes / 2**20, 3)
+    row['RSS(MB)'] = round(rss / 1024, 3)
+    row['PeakRSS(MB)'] = round(peak_rss / 1024, 3)
+    row['BytesPerKeyword'] = round(index_bytes / max(1, row['Keywords']), 1)
+    row['BytesPerPosting'] = round(index_bytes / max(1, row['Postings']), 1)
+    row['RSSBytesPerPosting'] = round(rss * 1024 / max(1, row['Postings']), 1)
+    return row
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"✓ 保存结果: {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Hermes 服务器内存扩展性测试')
+    parser.add_argument('--writers', type=parse_list, default=[5, 10, 25], help='写者数量列表，如 5,10,25')
+    parser.add_argument('--keywords', type=parse_list, default=[50, 100, 150],
+                        help='每个写者的关键词数量列表（数据集规模），如 50,100,150')
+    parser.add_argument('--docs-min', type=int, default=5, help='每个关键词最少文档数')
+    parser.add_argument('--docs-max', type=int, default=20, help='每个关键词最多文档数')
+    parser.add_argument('--seed', type=int, default=1, help='数据集随机种子')
+    parser.add_argument('--server', default=str(SERVER_DIR / 'server'), help='服务器可执行文件')
+    parser.add_argument('--config', help='附加的服务器配置文件（如 partition_tuner.py 的输出）')
+    parser.add_argument('--endpoint', default='tcp://127.0.0.1:8888', help='服务器地址')
+    parser.add_argument('--init-timeout', type=float, default=600, help='等待服务器初始化的最长时间 (s)')
+    parser.add_argument('--output-dir', default='benchmark_results', help='结果目录')
+    parser.add_argument('--no-store', action='store_true', help='不写入基准历史库')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    output_dir = Path(args.output_dir).resolve()
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    dataset_root = output_dir / f'memory_datasets_{timestamp}'
+    dataset_root.mkdir(parents=True, exist_ok=True)
+
+    rows = []
+    detail = []
+    for keywords_per_writer in args.keywords:
+        data_dir = dataset_root / f'kw{keywords_per_writer}'
+        print(f"生成数据集: {data_dir}")
+        create_small_dataset(str(data_dir), max(args.writers), keywords_per_writer,
+                             args.docs_min, args.docs_max, args.seed, verbose=False)
+
+        for num_writers in args.writers:
+            print(f"测量: 每个写者 {keywords_per_writer} 个关键词, {num_writers} 个写者...")
+            log_file = output_dir / f'server_memory_{timestamp}_kw{keywords_per_writer}_w{num_writers}.log'
+            try:
+                shared, writers, rss, peak_rss = measure(args, data_dir, num_writers, log_file)
+            except RuntimeError as e:
+                print(f"  ✗ {e}")
+                continue
+
+            row = summarize(keywords_per_writer, num_writers, shared, writers, rss, peak_rss)
+            rows.append(row)
+            for w in writers:
+                detail.append({'Writers': num_writers, 'Label': row['Label'], **w})
+            print(f"  ✓ 索引 {row['IndexMB']} MB, RSS {row['RSS(MB)']} MB, "
+                  f"{row['BytesPerKeyword']} B/关键词, {row['BytesPerPosting']} B/文档")
+
+    if not rows:
+        print("✗ 没有成功的测量")
+        sys.exit(1)
+
+    print()
+    summary_file = output_dir / f'memory_{timestamp}.csv'
+    write_csv(summary_file, rows)
+    write_csv(output_dir / f'memory_writers_{timestamp}.csv', detail)
+
+    if not args.no_store:
+        from bench_store import DEFAULT_STORE, connect, ingest
+        conn = connect(DEFAULT_STORE)
+        run_id = ingest(conn, summary_file, server_config=args.config)
+        print(f"✓ 写入基准历史库: run {run_id}")
+
+
+if __name__ == "__main__":
+    main()
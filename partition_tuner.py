@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Hermes 分区树参数自动调优工具
+读取写者数据库目录（create_small_dataset.py / extract_database.go 的格式，
+每行 "keyword id1 id2 ..."），用与 C++ 相同的 mm_hash（MurmurHash3_x64_128，种子 0）
+模拟 SEARCH_EFFICIENCY 下的分区分配，为候选的 (RECURSIVE_LEVEL, PARTITION_SIZE,
+NUM_PARTITIONS) 预测每次搜索的配对运算次数和索引大小，并推荐最优参数。
+
+服务器在初始化时按照分区树插入 PTkn：
+  - 叶子分区 ID = ((h(keyword) % NUM_PARTITIONS) << 2) | L
+  - 第 k 层父节点 ID = ((h(子节点 ID 的 8 字节) % (NUM_PARTITIONS / PARTITION_SIZE^k)) << 2) | (L - k)
+  - PTkn[""] 保存第 1 层节点，PTkn[节点] 保存其子节点，WTkn[叶子] 保存该分区的关键词
+搜索时每层解密当前节点下的全部条目，再解密叶子分区的全部 WTkn，每次解密 2 次配对运算。
+
+用法:
+    python3 partition_tuner.py database_small
+    python3 partition_tuner.py database_small --writers 25 --top 10 --output Hermes/partition.conf
+"""
+
+import argparse
+import re
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bench_store import CONFIG_FILE, read_config, read_server_config
+
+# 分区 ID 的最低 2 位保存层号，因此最多 3 层
+MAX_RECURSIVE_LEVEL = 3
+PAIRINGS_PER_DECRYPT = 2
+# 序列化后的 PEKS_Token 大小：3 个 G2 元素 + 37 字节，G2 元素的大小由曲线决定
+PEKS_TOKEN_G2_ELEMENTS = 3
+PEKS_TOKEN_EXTRA_BYTES = 37
+PARAM_DIR = Path(__file__).resolve().parent / 'Hermes' / 'param'
+# unordered_map 中每个分区条目的额外开销估计（20 字节地址 + 节点 / vector 头）
+BUCKET_OVERHEAD_BYTES = 20 + 64
+
+MASK64 = (1 << 64) - 1
+_C1 = 0x87c37b91114253d5
+_C2 = 0x4cf5ad432745937f
+
+
+def _rotl64(x, r):
+    return ((x << r) | (x >> (64 - r))) & MASK64
+
+
+def _fmix64(k):
+    k ^= k >> 33
+    k = (k * 0xff51afd7ed558ccd) & MASK64
+    k ^= k >> 33
+    k = (k * 0xc4ceb9fe1a85ec53) & MASK64
+    k ^= k >> 33
+    return k
+
+
+def mm_hash(data, seed=0):
+    """MurmurHash3_x64_128，返回 (h1, h2)，与 utils.h 中的 mm_hash 一致"""
+    length = len(data)
+    nblocks = length // 16
+    h1 = h2 = seed
+
+    for i in range(nblocks):
+        k1, k2 = struct.unpack_from('<QQ', data, i * 16)
+        k1 = (k1 * _C1) & MASK64
+        k1 = _rotl64(k1, 31)
+        k1 = (k1 * _C2) & MASK64
+        h1 ^= k1
+        h1 = _rotl64(h1, 27)
+        h1 = (h1 + h2) & MASK64
+        h1 = (h1 * 5 + 0x52dce729) & MASK64
+        k2 = (k2 * _C2) & MASK64
+        k2 = _rotl64(k2, 33)
+        k2 = (k2 * _C1) & MASK64
+        h2 ^= k2
+        h2 = _rotl64(h2, 31)
+        h2 = (h2 + h1) & MASK64
+        h2 = (h2 * 5 + 0x38495ab5) & MASK64
+
+    tail = data[nblocks * 16:]
+    k1 = int.from_bytes(tail[:8], 'little')
+    k2 = int.from_bytes(tail[8:], 'little')
+    if len(tail) > 8:
+        k2 = (k2 * _C2) & MASK64
+        k2 = _rotl64(k2, 33)
+        k2 = (k2 * _C1) & MASK64
+        h2 ^= k2
+    if len(tail) > 0:
+        k1 = (k1 * _C1) & MASK64
+        k1 = _rotl64(k1, 31)
+        k1 = (k1 * _C2) & MASK64
+        h1 ^= k1
+
+    h1 ^= length
+    h2 ^= length
+    h1 = (h1 + h2) & MASK64
+    h2 = (h2 + h1) & MASK64
+    h1 = _fmix64(h1)
+    h2 = _fmix64(h2)
+    h1 = (h1 + h2) & MASK64
+    h2 = (h2 + h1) & MASK64
+    return h1, h2
+
+
+def default_curve():
+    """config.hpp 中的 DEFAULT_CURVE"""
+    match = re.search(r'DEFAULT_CURVE\[\]\s*=\s*"([^"]+)"', Path(CONFIG_FILE).read_text())
+    return match.group(1) if match else 'd224'
+
+
+def g2_bytes(curve):
+    """
+    由 Hermes/param/<curve>.param 计算序列化 G2 元素的字节数（与 PBC 的 pairing_length_in_bytes_G2 一致）：
+    两个坐标，每个坐标属于 G2 所在的域。type d / g 的 G2 定义在 Fq^(k/2) 上，type f 在 Fq^2 上，
+    type a / e 的 G2 与 G1 相同（Fq）
+    """
+    path = PARAM_DIR / f'{curve}.param'
+    if not path.exists():
+        raise SystemExit(f"错误：找不到曲线参数文件 {path}")
+    params = dict(line.split(None, 1) for line in path.read_text().splitlines() if len(line.split(None, 1)) == 2)
+    curve_type = params.get('type', '').strip()
+    degrees = {'a': 1, 'e': 1, 'f': 2, 'd': int(params.get('k', 6)) // 2, 'g': int(params.get('k', 10)) // 2}
+    if curve_type not in degrees or 'q' not in params:
+        raise SystemExit(f"错误：不支持的曲线类型 {curve_type}（{path}）")
+    return 2 * degrees[curve_type] * ((int(params['q']).bit_length() + 7) // 8)
+
+
+def load_database(db_dir, num_writers):
+    """读取写者数据库，返回 (关键词列表, 每个写者的关键词下标数组, 每个关键词的总文件数)"""
+    vocabulary = {}
+    postings = []
+    writers = []
+    for writer_id in range(1, num_writers + 1):
+        path = Path(db_dir) / f'{writer_id}.txt'
+        if not path.exists():
+            raise SystemExit(f"错误：找不到写者数据库 {path}")
+        indices = []
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if not parts:
+                    continue
+                index = vocabulary.setdefault(parts[0], len(vocabulary))
+                if index == len(postings):
+                    postings.append(0)
+                postings[index] += len(parts) - 1
+                indices.append(index)
+        writers.append(np.unique(np.array(indices, dtype=np.int64)))
+    keywords = list(vocabulary)
+    return keywords, writers, np.array(postings, dtype=np.float64)
+
+
+class PartitionTree:
+    """一组分区参数下关键词到各层分区的映射（与写者无关）"""
+
+    _parent_cache = {}
+
+    def __init__(self, keyword_hashes, levels, partition_size, num_partitions):
+        self.levels = levels
+        self.partition_size = partition_size
+        self.num_partitions = num_partitions
+
+        # path[0] 为叶子（第 L 层）分区下标，path[k] 为第 L-k 层的节点下标
+        self.sizes = [num_partitions]
+        self.path = [keyword_hashes % np.uint64(num_partitions)]
+        np_k = num_partitions
+        for k in range(1, levels):
+            np_k //= partition_size
+            self.sizes.append(np_k)
+            parent = self._parent_map(self.sizes[k - 1], levels - k + 1, np_k)
+            self.path.append(parent[self.path[k - 1].astype(np.int64)])
+
+    @classmethod
+    def _parent_map(cls, child_partitions, child_level, parent_partitions):
+        """子节点下标 -> 父节点下标，父节点由子节点 ID 的 8 字节小端表示哈希得到"""
+        key = (child_partitions, child_level, parent_partitions)
+        if key not in cls._parent_cache:
+            parents = np.empty(child_partitions, dtype=np.uint64)
+            for i in range(child_partitions):
+                pid = (i << 2) | child_level
+                parents[i] = mm_hash(struct.pack('<Q', pid))[0] % parent_partitions
+            cls._parent_cache[key] = parents
+        return cls._parent_cache[key]
+
+
+def simulate(tree, writers, query_weights, gamma, token_bytes):
+    """
+    模拟每个写者的索引结构，返回预测的每次查询配对次数（对所有写者求和）和索引大小。
+    查询关键词按 query_weights 的分布从全部关键词中抽取。
+    """
+    levels = tree.levels
+    total_decrypts = np.zeros(len(query_weights))
+    ptkn_entries = 0
+    buckets = 0
+    wtkn_entries = 0
+    max_bucket = 0
+
+    for indices in writers:
+        # 每层节点在该写者中的子节点数（叶子层为关键词数）
+        leaf_size = np.bincount(tree.path[0][indices].astype(np.int64), minlength=tree.sizes[0])
+        children = [leaf_size]
+        exists = [leaf_size > 0]
+        for k in range(1, levels):
+            child_nodes = np.flatnonzero(exists[k - 1])
+            parents = tree._parent_map(tree.sizes[k - 1], levels - k + 1, tree.sizes[k])[child_nodes]
+            count = np.bincount(parents.astype(np.int64), minlength=tree.sizes[k])
+            children.append(count)
+            exists.append(count > 0)
+
+        top = int(exists[-1].sum())
+        ptkn_entries += top + sum(int(exists[k].sum()) for k in range(levels - 1))
+        buckets += int(exists[0].sum())
+        wtkn_entries += len(indices)
+        max_bucket = max(max_bucket, int(leaf_size.max()))
+
+        # 从顶层开始逐层下降：每层解密当前节点下的全部条目，节点不存在时停止
+        decrypts = np.full(len(query_weights), float(top))
+        reached = np.ones(len(query_weights), dtype=bool)
+        for k in range(levels - 1, 0, -1):
+            node = tree.path[k].astype(np.int64)
+            reached &= exists[k][node]
+            decrypts += np.where(reached, children[k][node], 0)
+        leaf = tree.path[0].astype(np.int64)
+        reached &= exists[0][leaf]
+        # 叶子分区的全部 WTkn，匹配时再解密一次最新的令牌
+        present = np.zeros(len(query_weights), dtype=bool)
+        present[indices] = True
+        decrypts += np.where(reached, leaf_size[leaf], 0) + present
+        total_decrypts += decrypts
+
+    mean_decrypts = float(np.dot(total_decrypts, query_weights))
+    index_bytes = (ptkn_entries * token_bytes + buckets * BUCKET_OVERHEAD_BYTES
+                   + wtkn_entries * gamma * token_bytes)
+    return {
+        'Pairings': mean_decrypts * PAIRINGS_PER_DECRYPT,
+        'MaxPairings': float(total_decrypts.max()) * PAIRINGS_PER_DECRYPT,
+        'PTknEntries': ptkn_entries,
+        'WTknBuckets': buckets,
+        'MaxBucket': max_bucket,
+        'IndexMB': index_bytes / 1e6,
+    }
+
+
+def candidates(args):
+    for levels in args.levels:
+        for partition_size in (args.partition_sizes if levels > 1 else [1]):
+            for num_partitions in args.num_partitions:
+                # 每层至少需要一个分区，否则服务器计算 pid 时会对 0 取模
+                if num_partitions // partition_size ** (levels - 1) < 1:
+                    continue
+                yield levels, partition_size, num_partitions
+
+
+def int_list(text):
+    return [int(v) for v in text.split(',') if v]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Hermes 分区树参数自动调优工具')
+    parser.add_argument('db_dir', help='写者数据库目录（如 database_small）')
+    parser.add_argument('--writers', type=int, default=None, help='写者数量，默认为目录中的全部写者')
+    parser.add_argument('--levels', type=int_list, default=[1, 2, 3], help='候选的 RECURSIVE_LEVEL')
+    parser.add_argument('--partition-sizes', type=int_list, default=[2, 4, 5, 8, 10, 16, 20, 32],
+                        help='候选的 PARTITION_SIZE')
+    parser.add_argument('--num-partitions', type=int_list,
+                        default=[50, 100, 200, 400, 500, 1000, 2000, 4000, 8000],
+                        help='候选的 NUM_PARTITIONS')
+    parser.add_argument('--queries', choices=['uniform', 'postings'], default='uniform',
+                        help='查询关键词分布：均匀 / 按文件数加权')
+    parser.add_argument('--gamma', type=int, default=1,
+                        help='每个 WTkn 条目包含的 PEKS 令牌数（WRITER_EFFICIENCY 下为 epoch 覆盖节点数）')
+    parser.add_argument('--curve', default=None,
+                        help='服务器使用的曲线（默认为 --output 配置文件中的 CURVE，否则为 config.hpp 中的 DEFAULT_CURVE）')
+    parser.add_argument('--g2-bytes', type=int, default=None, help='G2 元素的字节数，覆盖由曲线计算的值')
+    parser.add_argument('--pairing-us', type=float, default=None, help='单次配对运算耗时 (us)，用于估计延迟')
+    parser.add_argument('--memory-weight', type=float, default=0.0,
+                        help='排序时每 MB 索引折算的配对次数')
+    parser.add_argument('--top', type=int, default=10, help='显示的推荐数量')
+    parser.add_argument('--output', default=None, help='将最优参数写入服务器配置文件')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if any(level < 1 or level > MAX_RECURSIVE_LEVEL for level in args.levels):
+        raise SystemExit(f"错误：RECURSIVE_LEVEL 必须在 1 到 {MAX_RECURSIVE_LEVEL} 之间")
+
+    num_writers = args.writers or len(list(Path(args.db_dir).glob('[0-9]*.txt')))
+    print(f"读取写者数据库: {args.db_dir}（{num_writers} 个写者）")
+    keywords, writers, postings = load_database(args.db_dir, num_writers)
+    print(f"  - 关键词: {len(keywords)} 个, 写者平均关键词数: {np.mean([len(w) for w in writers]):.0f}")
+
+    curve = args.curve
+    if curve is None and args.output and Path(args.output).exists():
+        curve = read_server_config(args.output).get('CURVE')
+    curve = curve or default_curve()
+    g2 = args.g2_bytes or g2_bytes(curve)
+    token_bytes = PEKS_TOKEN_G2_ELEMENTS * g2 + PEKS_TOKEN_EXTRA_BYTES
+    print(f"  - 曲线: {curve}, G2 元素 {g2} 字节, PEKS 令牌 {token_bytes} 字节")
+
+    keyword_hashes = np.array([mm_hash(k.encode())[0] for k in keywords], dtype=np.uint64)
+    weights = postings if args.queries == 'postings' else np.ones(len(keywords))
+    weights = weights / weights.sum()
+
+    rows = []
+    for levels, partition_size, num_partitions in candidates(args):
+        tree = PartitionTree(keyword_hashes, levels, partition_size, num_partitions)
+        row = {'RECURSIVE_LEVEL': levels, 'PARTITION_SIZE': partition_size,
+               'NUM_PARTITIONS': num_partitions}
+        row.update(simulate(tree, writers, weights, args.gamma, token_bytes))
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    if args.pairing_us is not None:
+        df['SearchLatency(ms)'] = df['Pairings'] * args.pairing_us / 1000.0
+    df['Score'] = df['Pairings'] + args.memory_weight * df['IndexMB']
+    df = df.sort_values(['Score', 'IndexMB']).reset_index(drop=True)
+
+    config = read_config()
+    current = df[(df['RECURSIVE_LEVEL'] == config.get('RECURSIVE_LEVEL'))
+                 & (df['PARTITION_SIZE'] == config.get('PARTITION_SIZE'))
+                 & (df['NUM_PARTITIONS'] == config.get('NUM_PARTITIONS'))]
+
+    print()
+    print(f"推荐参数（共 {len(df)} 组候选，按每次查询的配对次数排序）:")
+    print(df.head(args.top).to_string(float_format=lambda v: f'{v:.1f}'))
+    if not current.empty:
+        print()
+        print("config.hpp 中的当前参数:")
+        print(current.to_string(float_format=lambda v: f'{v:.1f}'))
+
+    best = df.iloc[0]
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(f"# Generated by partition_tuner.py from {args.db_dir}\n")
+            f.write(f"RECURSIVE_LEVEL={int(best['RECURSIVE_LEVEL'])}\n")
+            f.write(f"PARTITION_SIZE={int(best['PARTITION_SIZE'])}\n")
+            f.write(f"NUM_PARTITIONS={int(best['NUM_PARTITIONS'])}\n")
+            f.write(f"CURVE={curve}\n")
+        print()
+        print(f"✓ 保存服务器配置: {args.output}")
+        print(f"  cd Hermes/server && ./server {num_writers} {Path(args.output).resolve()}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,21 +5,18 @@ Hermes Performance Testing - Individual Plot Generator
 """
 
 import sys
-import pandas as pd
 import matplotlib.pyplot as plt
-import matplotlib
 import numpy as np
 from pathlib import Path
 
-# 设置字体
-matplotlib.rcParams['font.family'] = 'DejaVu Sans'
-matplotlib.rcParams['axes.unicode_minus'] = False
-try:
-    plt.style.use('seaborn-v0_8-darkgrid')
-except:
-    plt.style.use('seaborn-darkgrid')
+from bench_store import read_results
 
-def plot_end_to_end_latency(df, output_dir):
+# 设置字体和样式（report.py 渲染本模块的图表时也使用该样式）
+DARKGRID = 'seaborn-v0_8-darkgrid' if 'seaborn-v0_8-darkgrid' in plt.style.available else 'seaborn-darkgrid'
+STYLE = [{'font.family': 'DejaVu Sans', 'axes.unicode_minus': False}, DARKGRID]
+plt.style.use(STYLE)
+
+def plot_end_to_end_latency(df, output_file):
     """图1: 端到端搜索延迟"""
     plt.figure(figsize=(10, 6))
     plt.plot(df['Writers'], df['EndToEndLatency(ms)'], 'o-', linewidth=3,
@@ -38,12 +35,11 @@ def plot_end_to_end_latency(df, output_dir):
                 ha='center', va='bottom', fontsize=10, fontweight='bold')
 
     plt.tight_layout()
-    output_file = output_dir / '1_end_to_end_latency.png'
     plt.savefig(output_file, dpi=300, bbox_inches='tight')
     plt.close()
     print(f"  ✓ {output_file.name}")
 
-def plot_server_latency(df, output_dir):
+def plot_server_latency(df, output_file):
     """图2: 服务器处理延迟"""
     plt.figure(figsize=(10, 6))
     plt.plot(df['Writers'], df['ServerLatency(ms)'], 's-', linewidth=3,
@@ -61,12 +57,11 @@ def plot_server_latency(df, output_dir):
                 ha='center', va='bottom', fontsize=10, fontweight='bold')
 
     plt.tight_layout()
-    output_file = output_dir / '2_server_latency.png'
     plt.savefig(output_file, dpi=300, bbox_inches='tight')
     plt.close()
     print(f"  ✓ {output_file.name}")
 
-def plot_client_query_time(df, output_dir):
+def plot_client_query_time(df, output_file):
     """图3: 客户端查询生成时间"""
     plt.figure(figsize=(10, 6))
     plt.plot(df['Writers'], df['ClientQueryTime(ms)'], '^-', linewidth=3,
@@ -84,12 +79,11 @@ def plot_client_query_time(df, output_dir):
                 ha='center', va='bottom', fontsize=10, fontweight='bold')
 
     plt.tight_layout()
-    output_file = output_dir / '3_client_query_time.png'
     plt.savefig(output_file, dpi=300, bbox_inches='tight')
     plt.close()
     print(f"  ✓ {output_file.name}")
 
-def plot_latency_breakdown(df, output_dir):
+def plot_latency_breakdown(df, output_file):
     """图4: 延迟分解堆叠图"""
     plt.figure(figsize=(10, 6))
 
@@ -115,12 +109,11 @@ def plot_latency_breakdown(df, output_dir):
     plt.grid(True, alpha=0.3, axis='y')
 
     plt.tight_layout()
-    output_file = output_dir / '4_latency_breakdown.png'
     plt.savefig(output_file, dpi=300, bbox_inches='tight')
     plt.close()
     print(f"  ✓ {output_file.name}")
 
-def plot_performance_scaling(df, output_dir):
+def plot_performance_scaling(df, output_file):
     """图5: 性能扩展性（归一化）"""
     plt.figure(figsize=(10, 6))
 
@@ -145,12 +138,12 @@ def plot_performance_scaling(df, output_dir):
                 f'{val:.2f}x', ha='center', va='bottom', fontsize=11, fontweight='bold')
 
     plt.tight_layout()
-    output_file = output_dir / '5_performance_scaling.png'
     plt.savefig(output_file, dpi=300, bbox_inches='tight')
     plt.close()
+    print(f"  ✓ {output_file.name}")
 
 
-def plot_throughput(df, output_dir):
+def plot_throughput(df, output_file):
     """图6: 搜索吞吐量"""
     plt.figure(figsize=(10, 6))
 
@@ -172,14 +165,23 @@ def plot_throughput(df, output_dir):
                 ha='center', va='bottom', fontsize=10, fontweight='bold')
 
     plt.tight_layout()
-    output_file = output_dir / '6_throughput.png'
     plt.savefig(output_file, dpi=300, bbox_inches='tight')
     plt.close()
     print(f"  ✓ {output_file.name}")
 
+# (文件名, 绘图函数)
+PLOTS = [
+    ('1_end_to_end_latency.png', plot_end_to_end_latency),
+    ('2_server_latency.png', plot_server_latency),
+    ('3_client_query_time.png', plot_client_query_time),
+    ('4_latency_breakdown.png', plot_latency_breakdown),
+    ('5_performance_scaling.png', plot_performance_scaling),
+    ('6_throughput.png', plot_throughput),
+]
+
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python plot_individual.py <search_csv>")
+        print("Usage: python plot_individual.py <search_csv|run:id>")
         sys.exit(1)
 
     csv_file = sys.argv[1]
@@ -194,24 +196,20 @@ def main():
     print()
     print(f"Reading data: {csv_file}")
 
-    df = pd.read_csv(csv_file)
+    df = read_results(csv_file)
     print(f"Data points: {len(df)} writer configurations")
     print()
 
     print("Generating individual plots...")
-    plot_end_to_end_latency(df, output_dir)
-    plot_server_latency(df, output_dir)
-    plot_client_query_time(df, output_dir)
-    plot_latency_breakdown(df, output_dir)
-    plot_performance_scaling(df, output_dir)
-    plot_throughput(df, output_dir)
+    for name, plot in PLOTS:
+        plot(df, output_dir / name)
 
     print()
     print("=" * 70)
     print("  Complete!")
     print("=" * 70)
     print(f"Output directory: {output_dir}/")
-    print(f"Generated 6 individual plots")
+    print(f"Generated {len(PLOTS)} individual plots")
 
 if __name__ == "__main__":
     main()
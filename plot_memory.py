@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Hermes Memory Scaling - Visualization Script
+内存扩展性测试结果绘图脚本（memory_benchmark.py 的输出）
+"""
+
+import sys
+import pandas as pd
+import matplotlib.pyplot as plt
+from pathlib import Path
+
+from bench_store import read_results
+
+# 设置字体和样式 - 不使用中文，避免乱码（report.py 渲染本模块的图表时也使用该样式）
+DARKGRID = 'seaborn-v0_8-darkgrid' if 'seaborn-v0_8-darkgrid' in plt.style.available else 'seaborn-darkgrid'
+STYLE = [{'font.family': 'DejaVu Sans', 'axes.unicode_minus': False}, DARKGRID]
+plt.style.use(STYLE)
+
+STRUCTURES = ['EDTkn', 'PTkn', 'WTkn', 'Correlation', 'Output', 'PublicParameters']
+COLORS = ['#2E86AB', '#E63946', '#06A77D', '#F18F01', '#457B9D', '#6A4C93']
+
+
+def plot_lines(ax, df, x, y, group, group_label, xlabel, ylabel, title):
+    """每个分组（数据集规模或写者数）画一条曲线"""
+    for i, (name, part) in enumerate(df.groupby(group, sort=True)):
+        part = part.sort_values(x)
+        ax.plot(part[x], part[y], 'o-', linewidth=2.5, markersize=8,
+                color=COLORS[i % len(COLORS)], label=f'{group_label} {name:g}')
+    ax.set_xlabel(xlabel, fontsize=12, fontweight='bold')
+    ax.set_ylabel(ylabel, fontsize=12, fontweight='bold')
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.legend(fontsize=9)
+
+
+def render_memory(df, output_file):
+    """绘制每关键词/每文档字节数随写者数和数据集规模的变化"""
+    df = df.sort_values(['KeywordsPerWriter', 'Writers']).reset_index(drop=True)
+
+    fig = plt.figure(figsize=(18, 10))
+
+    # 1-2. 随写者数变化（每条曲线一个数据集规模）
+    plot_lines(plt.subplot(2, 3, 1), df, 'Writers', 'BytesPerKeyword', 'KeywordsPerWriter',
+               'Keywords/Writer', 'Number of Writers', 'Bytes', 'Index Bytes per Keyword')
+    plot_lines(plt.subplot(2, 3, 2), df, 'Writers', 'BytesPerPosting', 'KeywordsPerWriter',
+               'Keywords/Writer', 'Number of Writers', 'Bytes', 'Index Bytes per Posting')
+
+    # 3. 各结构的字节数（堆叠）
+    ax3 = plt.subplot(2, 3, 3)
+    labels = [f"{int(r['KeywordsPerWriter'])}/{int(r['Writers'])}" for _, r in df.iterrows()]
+    bottom = pd.Series(0.0, index=df.index)
+    for name, color in zip(STRUCTURES, COLORS):
+        column = f'{name}Bytes'
+        if column not in df.columns:
+            continue
+        values = df[column] / 2**20
+        ax3.bar(range(len(df)), values, 0.6, bottom=bottom, label=name, alpha=0.8, color=color)
+        bottom += values
+    ax3.set_xticks(range(len(df)))
+    ax3.set_xticklabels(labels, rotation=45, fontsize=9)
+    ax3.set_xlabel('Keywords per Writer / Writers', fontsize=12, fontweight='bold')
+    ax3.set_ylabel('Memory (MB)', fontsize=12, fontweight='bold')
+    ax3.set_title('Index Memory Breakdown', fontsize=14, fontweight='bold')
+    ax3.legend(fontsize=9)
+    ax3.grid(True, alpha=0.3, axis='y')
+
+    # 4-5. 随数据集规模变化（每条曲线一个写者数）
+    plot_lines(plt.subplot(2, 3, 4), df, 'Postings', 'BytesPerKeyword', 'Writers',
+               'Writers', 'Dataset Size (Postings)', 'Bytes', 'Index Bytes per Keyword vs Dataset Size')
+    plot_lines(plt.subplot(2, 3, 5), df, 'Postings', 'BytesPerPosting', 'Writers',
+               'Writers', 'Dataset Size (Postings)', 'Bytes', 'Index Bytes per Posting vs Dataset Size')
+
+    # 6. 索引统计与进程 RSS 对比
+    ax6 = plt.subplot(2, 3, 6)
+    ax6.plot(df['Postings'], df['RSS(MB)'], 'o', markersize=9, color='#E63946', label='Server RSS')
+    ax6.plot(df['Postings'], df['IndexMB'], 's', markersize=9, color='#2E86AB', label='Accounted Index')
+    ax6.set_xlabel('Dataset Size (Postings)', fontsize=12, fontweight='bold')
+    ax6.set_ylabel('Memory (MB)', fontsize=12, fontweight='bold')
+    ax6.set_title('Accounted Index vs Process RSS', fontsize=14, fontweight='bold')
+    ax6.grid(True, alpha=0.3)
+    ax6.legend(fontsize=10)
+
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+def plot_memory(csv_file, output_dir):
+    """读取内存测试数据并绘图"""
+    print(f"正在读取数据: {csv_file}")
+    df = read_results(csv_file)
+
+    print("数据预览:")
+    print(df.sort_values(['KeywordsPerWriter', 'Writers']).reset_index(drop=True)[
+        ['Writers', 'KeywordsPerWriter', 'Keywords', 'Postings', 'IndexMB', 'RSS(MB)',
+         'BytesPerKeyword', 'BytesPerPosting']])
+    print()
+
+    output_file = output_dir / 'memory_scaling.png'
+    render_memory(df, output_file)
+    print(f"✓ 保存图表: {output_file}")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("用法: python3 plot_memory.py <memory_csv|run:id>")
+        sys.exit(1)
+
+    csv_file = sys.argv[1]
+    output_dir = Path('benchmark_results')
+    output_dir.mkdir(exist_ok=True)
+    plot_memory(csv_file, output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,21 +5,18 @@
 """
 
 import sys
-import pandas as pd
 import matplotlib.pyplot as plt
-import matplotlib
 import numpy as np
 from pathlib import Path
 
-# 设置中文字体
-matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
-matplotlib.rcParams['axes.unicode_minus'] = False
+from bench_store import read_results
 
-def plot_module_performance(csv_file, output_dir):
+# 设置中文字体（report.py 渲染本模块的图表时也使用该样式）
+STYLE = [{'font.sans-serif': ['SimHei', 'DejaVu Sans'], 'axes.unicode_minus': False}]
+plt.style.use(STYLE)
+
+def render_module_performance(df, output_file):
     """绘制模块性能图"""
-    print(f"正在读取模块性能数据: {csv_file}")
-    df = pd.read_csv(csv_file)
-    
     # 创建图表
     fig, axes = plt.subplots(2, 2, figsize=(14, 10))
     fig.suptitle('Hermes 模块化性能测试', fontsize=16, fontweight='bold')
@@ -57,6 +54,14 @@ def plot_module_performance(csv_file, output_dir):
     ax3 = axes[1, 0]
     ax3.plot(df['Writers'], df['Extract(us)'], 's-', linewidth=2, markersize=8,
              color='#A23B72', label='HICKAE Extract')
+    if 'SearchToken(us)' in df.columns:
+        ax3.plot(df['Writers'], df['SearchToken(us)'], 'D-', linewidth=2, markersize=8,
+                 color='#06A77D', label='Search Token (all keys)')
+    for column in ['Extract(us)', 'SearchToken(us)']:
+        if column in df.columns:
+            for x_val, y_val in zip(df['Writers'], df[column]):
+                ax3.annotate(f'{y_val:.0f}', (x_val, y_val), textcoords='offset points',
+                             xytext=(0, 6), ha='center', fontsize=9)
     ax3.set_xlabel('Number of Writers', fontsize=12)
     ax3.set_ylabel('Time (μs)', fontsize=12)
     ax3.set_title('Key Extraction Performance', fontsize=13, fontweight='bold')
@@ -75,18 +80,22 @@ def plot_module_performance(csv_file, output_dir):
     ax4.legend()
     
     plt.tight_layout()
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+def plot_module_performance(csv_file, output_dir):
+    """读取模块性能数据并绘图"""
+    print(f"正在读取模块性能数据: {csv_file}")
+    df = read_results(csv_file)
     
     output_file = output_dir / 'module_performance.png'
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    render_module_performance(df, output_file)
     print(f"✓ 保存图表: {output_file}")
     
     return df
 
-def plot_search_performance(csv_file, output_dir):
+def render_search_performance(df, output_file):
     """绘制搜索性能图"""
-    print(f"正在读取搜索性能数据: {csv_file}")
-    df = pd.read_csv(csv_file)
-    
     # 创建图表
     fig, axes = plt.subplots(1, 2, figsize=(14, 5))
     fig.suptitle('Hermes 搜索性能测试', fontsize=16, fontweight='bold')
@@ -123,9 +132,16 @@ def plot_search_performance(csv_file, output_dir):
     ax2.grid(True, alpha=0.3, axis='y')
     
     plt.tight_layout()
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+def plot_search_performance(csv_file, output_dir):
+    """读取搜索性能数据并绘图"""
+    print(f"正在读取搜索性能数据: {csv_file}")
+    df = read_results(csv_file)
     
     output_file = output_dir / 'search_performance.png'
-    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    render_search_performance(df, output_file)
     print(f"✓ 保存图表: {output_file}")
     
     return df
@@ -141,13 +157,14 @@ def generate_summary_report(module_df, search_df, output_dir):
         
         f.write("1. 模块性能\n")
         f.write("-" * 60 + "\n")
-        f.write(f"{'写者数':<10} {'Encrypt(μs)':<15} {'Extract(μs)':<15} {'初始化(ms)':<15}\n")
+        f.write(f"{'写者数':<10} {'Encrypt(μs)':<15} {'Extract(μs)':<15} {'SearchToken(μs)':<18} {'初始化(ms)':<15}\n")
         f.write("-" * 60 + "\n")
         
         for _, row in module_df.iterrows():
             total_init = row['Setup(ms)'] + row['KeyGen(ms)'] + row['IGen(ms)'] + row['Prep(ms)']
+            search_token = row.get('SearchToken(us)', float('nan'))
             f.write(f"{int(row['Writers']):<10} {row['Encrypt(us)']:<15.2f} "
-                   f"{row['Extract(us)']:<15.2f} {total_init:<15.2f}\n")
+                   f"{row['Extract(us)']:<15.2f} {search_token:<18.2f} {total_init:<15.2f}\n")
         
         f.write("\n2. 搜索性能\n")
         f.write("-" * 60 + "\n")
@@ -164,7 +181,7 @@ def generate_summary_report(module_df, search_df, output_dir):
 
 def main():
     if len(sys.argv) < 3:
-        print("用法: python3 plot_results.py <module_csv> <search_csv>")
+        print("用法: python3 plot_results.py <module_csv|run:id> <search_csv|run:id>")
         sys.exit(1)
     
     module_csv = sys.argv[1]
@@ -5,29 +5,19 @@ Hermes Performance Testing - Visualization Script
 """
 
 import sys
-import pandas as pd
 import matplotlib.pyplot as plt
-import matplotlib
 import numpy as np
 from pathlib import Path
 
-# 设置字体 - 不使用中文，避免乱码
-matplotlib.rcParams['font.family'] = 'DejaVu Sans'
-matplotlib.rcParams['axes.unicode_minus'] = False
-try:
-    plt.style.use('seaborn-v0_8-darkgrid')
-except:
-    plt.style.use('seaborn-darkgrid')
+from bench_store import read_results
 
-def plot_search_performance(csv_file, output_dir):
-    """绘制搜索性能图"""
-    print(f"正在读取数据: {csv_file}")
-    df = pd.read_csv(csv_file)
-
-    print(f"数据预览:")
-    print(df)
-    print()
+# 设置字体和样式 - 不使用中文，避免乱码（report.py 渲染本模块的图表时也使用该样式）
+DARKGRID = 'seaborn-v0_8-darkgrid' if 'seaborn-v0_8-darkgrid' in plt.style.available else 'seaborn-darkgrid'
+STYLE = [{'font.family': 'DejaVu Sans', 'axes.unicode_minus': False}, DARKGRID]
+plt.style.use(STYLE)
 
+def render_search_performance(df, output_file):
+    """绘制搜索性能图（每个写者数一行，可带标准差列）"""
     # 检查是否有标准差列
     has_std = 'EndToEndStdDev' in df.columns
 
@@ -148,13 +138,82 @@ def plot_search_performance(csv_file, output_dir):
     fig.suptitle('HICKAG-DB - Search Performance Test', fontsize=18, fontweight='bold', y=0.995)
     
     plt.tight_layout(rect=[0, 0, 1, 0.99])
-    
-    output_file = output_dir / 'hermes_performance.png'
     plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+def plot_search_performance(csv_file, output_dir):
+    """读取搜索性能数据并绘图"""
+    print(f"正在读取数据: {csv_file}")
+    df = read_results(csv_file)
+
+    print(f"数据预览:")
+    print(df)
+    print()
+
+    output_file = output_dir / 'hermes_performance.png'
+    render_search_performance(df, output_file)
     print(f"✓ 保存图表: {output_file}")
     
     return df
 
+def render_load_curve(df, output_file):
+    """绘制延迟-负载曲线（loadgen.py 的汇总结果）"""
+    overall = df[df['Kind'] == 'All'].sort_values('TargetRate(req/s)')
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+
+    # 1. 延迟分位数 vs 实际吞吐量
+    ax1 = axes[0]
+    for column, marker, color in [('P50Latency(ms)', 'o-', '#2E86AB'),
+                                  ('P90Latency(ms)', 's-', '#06A77D'),
+                                  ('P99Latency(ms)', '^-', '#F18F01'),
+                                  ('P999Latency(ms)', 'D-', '#E63946')]:
+        ax1.plot(overall['Throughput(req/s)'], overall[column], marker, linewidth=2.5,
+                 markersize=8, color=color, label=column.replace('Latency(ms)', ''))
+    for kind, color in [('Search', '#457B9D'), ('Update', '#A23B72')]:
+        part = df[df['Kind'] == kind].sort_values('TargetRate(req/s)')
+        if not part.empty:
+            ax1.plot(part['TargetRate(req/s)'], part['P99Latency(ms)'], '--', linewidth=1.5,
+                     color=color, alpha=0.7, label=f'{kind} P99 (by target rate)')
+    ax1.set_yscale('log')
+    ax1.set_xlabel('Throughput (req/s)', fontsize=12, fontweight='bold')
+    ax1.set_ylabel('Latency (ms)', fontsize=12, fontweight='bold')
+    ax1.set_title('Latency vs Load', fontsize=14, fontweight='bold')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(fontsize=10)
+
+    # 2. 实际吞吐量 vs 目标到达率
+    ax2 = axes[1]
+    ax2.plot(overall['TargetRate(req/s)'], overall['Throughput(req/s)'], 'o-', linewidth=2.5,
+             markersize=10, color='#2E86AB', label='Achieved Throughput')
+    ax2.plot(overall['TargetRate(req/s)'], overall['TargetRate(req/s)'], '--', linewidth=2,
+             color='gray', alpha=0.6, label='Offered Load')
+    ax2.set_xlabel('Target Arrival Rate (req/s)', fontsize=12, fontweight='bold')
+    ax2.set_ylabel('Throughput (req/s)', fontsize=12, fontweight='bold')
+    ax2.set_title('Throughput vs Offered Load', fontsize=14, fontweight='bold')
+    ax2.grid(True, alpha=0.3)
+    ax2.legend(fontsize=10)
+
+    fig.suptitle('HICKAG-DB - Open-Loop Load Test', fontsize=18, fontweight='bold', y=0.995)
+    plt.tight_layout(rect=[0, 0, 1, 0.99])
+    plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+def plot_load_curve(csv_file, output_dir):
+    """读取负载测试数据并绘制延迟-负载曲线"""
+    print(f"正在读取负载测试数据: {csv_file}")
+    df = read_results(csv_file)
+
+    print("数据预览:")
+    print(df[df['Kind'] == 'All'].sort_values('TargetRate(req/s)'))
+    print()
+
+    output_file = output_dir / 'latency_vs_load.png'
+    render_load_curve(df, output_file)
+    print(f"✓ 保存图表: {output_file}")
+
+    return df
+
 def generate_report(df, output_dir):
     """生成性能报告"""
     report_file = output_dir / 'performance_report.txt'
@@ -199,7 +258,7 @@ def generate_report(df, output_dir):
 
 def main():
     if len(sys.argv) < 2:
-        print("用法: python3 plot_simple_results.py <search_csv>")
+        print("用法: python3 plot_simple_results.py <search_csv|loadgen_summary_csv|run:id>")
         sys.exit(1)
     
     csv_file = sys.argv[1]
@@ -208,6 +267,13 @@ def main():
     output_dir = Path('benchmark_results')
     output_dir.mkdir(parents=True, exist_ok=True)
     
+    # 负载生成器的结果绘制延迟-负载曲线
+    if 'TargetRate(req/s)' in read_results(csv_file).columns:
+        plot_load_curve(csv_file, output_dir)
+        print(f"输出目录: {output_dir}/")
+        print("  - latency_vs_load.png (延迟-负载曲线)")
+        return
+    
     print("=" * 70)
     print("  Hermes 性能测试结果分析")
     print("=" * 70)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+查询捕获文件读写工具
+客户端会话模式下执行 `capture <file>` 后，发送给服务器的每条消息
+（'S' 搜索、'U' 更新、'R' 重建）都会按原始字节记录到捕获文件中。
+
+文件格式（小端序）:
+    "HRMSCAP1"
+    记录: 类型(1B) | 时间戳 us(8B) | 写者子集大小(4B) |
+          标签长度(2B) | 标签 | 负载长度(8B) | 负载
+"""
+
+import struct
+import sys
+from collections import namedtuple
+
+CAPTURE_MAGIC = b'HRMSCAP1'
+
+_RECORD_HEAD = struct.Struct('<cQiH')
+_PAYLOAD_LEN = struct.Struct('<Q')
+
+CapturedQuery = namedtuple('CapturedQuery',
+                           ['kind', 'timestamp_us', 'writer_subset_size', 'label', 'payload'])
+
+
+def read_capture(path):
+    """读取捕获文件，返回 CapturedQuery 列表"""
+    queries = []
+    with open(path, 'rb') as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} 不是有效的查询捕获文件")
+
+        while True:
+            head = f.read(_RECORD_HEAD.size)
+            if not head:
+                break
+            if len(head) < _RECORD_HEAD.size:
+                raise ValueError(f"{path} 中的记录不完整")
+            kind, timestamp_us, subset_size, label_len = _RECORD_HEAD.unpack(head)
+            label = f.read(label_len).decode('utf-8', errors='replace')
+            payload_len, = _PAYLOAD_LEN.unpack(f.read(_PAYLOAD_LEN.size))
+            payload = f.read(payload_len)
+            if len(payload) < payload_len:
+                raise ValueError(f"{path} 中的记录不完整")
+            queries.append(CapturedQuery(kind.decode(), timestamp_us, subset_size, label, payload))
+
+    return queries
+
+
+def write_capture(path, queries):
+    """将 CapturedQuery 列表写入捕获文件"""
+    with open(path, 'wb') as f:
+        f.write(CAPTURE_MAGIC)
+        for q in queries:
+            label = q.label.encode('utf-8')
+            f.write(_RECORD_HEAD.pack(q.kind.encode(), q.timestamp_us,
+                                      q.writer_subset_size, len(label)))
+            f.write(label)
+            f.write(_PAYLOAD_LEN.pack(len(q.payload)))
+            f.write(q.payload)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("用法: python3 query_capture.py <capture_file>")
+        sys.exit(1)
+
+    queries = read_capture(sys.argv[1])
+    print(f"{'序号':<6} {'类型':<6} {'时间戳(ms)':<14} {'写者数':<8} {'字节数':<10} 标签")
+    for i, q in enumerate(queries, 1):
+        print(f"{i:<6} {q.kind:<6} {q.timestamp_us / 1000.0:<14.2f} "
+              f"{q.writer_subset_size:<8} {len(q.payload):<10} {q.label}")
+
+
+if __name__ == "__main__":
+    main()
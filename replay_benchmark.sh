@@ -0,0 +1,110 @@
+#!/bin/bash
+# 确定性回放测试：搜索查询只由客户端生成一次并捕获，之后按字节回放，
+# 只测量服务器端延迟，便于在相同负载上对比不同版本的服务器
+#
+# 用法: ./replay_benchmark.sh [<capture_file>]
+#   不指定捕获文件时，先用客户端会话模式生成一个新的捕获文件
+
+# 清理函数：确保服务器进程被杀死和端口释放
+cleanup() {
+    echo "清理残留进程和端口..."
+    pkill -9 -f "server/server" 2>/dev/null || true
+    PORT_PID=$(lsof -ti:8888 2>/dev/null)
+    if [ ! -z "$PORT_PID" ]; then
+        kill -9 $PORT_PID 2>/dev/null || true
+    fi
+    sleep 3
+}
+
+trap cleanup EXIT INT TERM
+cleanup
+
+echo "========================================"
+echo "  Hermes 确定性回放测试"
+echo "========================================"
+echo ""
+
+# 配置参数
+SERVER_WRITERS=25
+WRITERS=(5 10 15 20 25)
+KEYWORD="database"
+NUM_RUNS=3
+RESULTS_DIR="benchmark_results"
+TIMESTAMP=$(date +%Y%m%d_%H%M%S)
+CAPTURE_FILE=${1:-"$RESULTS_DIR/queries_$TIMESTAMP.bin"}
+
+mkdir -p $RESULTS_DIR
+CAPTURE_FILE=$(realpath -m $CAPTURE_FILE)
+
+# 编译
+cd Hermes
+if [ ! -f "server/server" ] || [ ! -f "client/client" ]; then
+    echo "编译中..."
+    make clean > /dev/null 2>&1
+    make > /dev/null 2>&1
+    if [ $? -ne 0 ]; then
+        echo "✗ 编译失败"
+        exit 1
+    fi
+    echo "✓ 编译成功"
+fi
+cd ..
+
+# 启动服务器
+SERVER_LOG="$RESULTS_DIR/server_replay_$TIMESTAMP.log"
+cd Hermes/server
+./server $SERVER_WRITERS > ../../$SERVER_LOG 2>&1 &
+SERVER_PID=$!
+cd ../..
+
+echo "服务器 PID: $SERVER_PID"
+echo "等待服务器初始化..."
+sleep 10
+
+if ! kill -0 $SERVER_PID 2>/dev/null; then
+    echo "✗ 服务器启动失败，检查日志:"
+    tail -20 $SERVER_LOG
+    exit 1
+fi
+echo "✓ 服务器启动成功"
+echo ""
+
+# 生成捕获文件（每个写者数量一条搜索查询）
+if [ ! -f "$CAPTURE_FILE" ]; then
+    echo "========================================"
+    echo "  捕获查询"
+    echo "========================================"
+    COMMANDS="capture $CAPTURE_FILE"
+    for n in "${WRITERS[@]}"; do
+        COMMANDS="$COMMANDS"$'\n'"search $KEYWORD $n"
+    done
+    cd Hermes/client
+    echo "$COMMANDS" | ./client -b - > /dev/null 2>&1
+    cd ../..
+    if [ ! -s "$CAPTURE_FILE" ]; then
+        echo "✗ 捕获查询失败"
+        exit 1
+    fi
+    echo "✓ 捕获文件: $CAPTURE_FILE"
+    echo ""
+fi
+
+echo "========================================"
+echo "  回放查询（$NUM_RUNS 轮）"
+echo "========================================"
+python replay_queries.py "$CAPTURE_FILE" --kinds S --schedule asap --repeat $NUM_RUNS --output-dir $RESULTS_DIR
+
+if [ $? -ne 0 ]; then
+    echo "✗ 回放失败"
+    exit 1
+fi
+
+echo ""
+echo "========================================"
+echo "  测试完成！"
+echo "========================================"
+echo ""
+echo "捕获文件: $CAPTURE_FILE"
+echo "使用相同的捕获文件对比其他版本的服务器:"
+echo "  ./replay_benchmark.sh $CAPTURE_FILE"
+echo ""
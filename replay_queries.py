@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+查询确定性回放工具
+将客户端捕获的查询字节（'S' / 'U' / 'R'）按精确时间依次发送给服务器，
+每条查询完成后通过 'L' 请求读取服务器端延迟，只记录服务器处理时间，
+不包含客户端生成查询（HICKAE_Extract）的开销。
+
+同一个捕获文件可以在不同版本的服务器上回放，实现字节级一致的 A/B 测试。
+注意：回放 'U' / 'R' 消息会修改服务器索引，需要在新启动的服务器上回放才能复现结果。
+
+用法示例:
+    python3 replay_queries.py capture.bin --repeat 5 --schedule interval --interval 0.5
+"""
+
+import argparse
+import csv
+import hashlib
+import math
+import struct
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import zmq
+
+from query_capture import read_capture
+
+_LATENCY_REPLY = struct.Struct('<cd')
+
+
+def capture_digest(path):
+    """计算捕获文件的 SHA-256，用于确认两次回放的负载完全一致"""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def wait_until(deadline):
+    """睡眠到截止时刻前约 2ms，然后忙等，保证发送时刻的精度"""
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return
+        if remaining > 0.002:
+            time.sleep(remaining - 0.002)
+
+
+def server_latency(sock):
+    """读取服务器最近一次查询的类型和处理延迟（us）"""
+    sock.send(b'L')
+    kind, latency = _LATENCY_REPLY.unpack(sock.recv())
+    return kind.decode(errors='replace'), latency
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return float('nan')
+    index = min(len(ordered) - 1, max(0, int(math.ceil(p / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def replay(args):
+    queries = [q for q in read_capture(args.capture) if q.kind in args.kinds]
+    if not queries:
+        raise SystemExit("错误：捕获文件中没有符合条件的查询")
+
+    digest = capture_digest(args.capture)
+    print(f"捕获文件: {args.capture}")
+    print(f"  - SHA-256: {digest}")
+    print(f"  - 回放查询: {len(queries)} 条 x {args.repeat} 轮")
+    print()
+
+    ctx = zmq.Context()
+    sock = ctx.socket(zmq.REQ)
+    sock.setsockopt(zmq.LINGER, 0)
+    sock.connect(args.endpoint)
+
+    records = []
+    try:
+        for rnd in range(1, args.repeat + 1):
+            print(f"第 {rnd}/{args.repeat} 轮回放...")
+            base_time = queries[0].timestamp_us
+            start = time.perf_counter()
+            deadline = start
+
+            for seq, q in enumerate(queries, 1):
+                if args.schedule == 'captured':
+                    deadline = start + (q.timestamp_us - base_time) / 1e6 / args.speed
+                elif args.schedule == 'interval':
+                    deadline = start + (seq - 1) * args.interval
+                else:
+                    deadline = time.perf_counter()
+                wait_until(deadline)
+
+                sent = time.perf_counter()
+                sock.send(q.payload)
+                reply = sock.recv()
+                round_trip = (time.perf_counter() - sent) * 1e6
+
+                # 被拒绝的查询（如写者子集超过服务器的写者数）不会更新服务器记录的最近一次查询
+                if reply.startswith(b'ERR'):
+                    print(f"  ⚠ 第 {seq} 条查询未被服务器处理（类型 {q.kind}，标签 {q.label}）")
+                    continue
+
+                kind, latency = server_latency(sock)
+                if kind != q.kind:
+                    print(f"  ⚠ 第 {seq} 条查询未被服务器处理（类型 {q.kind}，标签 {q.label}）")
+                    continue
+
+                records.append({
+                    'Round': rnd, 'Seq': seq, 'Kind': q.kind, 'Label': q.label,
+                    'Writers': q.writer_subset_size, 'PayloadBytes': len(q.payload),
+                    'ServerLatency(us)': round(latency, 1),
+                    'RoundTrip(us)': round(round_trip, 1),
+                    'SendLag(us)': round((sent - deadline) * 1e6, 1),
+                })
+                print(f"  [{q.kind}] {q.label} ({q.writer_subset_size} 写者): "
+                      f"服务器 {latency / 1000.0:.2f} ms")
+
+            if rnd < args.repeat and args.pause > 0:
+                time.sleep(args.pause)
+    finally:
+        sock.close()
+        ctx.term()
+
+    return records, digest
+
+
+def summarize(records, digest):
+    """按 (类型, 标签, 写者数) 汇总服务器端延迟"""
+    groups = defaultdict(list)
+    for r in records:
+        groups[(r['Kind'], r['Label'], r['Writers'])].append(r['ServerLatency(us)'] / 1000.0)
+
+    rows = []
+    for (kind, label, writers), values in sorted(groups.items()):
+        mean = sum(values) / len(values)
+        std = math.sqrt(sum((v - mean) ** 2 for v in values) / len(values))
+        rows.append({
+            'Kind': kind, 'Label': label, 'Writers': writers, 'Samples': len(values),
+            'ServerLatency(ms)': round(mean, 2), 'ServerStdDev': round(std, 2),
+            'P50Latency(ms)': round(percentile(values, 50), 2),
+            'P99Latency(ms)': round(percentile(values, 99), 2),
+            'CaptureSHA256': digest[:16],
+        })
+    return rows
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"✓ 保存结果: {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Hermes 查询确定性回放工具')
+    parser.add_argument('capture', help='客户端会话模式生成的查询捕获文件')
+    parser.add_argument('--endpoint', default='tcp://127.0.0.1:8888', help='服务器地址')
+    parser.add_argument('--kinds', default='SUR', help="回放的查询类型，如 'S' 或 'SU'")
+    parser.add_argument('--schedule', choices=['captured', 'interval', 'asap'], default='captured',
+                        help='发送时刻: 按捕获时间戳 / 固定间隔 / 上一条完成后立即发送')
+    parser.add_argument('--speed', type=float, default=1.0, help='按捕获时间戳回放时的加速倍数')
+    parser.add_argument('--interval', type=float, default=1.0, help='固定间隔模式下的发送间隔 (s)')
+    parser.add_argument('--repeat', type=int, default=1, help='回放轮数')
+    parser.add_argument('--pause', type=float, default=1.0, help='两轮之间的间隔 (s)')
+    parser.add_argument('--output-dir', default='benchmark_results', help='结果目录')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    records, digest = replay(args)
+    if not records:
+        print("✗ 没有成功回放的查询")
+        sys.exit(1)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    print()
+    write_csv(output_dir / f'replay_{timestamp}.csv', records)
+    write_csv(output_dir / f'replay_summary_{timestamp}.csv', summarize(records, digest))
+
+
+if __name__ == "__main__":
+    main()
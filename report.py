@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Hermes 测试报告生成
+一次读取 benchmark_results 中各类最新的测试结果（只读取绘图需要的列），
+将原始样本按横轴分组聚合后，用进程池并行渲染全部图表；
+图表的输入数据和绘图代码未变化时跳过渲染（哈希记录在输出目录的 .report_manifest.json）。
+
+用法:
+    python3 report.py
+    python3 report.py --search run:latest --jobs 4
+    python3 report.py --force
+
+各数据源默认使用结果目录中最新的文件，也可以用 CSV 文件名或 run:<id> 指定:
+    search            search_samples_*.csv / search_performance_*.csv（simple_benchmark.sh 等）
+    module            module_performance_*.csv（benchmark.sh）
+    search_breakdown  search_performance_*.csv（benchmark.sh，含 SearchLatency(ms)）
+    loadgen           loadgen_summary_*.csv（loadgen.py）
+    memory            memory_*.csv（memory_benchmark.py）
+"""
+
+import argparse
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import plot_individual
+import plot_memory
+import plot_results
+import plot_simple_results
+from bench_store import STDDEV_COLUMNS, load_frame
+
+MANIFEST = '.report_manifest.json'
+
+# 数据源: 文件名模式（同一时间戳时靠前的优先）, 必需的列, 可选的列, 聚合分组的列
+SEARCH_METRICS = ['ClientQueryTime(ms)', 'EndToEndLatency(ms)', 'ServerLatency(ms)']
+SOURCES = {
+    'search': (['search_samples_*.csv', 'search_performance_*.csv'],
+               ['Writers'] + SEARCH_METRICS, list(STDDEV_COLUMNS.values()), ['Writers']),
+    'module': (['module_performance_*.csv'],
+               ['Writers', 'Setup(ms)', 'KeyGen(ms)', 'IGen(ms)', 'Prep(ms)', 'Encrypt(us)', 'Extract(us)'],
+               ['SearchToken(us)'], ['Writers']),
+    'search_breakdown': (['search_performance_*.csv'],
+                         ['Writers', 'SearchLatency(ms)', 'ServerLatency(ms)'], [], ['Writers']),
+    'loadgen': (['loadgen_summary_*.csv'],
+                ['Kind', 'TargetRate(req/s)', 'Throughput(req/s)', 'P50Latency(ms)', 'P90Latency(ms)',
+                 'P99Latency(ms)', 'P999Latency(ms)'], [], ['Kind', 'TargetRate(req/s)']),
+    'memory': (['memory_[0-9]*.csv'],
+               ['Writers', 'KeywordsPerWriter', 'Keywords', 'Postings', 'IndexMB', 'RSS(MB)',
+                'BytesPerKeyword', 'BytesPerPosting'],
+               [f'{name}Bytes' for name in plot_memory.STRUCTURES], ['KeywordsPerWriter', 'Writers']),
+}
+
+# (输出文件, 数据源, 绘图函数)；绘图函数的签名为 (df, output_file)，样式为所在模块的 STYLE
+FIGURES = [
+    ('hermes_performance.png', 'search', plot_simple_results.render_search_performance),
+] + [
+    (f'individual_plots/{name}', 'search', plot) for name, plot in plot_individual.PLOTS
+] + [
+    ('module_performance.png', 'module', plot_results.render_module_performance),
+    ('search_performance.png', 'search_breakdown', plot_results.render_search_performance),
+    ('latency_vs_load.png', 'loadgen', plot_simple_results.render_load_curve),
+    ('memory_scaling.png', 'memory', plot_memory.render_memory),
+]
+
+
+def find_latest(results_dir, patterns, required):
+    """结果目录中包含必需列的最新文件（只读取表头）"""
+    candidates = []
+    for priority, pattern in enumerate(patterns):
+        for path in Path(results_dir).glob(pattern):
+            candidates.append((path.stat().st_mtime, -priority, path))
+    for _, _, path in sorted(candidates, reverse=True):
+        try:
+            header = pd.read_csv(path, nrows=0).columns
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError):
+            continue
+        if all(c in header for c in required):
+            return str(path)
+    return None
+
+
+def load_source(spec, required, optional, keys):
+    """
+    读取一个数据源（CSV 或 run:<id>），只保留需要的列。
+    按分组列聚合为均值（原始样本每个分组有多行），并按 STDDEV_COLUMNS 补充缺少的标准差列。
+    """
+    columns = required + optional
+    if str(spec).startswith('run:'):
+        df = load_frame(str(spec)[4:])
+        df = df[[c for c in df.columns if c in columns]]
+    else:
+        df = pd.read_csv(spec, usecols=lambda c: c in columns)
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"{spec} 缺少列: {', '.join(missing)}")
+
+    grouped = df.groupby(keys, sort=True)
+    stats = grouped.mean()
+    std_columns = {m: s for m, s in STDDEV_COLUMNS.items() if m in stats.columns and s not in stats.columns}
+    if std_columns:
+        stats = stats.join(grouped[list(std_columns)].std(ddof=0).rename(columns=std_columns))
+    df = stats.reset_index()
+    if 'Writers' in df.columns:
+        df['Writers'] = df['Writers'].astype(int)
+    return df
+
+
+def figure_hash(name, plot, df):
+    """图表输入的哈希: 数据（列名、类型和值）、绘图模块的代码和样式"""
+    module = sys.modules[plot.__module__]
+    h = hashlib.sha256()
+    h.update(name.encode())
+    h.update(plot.__qualname__.encode())
+    h.update(inspect.getsource(module).encode())
+    h.update(repr(module.STYLE).encode())
+    h.update(repr([(c, str(t)) for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def render(plot, df, output_file):
+    """渲染一个图表（在工作进程中执行），返回耗时（秒）"""
+    start = time.perf_counter()
+    style = sys.modules[plot.__module__].STYLE
+    with plt.style.context(['default'] + style), contextlib.redirect_stdout(io.StringIO()):
+        plot(df, Path(output_file))
+    plt.close('all')
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='增量、并行地生成测试报告图表')
+    parser.add_argument('--results-dir', default='benchmark_results', help='测试结果目录')
+    parser.add_argument('--output-dir', help='图表输出目录（默认 <results-dir>/report）')
+    for source in SOURCES:
+        parser.add_argument(f"--{source.replace('_', '-')}", dest=source, metavar='CSV|run:id',
+                            help=f'{source} 数据源（默认为结果目录中最新的文件）')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='并行渲染的进程数')
+    parser.add_argument('--force', action='store_true', help='重新渲染所有图表')
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir or Path(args.results_dir) / 'report')
+    start = time.perf_counter()
+
+    print("=" * 70)
+    print("  Hermes 测试报告")
+    print("=" * 70)
+    print()
+
+    # 每个数据源只读取一次
+    frames = {}
+    for source, (patterns, required, optional, keys) in SOURCES.items():
+        spec = getattr(args, source) or find_latest(args.results_dir, patterns, required)
+        if spec is None:
+            continue
+        try:
+            frames[source] = load_source(spec, required, optional, keys)
+        except (OSError, ValueError) as e:
+            print(f"✗ 读取 {source} 失败: {e}")
+            continue
+        print(f"✓ {source}: {spec} ({len(frames[source])} 行)")
+    if not frames:
+        print(f"✗ {args.results_dir} 中没有可用的测试结果")
+        sys.exit(1)
+
+    manifest_file = output_dir / MANIFEST
+    manifest = json.loads(manifest_file.read_text()) if manifest_file.exists() else {}
+
+    stale, skipped = [], 0
+    for name, source, plot in FIGURES:
+        if source not in frames:
+            continue
+        digest = figure_hash(name, plot, frames[source])
+        if not args.force and manifest.get(name) == digest and (output_dir / name).exists():
+            skipped += 1
+            continue
+        (output_dir / name).parent.mkdir(parents=True, exist_ok=True)
+        stale.append((name, source, plot, digest))
+
+    print()
+    print(f"渲染 {len(stale)} 个图表（{skipped} 个未变化）...")
+    failed = 0
+    jobs = {}
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(stale)))) as pool:
+        for name, source, plot, digest in stale:
+            jobs[pool.submit(render, plot, frames[source], output_dir / name)] = (name, digest)
+        for future in as_completed(jobs):
+            name, digest = jobs[future]
+            try:
+                elapsed = future.result()
+            except Exception as e:
+                failed += 1
+                manifest.pop(name, None)
+                print(f"  ✗ {name}: {e}")
+                continue
+            manifest[name] = digest
+            print(f"  ✓ {name} ({elapsed:.1f} s)")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_file.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+    print()
+    print(f"✓ 更新 {len(stale) - failed} 个, 跳过 {skipped} 个, 失败 {failed} 个, "
+          f"耗时 {time.perf_counter() - start:.1f} s")
+    print(f"输出目录: {output_dir}/")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()